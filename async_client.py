@@ -0,0 +1,470 @@
+import asyncio
+import json
+import random
+import ssl
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlencode, urlsplit
+
+from main import BASE_URL
+from stats import registry
+from token_cache import TokenCache
+
+
+class AsyncResponse:
+    """
+    Response of a request sent through an AsyncConnectionPool.
+
+    Mirrors the parts of requests.Response used by the test suites, so code
+    checking status_code or calling json() works with either client.
+    """
+
+    def __init__(self, method, url, status_code, reason, headers, content):
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def __repr__(self):
+        return f'<AsyncResponse [{self.status_code}]>'
+
+
+class _StaleConnection(ConnectionError):
+    """
+    Raised when a pooled connection is closed before any response byte was read
+    """
+
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @property
+    def reusable(self):
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncConnectionPool:
+    """
+    Keep-alive HTTP/1.1 connection pool for asyncio.
+
+    Connections are kept per (scheme, host, port) and handed out to one request
+    at a time. The number of requests in flight is bounded globally by limit and
+    per host by limit_per_host, so a single event loop can queue any number of
+    requests without opening an unbounded number of sockets.
+    """
+
+    def __init__(self, limit=1000, limit_per_host=100, ssl_context=None):
+        """
+        :param      limit:          Maximum number of requests in flight over all hosts
+        :param      limit_per_host: Maximum number of requests in flight to a single host
+        :param      ssl_context:    SSL context for https hosts, the default context if None
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.connections_opened = 0
+
+        self._idle = defaultdict(deque)
+        self._host_slots = {}
+        self._slots = None
+
+    def _host_semaphore(self, key):
+        if key not in self._host_slots:
+            self._host_slots[key] = asyncio.Semaphore(self.limit_per_host)
+        return self._host_slots[key]
+
+    async def _connect(self, scheme, host, port):
+        context = self.ssl_context if scheme == 'https' else None
+        reader, writer = await asyncio.open_connection(host, port, ssl=context)
+        self.connections_opened += 1
+        return _Connection(reader, writer)
+
+    def _acquire_idle(self, key):
+        idle = self._idle[key]
+        while idle:
+            connection = idle.pop()
+            if connection.reusable:
+                return connection
+            connection.close()
+        return None
+
+    async def request(self, method, url, headers=None, body=None, timeout=None):
+        """
+        Send a request and read the whole response
+        :param      method:     HTTP method
+        :param      url:        Absolute http or https url
+        :param      headers:    Additional request headers
+        :param      body:       Request body as bytes
+        :param      timeout:    Timeout of the whole exchange in seconds, no timeout if None
+        :return:    response:   AsyncResponse
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limit)
+
+        parts = urlsplit(url)
+        scheme = parts.scheme
+        host = parts.hostname
+        port = parts.port or (443 if scheme == 'https' else 80)
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+
+        key = (scheme, host, port)
+        request = self._encode_request(method, target, parts.netloc, headers, body)
+
+        async with self._slots, self._host_semaphore(key):
+            exchange = self._exchange(key, method, url, request)
+            if timeout is None:
+                return await exchange
+            return await asyncio.wait_for(exchange, timeout)
+
+    async def _exchange(self, key, method, url, request):
+        connection = self._acquire_idle(key)
+        if connection is not None:
+            try:
+                return await self._send(key, connection, method, url, request)
+            except (_StaleConnection, BrokenPipeError):
+                # The server closed the idle keep-alive connection, retry on a fresh one
+                connection.close()
+
+        connection = await self._connect(*key)
+        return await self._send(key, connection, method, url, request)
+
+    async def _send(self, key, connection, method, url, request):
+        try:
+            connection.writer.write(request)
+            await connection.writer.drain()
+            response, keep_alive = await self._read_response(connection.reader, method, url)
+        except BaseException:
+            connection.close()
+            raise
+
+        if keep_alive and connection.reusable:
+            self._idle[key].append(connection)
+        else:
+            connection.close()
+        return response
+
+    @staticmethod
+    def _encode_request(method, target, netloc, headers, body):
+        lines = [f'{method} {target} HTTP/1.1', f'Host: {netloc}', 'Connection: keep-alive', 'Accept: */*']
+        for name, value in (headers or {}).items():
+            lines.append(f'{name}: {value}')
+        if body is not None or method in ('POST', 'PUT'):
+            lines.append(f'Content-Length: {len(body or b"")}')
+        head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+        return head + (body or b'')
+
+    @staticmethod
+    async def _read_response(reader, method, url):
+        status_line = await reader.readline()
+        if not status_line:
+            raise _StaleConnection('Connection closed before a response was received')
+        version, status, *reason = status_line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+        status_code = int(status)
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        connection_header = headers.get('connection', '').lower()
+        keep_alive = connection_header != 'close' and version != 'HTTP/1.0'
+
+        if method == 'HEAD' or status_code in (204, 304) or 100 <= status_code < 200:
+            content = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';', 1)[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            content = b''.join(chunks)
+        elif 'content-length' in headers:
+            content = await reader.readexactly(int(headers['content-length']))
+        else:
+            content = await reader.read()
+            keep_alive = False
+
+        return AsyncResponse(method, url, status_code, reason[0] if reason else '', headers, content), keep_alive
+
+    async def close(self):
+        """
+        Close all idle connections of the pool
+        """
+        for idle in self._idle.values():
+            while idle:
+                connection = idle.pop()
+                connection.close()
+                try:
+                    await connection.writer.wait_closed()
+                except (ConnectionError, ssl.SSLError):
+                    pass
+
+
+class AsyncBookStoreClient:
+    """
+    Asyncio counterpart of main.BookStoreClient.
+
+    Every operation of main.py is available as a coroutine returning an
+    AsyncResponse. Clients created with the same pool share its connections
+    and its per-host concurrency limit.
+    """
+
+    def __init__(self, base_url=BASE_URL, pool=None, limit=1000, limit_per_host=100, timeout=30, token_cache=None,
+                 stats=None, single_flight=None):
+        """
+        :param      base_url:       Scheme and host of the BookStore API, e.g. https://demoqa.com
+        :param      pool:           AsyncConnectionPool to share, a new one is created if None
+        :param      limit:          Maximum number of requests in flight, used if pool is None
+        :param      limit_per_host: Maximum number of requests in flight per host, used if pool is None
+        :param      timeout:        Timeout of a single request in seconds
+        :param      token_cache:    TokenCache for bearer tokens, a new in-memory cache if None
+        :param      stats:          StatsRegistry recording call latencies, the shared stats.registry if None
+        :param      single_flight:  SingleFlight coalescing identical GETs in flight at the same time into one
+                                    request, every GET is sent if None
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.tokens = token_cache or TokenCache()
+        self.stats = stats or registry
+        self.single_flight = single_flight
+        self._owns_pool = pool is None
+        self.pool = pool or AsyncConnectionPool(limit=limit, limit_per_host=limit_per_host)
+
+    async def close(self):
+        """
+        Close the connections of the client, unless its pool is shared
+        """
+        if self._owns_pool:
+            await self.pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _request(self, method, path, json_body=None, params=None, headers=None, endpoint=None):
+        """
+        Send a request to the BookStore API over the pool and record its latency
+        :param      method:     HTTP method
+        :param      path:       Path of the endpoint, starting with '/'
+        :param      json_body:  Object to send as JSON body
+        :param      params:     Query parameters
+        :param      headers:    Additional request headers
+        :param      endpoint:   Endpoint template the latency is recorded under, the path if None
+        :return:    response:   AsyncResponse, shared with the callers it was coalesced with
+        """
+        url = self.base_url + path
+        if params:
+            url += '?' + urlencode(params)
+        headers = dict(headers or {})
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        if self.single_flight is not None and method == 'GET':
+            key = (url, tuple(sorted(headers.items())))
+            return await self.single_flight.ado(key, lambda: self._send(method, url, headers, body, endpoint or path))
+        return await self._send(method, url, headers, body, endpoint or path)
+
+    async def _send(self, method, url, headers, body, endpoint):
+        status = 0
+        started = time.perf_counter()
+        try:
+            response = await self.pool.request(method, url, headers=headers, body=body, timeout=self.timeout)
+            status = response.status_code
+            return response
+        finally:
+            self.stats.record(method, endpoint, status, time.perf_counter() - started)
+
+    @staticmethod
+    def _auth(token):
+        return {"Authorization": f'Bearer {token}'}
+
+    async def create_new_user(self, username, password):
+        """
+        Register a new user
+        :param      username:   Username to register with
+        :param      password:   Password to register with
+        :return:    response:   Response message
+        """
+        user = {
+            'userName': username,
+            'password': password
+        }
+        return await self._request('POST', '/Account/v1/User', json_body=user)
+
+    async def generate_token(self, username, password):
+        """
+        Generate Authorization Token for the specified user
+        :param      username:   Username of the specified user
+        :param      password:   Password of the specified user
+        :return:    response:   Response message
+        """
+        user = {
+            'userName': username,
+            'password': password
+        }
+        return await self._request('POST', '/Account/v1/GenerateToken', json_body=user)
+
+    async def login(self, username, password):
+        """
+        Log in as the specified user
+        :param      username:   Username of the specified user
+        :param      password:   Password of the specified user
+        :return:    response:   Response message with the userId of the user
+        """
+        user = {
+            'userName': username,
+            'password': password
+        }
+        return await self._request('POST', '/Account/v1/Login', json_body=user)
+
+    async def get_token(self, username, password):
+        """
+        Get a valid Authorization Token for the specified user, reusing a cached one when possible
+        :param      username:   Username of the specified user
+        :param      password:   Password of the specified user
+        :return:    token:      Bearer token, or None if the user could not be authorized
+        """
+        return await self.tokens.aget(username, password, self.generate_token)
+
+    async def delete_user(self, user_id, username, password):
+        """
+        Delete a registered user
+        :param      user_id:    User Id
+        :param      username:   Username to register with
+        :param      password:   Password to register with
+        :return:    response:   Response message
+        """
+        async def delete(token):
+            return await self._request('DELETE', f'/Account/v1/User/{user_id}', headers=self._auth(token),
+                                       endpoint='/Account/v1/User/{userId}')
+
+        response = await self.tokens.acall(username, password, self.generate_token, delete)
+        if response.status_code == 204:
+            self.tokens.invalidate(username)
+
+        return response
+
+    async def get_user_info(self, user_id, token):
+        """
+        Get information of specified user
+        :param      user_id:    Id of the specified user
+        :param      token:      Authorization token of the specified user
+        :return:    response:   Response message
+        """
+        return await self._request('GET', f'/Account/v1/User/{user_id}', headers=self._auth(token),
+                                   endpoint='/Account/v1/User/{userId}')
+
+    async def is_authorized(self, username, password):
+        """
+        Check if specified user is authorized
+        :param      username:   Username of the specified user
+        :param      password:   Password of the specified user
+        :return:    response:   Response message
+        """
+        user = {
+            'userName': username,
+            'password': password
+        }
+        return await self._request('POST', '/Account/v1/Authorized', json_body=user)
+
+    async def add_book(self, user_id, collection_isbns, token):
+        """
+        Add book/s to add to a specified user
+        :param      user_id:            UserId of specified user
+        :param      collection_isbns:   Isbn/s of books to add to the collection of the specified user
+        :param      token:              Token of specified user
+        :return:    response:           Response message
+        """
+        body = {
+            'userId': user_id,
+            'collectionOfIsbns': collection_isbns
+        }
+        return await self._request('POST', '/BookStore/v1/Books', json_body=body, headers=self._auth(token))
+
+    async def get_books(self):
+        """
+        Return all books in the store
+        :return:    response:   Response message
+        """
+        return await self._request('GET', '/BookStore/v1/Books')
+
+    async def get_book(self, isbn):
+        """
+        Get a book by a given isbn
+        :param      isbn:       Isbn of book wanted
+        :return:    response:   Response message
+        """
+        params = {
+            'ISBN': isbn
+        }
+        return await self._request('GET', '/BookStore/v1/Book', params=params)
+
+    async def get_random_book(self):
+        """
+        Get isbn of a random book
+        :return:    isbn:   random isbn
+        """
+        response = await self.get_books()
+        books = response.json()["books"]
+
+        return random.choice(books)["isbn"]
+
+    async def replace_book_in_collection(self, user_id, token, current_isbn, isbn_not_in_collection):
+        """
+        Replace book in collection with another
+        :param      user_id:        UserId of the specified User
+        :param      token:          Authorization token of specified user
+        :param      current_isbn:   Isbn in collection that is to be replaced
+        :param      isbn_not_in_collection:   New isbn to add to collection in place of the other
+        :return:    Response:       Response message
+        """
+        body = {
+            'userId': user_id,
+            'isbn': isbn_not_in_collection
+        }
+        return await self._request('PUT', f'/BookStore/v1/Books/{current_isbn}', json_body=body,
+                                   headers=self._auth(token), endpoint='/BookStore/v1/Books/{isbn}')
+
+    async def remove_book_from_collection(self, user_id, isbn, token):
+        """
+        Remove a book from the collection of a specified user
+        :param      user_id:    UserId of specified user
+        :param      isbn:       Isbn of the book you to be removed from the user's collection
+        :param      token:      Authorization token of the specified user
+        :return:    response:   Response message
+        """
+        body = {
+            'isbn': isbn,
+            'userId': user_id
+        }
+        return await self._request('DELETE', '/BookStore/v1/Book', json_body=body, headers=self._auth(token))
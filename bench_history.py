@@ -0,0 +1,341 @@
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import time
+from collections import namedtuple
+from statistics import median
+
+DEFAULT_HISTORY = 'bookstore_bench.sqlite'
+
+# Metrics of a benchmark row and whether a higher value is better
+METRICS = {
+    'ops_per_second': True,
+    'p50_ms': False,
+    'p99_ms': False,
+    'cpu_ms_per_request': False,
+    'peak_rss_kb': False
+}
+
+Run = namedtuple('Run', ['id', 'commit', 'machine', 'python', 'recorded_at'])
+Comparison = namedtuple('Comparison', ['key', 'metric', 'base', 'candidate', 'change', 'low', 'high', 'verdict'])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    commit_id TEXT NOT NULL,
+    machine TEXT NOT NULL,
+    python TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    config TEXT
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    transport TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    concurrency INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_key ON runs (commit_id, machine, python);
+CREATE INDEX IF NOT EXISTS samples_by_run ON samples (run_id);
+"""
+
+
+def machine_fingerprint():
+    """
+    Identify the hardware and OS a benchmark ran on, so only runs of the same kind of machine are compared
+    :return:    fingerprint:    12 hex digits
+    """
+    cpu = platform.processor()
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as file:
+            cpu = next((line.split(':', 1)[1].strip() for line in file if line.startswith('model name')), cpu)
+    except OSError:
+        pass
+    identity = '|'.join([platform.system(), platform.release(), platform.machine(), cpu, str(os.cpu_count())])
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()[:12]
+
+
+def current_commit():
+    """
+    :return:    commit:     Hash of the checked out git commit, '-dirty' appended with uncommitted changes,
+                            'unknown' outside a git checkout
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], check=True, capture_output=True, text=True).stdout
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], check=True,
+                                capture_output=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit.strip() + ('-dirty' if status.strip() else '')
+
+
+def mad(values):
+    """
+    Median absolute deviation
+    :param      values:     Non-empty list of numbers
+    :return:    mad:        Median of the distances to the median
+    """
+    center = median(values)
+    return median(abs(value - center) for value in values)
+
+
+def _change(base, candidate):
+    return None if base == 0 else candidate / base - 1
+
+
+def bootstrap_ci(base, candidate, rounds=2000, confidence=0.95, rng=None):
+    """
+    Bootstrap confidence interval of the relative change between the medians of two samples
+    :param      base:       Values of the baseline runs
+    :param      candidate:  Values of the candidate runs
+    :param      rounds:     Number of resamples
+    :param      confidence: Coverage of the interval
+    :param      rng:        Source of randomness, a fixed seed if None so comparisons are repeatable
+    :return:    interval:   (low, high) relative changes, None if either sample has fewer than two values
+    """
+    if len(base) < 2 or len(candidate) < 2:
+        return None
+    rng = rng or random.Random(0)
+    changes = []
+    for _ in range(rounds):
+        change = _change(median(rng.choices(base, k=len(base))), median(rng.choices(candidate, k=len(candidate))))
+        if change is not None:
+            changes.append(change)
+    if not changes:
+        return None
+    changes.sort()
+    tail = (1 - confidence) / 2
+    return changes[int(tail * len(changes))], changes[min(int((1 - tail) * len(changes)), len(changes) - 1)]
+
+
+def compare_samples(base, candidate, higher_is_better, threshold=0.05):
+    """
+    Judge the change of a metric between two sets of runs.
+
+    A change is significant when the bootstrap interval of the change of the
+    medians lies entirely on one side of zero and the median change is at least
+    threshold. With fewer than two runs on a side no interval can be computed,
+    and a change beyond threshold is only reported as possible, with a '?'.
+    :param      base:               Values of the baseline runs
+    :param      candidate:          Values of the candidate runs
+    :param      higher_is_better:   True for throughput, False for latencies and costs
+    :param      threshold:          Smallest relative change worth reporting
+    :return:    result:             (change, interval or None, verdict) with verdict one of 'regression',
+                                    'improvement', 'regression?', 'improvement?' or ''
+    """
+    change = _change(median(base), median(candidate))
+    if change is None:
+        return None, None, ''
+    interval = bootstrap_ci(base, candidate)
+    better = change > 0 if higher_is_better else change < 0
+    verdict = ''
+    if abs(change) >= threshold:
+        if interval is None:
+            verdict = 'improvement?' if better else 'regression?'
+        elif interval[0] > 0 or interval[1] < 0:
+            verdict = 'improvement' if better else 'regression'
+    return change, interval, verdict
+
+
+class BenchHistory:
+    """
+    SQLite history of benchmark runs of the client.
+
+    Each run is stored with the commit it measured, the fingerprint of the
+    machine and the Python version, with one sample per transport, operation,
+    concurrency and metric. Runs are only compared with runs of the same
+    machine and Python, and several runs of a commit are treated as repeated
+    measurements of it.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY):
+        """
+        :param      path:   Database file, created if it does not exist
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, results, commit=None, machine=None, python=None):
+        """
+        Store the results of a benchmark run
+        :param      results:    Document written by benchmarks/bench_client.py
+        :param      commit:     Commit measured, the checked out one if None
+        :param      machine:    Machine fingerprint, the current machine if None
+        :param      python:     Python version, the one of the results if None
+        :return:    run_id:     Id of the stored run
+        """
+        python = python or results.get('environment', {}).get('python') or platform.python_version()
+        with self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO runs (commit_id, machine, python, recorded_at, config) VALUES (?, ?, ?, ?, ?)',
+                (commit or current_commit(), machine or machine_fingerprint(), python,
+                 results.get('generated_at', time.time()), json.dumps(results.get('config'))))
+            run_id = cursor.lastrowid
+            self.connection.executemany(
+                'INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?)',
+                [(run_id, row['transport'], row['operation'], row['concurrency'], metric, row[metric])
+                 for row in results['results'] for metric in METRICS if row.get(metric) is not None])
+        return run_id
+
+    def runs(self, commit=None, machine=None, python=None):
+        """
+        Stored runs, oldest first
+        :param      commit:     Only runs of commits starting with this prefix, the runs of uncommitted changes
+                                to them only if it ends with -dirty
+        :param      machine:    Only runs of this machine fingerprint
+        :param      python:     Only runs of this Python version
+        :return:    runs:       List of Run
+        """
+        query, parameters = 'SELECT id, commit_id, machine, python, recorded_at FROM runs WHERE 1 = 1', []
+        if commit:
+            query += ' AND commit_id LIKE ?'
+            parameters.append(commit.replace('%', '') + '%')
+            if not commit.endswith('-dirty'):
+                query += " AND commit_id NOT LIKE '%-dirty'"
+        if machine:
+            query += ' AND machine = ?'
+            parameters.append(machine)
+        if python:
+            query += ' AND python = ?'
+            parameters.append(python)
+        return [Run(*row) for row in self.connection.execute(query + ' ORDER BY recorded_at, id', parameters)]
+
+    def samples(self, runs):
+        """
+        Values of the runs, grouped
+        :param      runs:       List of Run
+        :return:    samples:    Dict of ((transport, operation, concurrency), metric) to the list of values
+        """
+        samples = {}
+        ids = [run.id for run in runs]
+        if not ids:
+            return samples
+        rows = self.connection.execute(
+            f'SELECT transport, operation, concurrency, metric, value FROM samples '
+            f'WHERE run_id IN ({", ".join("?" * len(ids))})', ids)
+        for transport, operation, concurrency, metric, value in rows:
+            samples.setdefault(((transport, operation, concurrency), metric), []).append(value)
+        return samples
+
+    def compare(self, base, candidate, machine=None, python=None, metrics=None, threshold=0.05):
+        """
+        Compare the runs of two commits on the same machine and Python
+        :param      base:       Commit, or prefix, of the baseline, with -dirty for the runs of uncommitted changes
+        :param      candidate:  Commit, or prefix, of the candidate, with -dirty for the runs of uncommitted changes
+        :param      machine:    Machine fingerprint, the current machine if None
+        :param      python:     Python version, the current one if None
+        :param      metrics:    Names of the metrics to compare, all METRICS if None
+        :param      threshold:  Smallest relative change worth reporting
+        :return:    rows:       List of Comparison for every key and metric measured in both
+        """
+        machine = machine or machine_fingerprint()
+        python = python or platform.python_version()
+        base_samples = self.samples(self.runs(base, machine, python))
+        candidate_samples = self.samples(self.runs(candidate, machine, python))
+
+        rows = []
+        for (key, metric), values in sorted(candidate_samples.items()):
+            if metrics is not None and metric not in metrics or (key, metric) not in base_samples:
+                continue
+            base_values = base_samples[(key, metric)]
+            change, interval, verdict = compare_samples(base_values, values, METRICS[metric], threshold)
+            low, high = interval if interval is not None else (None, None)
+            rows.append(Comparison(key, metric, base_values, values, change, low, high, verdict))
+        return rows
+
+
+def _number(value):
+    return f"{value:.0f}" if abs(value) >= 1000 else f"{value:.4g}"
+
+
+def _summary(values):
+    return _number(median(values)) + (f"±{_number(mad(values))}" if len(values) > 1 else '')
+
+
+def _percent(value):
+    return '-' if value is None else f"{value * 100:+.1f}%"
+
+
+def format_comparison(rows, show_all=False):
+    """
+    Compact table of a comparison
+    :param      rows:       List of Comparison
+    :param      show_all:   Include the rows without a significant change
+    :return:    text:       Table with median±MAD of both sides, the change and its 95% interval
+    """
+    lines = [f"{'transport':<10}{'operation':<26}{'conc':>5} {'metric':<19}{'base':>14}{'candidate':>14}"
+             f"{'change':>9}  {'95% CI':<17}verdict"]
+    for row in rows:
+        if not show_all and not row.verdict:
+            continue
+        transport, operation, concurrency = row.key
+        interval = '' if row.low is None else f"{_percent(row.low)}..{_percent(row.high)}"
+        lines.append(f"{transport:<10}{operation:<26}{concurrency:>5} {row.metric:<19}{_summary(row.base):>14}"
+                     f"{_summary(row.candidate):>14}{_percent(row.change):>9}  {interval:<17}{row.verdict}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Store benchmark runs and compare them across commits")
+    parser.add_argument('command', choices=['record', 'compare', 'list'])
+    parser.add_argument('arguments', nargs='*',
+                        help="record: results JSON files; compare: base commit and candidate commit, "
+                             "the latest recorded commit if omitted")
+    parser.add_argument('--history', default=os.environ.get('BOOKSTORE_BENCH_HISTORY') or DEFAULT_HISTORY)
+    parser.add_argument('--commit', help="commit the recorded results measured, the checked out one by default")
+    parser.add_argument('--machine', help="machine fingerprint to compare on, this machine by default")
+    parser.add_argument('--python', help="Python version to compare on, this one by default")
+    parser.add_argument('--metric', action='append', choices=list(METRICS), help="metric to compare, repeatable")
+    parser.add_argument('--threshold', type=float, default=0.05, help="smallest relative change reported")
+    parser.add_argument('--all', action='store_true', help="show the rows without a significant change too")
+    args = parser.parse_args(argv)
+
+    with BenchHistory(args.history) as history:
+        if args.command == 'record':
+            for path in args.arguments:
+                with open(path, encoding='utf-8') as file:
+                    print(f"recorded run {history.record(json.load(file), commit=args.commit)} from {path}")
+            return 0
+
+        if args.command == 'list':
+            for run in history.runs(machine=args.machine, python=args.python):
+                recorded = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run.recorded_at))
+                print(f"{run.id:>5}  {recorded}  {run.commit[:12]:<18}{run.machine}  {run.python}")
+            return 0
+
+        if not args.arguments:
+            parser.error("compare needs a base commit")
+        base = args.arguments[0]
+        candidate = args.arguments[1] if len(args.arguments) > 1 else None
+        if candidate is None:
+            runs = history.runs(machine=args.machine or machine_fingerprint(),
+                                python=args.python or platform.python_version())
+            if not runs:
+                parser.error("no runs recorded for this machine and Python")
+            candidate = runs[-1].commit
+        rows = history.compare(base, candidate, machine=args.machine, python=args.python, metrics=args.metric,
+                               threshold=args.threshold)
+
+    print(f"{base[:12]} -> {candidate[:12]}: {len(rows)} comparisons")
+    print(format_comparison(rows, show_all=args.all))
+    return 1 if any(row.verdict == 'regression' for row in rows) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,360 @@
+"""
+Benchmark suite of the client calls against a local stand-in.
+
+Runs every operation of main.py at each --concurrency level over every
+available transport:
+
+    oneshot     requests.request per call, a new connection every time
+    pooled      BookStoreClient with its keep-alive HTTPAdapter pool
+    http2       BookStoreClient(http2=True), if httpx and h2 are installed
+    asyncio     AsyncBookStoreClient on one event loop
+
+and reports for each cell the operations per second, the p50 and p99
+latency of an operation, the client CPU time per request and the peak RSS.
+The stand-in runs in its own process and each transport in a fresh child
+process, so the CPU time and RSS are those of the client alone. Results are
+written as JSON with a schema version, one row per transport, operation and
+concurrency.
+
+    python benchmarks/bench_client.py --concurrency 1,8,64 --operations 400 --json results.json
+
+With --history the run is also stored for bench_history.py compare.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from async_client import AsyncBookStoreClient  # noqa: E402
+from bench_history import BenchHistory  # noqa: E402
+from http2_transport import httpx  # noqa: E402
+from main import BookStoreClient  # noqa: E402
+from stats import LatencyHistogram, StatsRegistry  # noqa: E402
+from stub_server import BOOKS  # noqa: E402
+
+SCHEMA = 1
+PASSWORD = "Bench123!"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _unique():
+    return f"bench_{uuid.uuid4().hex}"
+
+
+def _delete(client, user):
+    return client.delete_user(client.create_new_user(user, PASSWORD).json()["userID"], user, PASSWORD)
+
+
+def _collection(client, user):
+    client.add_book(user.user_id, [{"isbn": BOOKS[0]["isbn"]}], user.token)
+    client.replace_book_in_collection(user.user_id, user.token, BOOKS[0]["isbn"], BOOKS[1]["isbn"])
+    return client.remove_book_from_collection(user.user_id, BOOKS[1]["isbn"], user.token)
+
+
+# Every operation of the client, each a function of the client and the user of the worker
+OPERATIONS = {
+    'get_books': lambda client, user: client.get_books(),
+    'get_book': lambda client, user: client.get_book(BOOKS[0]["isbn"]),
+    'get_user_info': lambda client, user: client.get_user_info(user.user_id, user.token),
+    'is_authorized': lambda client, user: client.is_authorized(user.username, PASSWORD),
+    'login': lambda client, user: client.login(user.username, PASSWORD),
+    'generate_token': lambda client, user: client.generate_token(user.username, PASSWORD),
+    'add_replace_remove_book': _collection,
+    'create_and_delete_user': lambda client, user: _delete(client, _unique())
+}
+
+
+async def _adelete(client, user):
+    response = await client.create_new_user(user, PASSWORD)
+    return await client.delete_user(response.json()["userID"], user, PASSWORD)
+
+
+async def _acollection(client, user):
+    await client.add_book(user.user_id, [{"isbn": BOOKS[0]["isbn"]}], user.token)
+    await client.replace_book_in_collection(user.user_id, user.token, BOOKS[0]["isbn"], BOOKS[1]["isbn"])
+    return await client.remove_book_from_collection(user.user_id, BOOKS[1]["isbn"], user.token)
+
+
+ASYNC_OPERATIONS = {
+    'get_books': lambda client, user: client.get_books(),
+    'get_book': lambda client, user: client.get_book(BOOKS[0]["isbn"]),
+    'get_user_info': lambda client, user: client.get_user_info(user.user_id, user.token),
+    'is_authorized': lambda client, user: client.is_authorized(user.username, PASSWORD),
+    'login': lambda client, user: client.login(user.username, PASSWORD),
+    'generate_token': lambda client, user: client.generate_token(user.username, PASSWORD),
+    'add_replace_remove_book': _acollection,
+    'create_and_delete_user': lambda client, user: _adelete(client, _unique())
+}
+
+
+class BenchUser:
+    """
+    User registered for a worker of the benchmark
+    """
+
+    def __init__(self, user_id, username, token):
+        self.user_id = user_id
+        self.username = username
+        self.token = token
+
+
+class _OneShotSession:
+    """
+    Stands in for the session of a BookStoreClient, sending every request on a new connection
+    """
+
+    headers = {}
+
+    @staticmethod
+    def request(method, url, **kwargs):
+        return requests.request(method, url, **kwargs)
+
+    def close(self):
+        pass
+
+
+def peak_rss_kb():
+    """
+    :return:    kilobytes:  Peak resident set size of the process so far, None where it is not available
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _row(transport, operation, concurrency, timings, errors, elapsed, cpu, requests_sent):
+    histogram = LatencyHistogram()
+    for seconds in timings:
+        histogram.record_seconds(seconds)
+    summary = histogram.to_dict()
+    return {
+        'transport': transport,
+        'operation': operation,
+        'concurrency': concurrency,
+        'operations': len(timings),
+        'requests': requests_sent,
+        'errors': errors,
+        'ops_per_second': round(len(timings) / elapsed, 1),
+        'p50_ms': summary['p50_ms'],
+        'p99_ms': summary['p99_ms'],
+        'cpu_ms_per_request': round(cpu * 1000 / max(requests_sent, 1), 4),
+        'peak_rss_kb': peak_rss_kb()
+    }
+
+
+def _sent(registry):
+    return sum(histogram.count for histogram in registry.snapshot().values())
+
+
+def run_threads(transport, base_url, operations, levels, count):
+    """
+    Measure a thread-based transport, one worker thread and user per unit of concurrency
+    :return:    rows:   List of result rows
+    """
+    registry = StatsRegistry()
+    client = BookStoreClient(base_url=base_url, pool_maxsize=max(levels), catalog_ttl=None, stats=registry,
+                             http2=transport == 'http2')
+    if transport == 'oneshot':
+        client.session = _OneShotSession()
+
+    users = []
+    for _ in range(max(levels)):
+        username = _unique()
+        user_id = client.create_new_user(username, PASSWORD).json()["userID"]
+        users.append(BenchUser(user_id, username, client.generate_token(username, PASSWORD).json()["token"]))
+
+    rows = []
+    try:
+        for concurrency in levels:
+            per_worker = max(count // concurrency, 1)
+            with ThreadPoolExecutor(concurrency) as executor:
+                for name in operations:
+                    operation = OPERATIONS[name]
+
+                    def work(user):
+                        timings, errors = [], 0
+                        for _ in range(per_worker):
+                            started = time.perf_counter()
+                            response = operation(client, user)
+                            timings.append(time.perf_counter() - started)
+                            errors += not response.ok
+                        return timings, errors
+
+                    registry.reset()
+                    cpu, started = time.process_time(), time.perf_counter()
+                    results = list(executor.map(work, users[:concurrency]))
+                    elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu
+                    rows.append(_row(transport, name, concurrency, [seconds for timings, _ in results
+                                                                    for seconds in timings],
+                                     sum(errors for _, errors in results), elapsed, cpu, _sent(registry)))
+    finally:
+        for user in users:
+            client.delete_user(user.user_id, user.username, PASSWORD)
+        client.close()
+    return rows
+
+
+async def _run_asyncio(base_url, operations, levels, count):
+    registry = StatsRegistry()
+    rows = []
+    async with AsyncBookStoreClient(base_url=base_url, limit_per_host=max(levels), stats=registry) as client:
+        users = []
+        for _ in range(max(levels)):
+            username = _unique()
+            user_id = (await client.create_new_user(username, PASSWORD)).json()["userID"]
+            token = (await client.generate_token(username, PASSWORD)).json()["token"]
+            users.append(BenchUser(user_id, username, token))
+
+        try:
+            for concurrency in levels:
+                per_worker = max(count // concurrency, 1)
+                for name in operations:
+                    operation = ASYNC_OPERATIONS[name]
+
+                    async def work(user):
+                        timings, errors = [], 0
+                        for _ in range(per_worker):
+                            started = time.perf_counter()
+                            response = await operation(client, user)
+                            timings.append(time.perf_counter() - started)
+                            errors += not response.ok
+                        return timings, errors
+
+                    registry.reset()
+                    cpu, started = time.process_time(), time.perf_counter()
+                    results = await asyncio.gather(*(work(user) for user in users[:concurrency]))
+                    elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu
+                    rows.append(_row('asyncio', name, concurrency, [seconds for timings, _ in results
+                                                                    for seconds in timings],
+                                     sum(errors for _, errors in results), elapsed, cpu, _sent(registry)))
+        finally:
+            for user in users:
+                await client.delete_user(user.user_id, user.username, PASSWORD)
+    return rows
+
+
+def run_transport(transport, base_url, operations, levels, count):
+    """
+    Measure one transport in the current process
+    :param      transport:  'oneshot', 'pooled', 'http2' or 'asyncio'
+    :param      base_url:   Base url of the stand-in
+    :param      operations: Names of the operations to run, keys of OPERATIONS
+    :param      levels:     Concurrency levels
+    :param      count:      Operations per cell, split between the workers
+    :return:    rows:       List of result rows
+    """
+    if transport == 'asyncio':
+        return asyncio.run(_run_asyncio(base_url, operations, levels, count))
+    return run_threads(transport, base_url, operations, levels, count)
+
+
+def available_transports():
+    transports = ['oneshot', 'pooled']
+    if httpx is not None:
+        transports.append('http2')
+    transports.append('asyncio')
+    return transports
+
+
+def start_stand_in():
+    """
+    Start the stand-in in its own process
+    :return:    (process, base url)
+    """
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'stub_server.py'), '--port', '0'],
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    return process, line.rsplit(' ', 1)[-1].strip()
+
+
+def run(transports, operations, levels, count, base_url=None):
+    """
+    Measure every transport in a child process of its own
+    :return:    results:    Document with the schema version, the environment, the configuration and the rows
+    """
+    server = None
+    if base_url is None:
+        server, base_url = start_stand_in()
+    rows = []
+    try:
+        for transport in transports:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', transport, '--base-url', base_url,
+                 '--operations', str(count), '--concurrency', ','.join(map(str, levels)),
+                 '--only', ','.join(operations)],
+                check=True, stdout=subprocess.PIPE, text=True).stdout
+            rows.extend(json.loads(output))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    return {
+        'schema': SCHEMA,
+        'generated_at': time.time(),
+        'environment': {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+                        'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'config': {'transports': transports, 'operations': operations, 'concurrency': levels,
+                   'operations_per_cell': count},
+        'results': rows
+    }
+
+
+def format_results(results):
+    lines = [f"{'transport':<10}{'operation':<26}{'conc':>5}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+             f"{'cpu ms/req':>12}{'rss KB':>10}{'errors':>8}"]
+    for row in results['results']:
+        lines.append(f"{row['transport']:<10}{row['operation']:<26}{row['concurrency']:>5}"
+                     f"{row['ops_per_second']:>10}{row['p50_ms']:>10}{row['p99_ms']:>10}"
+                     f"{row['cpu_ms_per_request']:>12}{row['peak_rss_kb'] or '-':>10}{row['errors']:>8}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the client calls over every transport")
+    parser.add_argument('--concurrency', default='1,8,64', help="comma-separated concurrency levels")
+    parser.add_argument('--operations', type=int, default=400, help="operations per cell")
+    parser.add_argument('--transports', help="comma-separated subset of " + ','.join(available_transports()))
+    parser.add_argument('--only', help="comma-separated subset of " + ','.join(OPERATIONS))
+    parser.add_argument('--base-url', help="BookStore-compatible server to use instead of a local stand-in")
+    parser.add_argument('--json', help="write the results as JSON to this file")
+    parser.add_argument('--history', help="also record the results in this bench_history database")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    levels = [int(level) for level in args.concurrency.split(',')]
+    operations = args.only.split(',') if args.only else list(OPERATIONS)
+    if args.child:
+        json.dump(run_transport(args.child, args.base_url, operations, levels, args.operations), sys.stdout)
+        return 0
+
+    transports = args.transports.split(',') if args.transports else available_transports()
+    results = run(transports, operations, levels, args.operations, args.base_url)
+    print(format_results(results))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    if args.history:
+        with BenchHistory(args.history) as history:
+            print(f"recorded run {history.record(results)} in {args.history}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,83 @@
+"""
+Benchmark of the HTTP/2 transport against the pooled HTTP/1.1 one.
+
+Sends --requests get_book calls from --concurrency threads through a
+BookStoreClient over each transport, against a local stand-in serving both
+HTTP/1.1 and cleartext HTTP/2, and reports the throughput, the latency
+percentiles and the number of connections the server accepted.
+
+    python benchmarks/bench_http2.py --requests 5000 --concurrency 64
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http2_transport import httpx  # noqa: E402
+from main import BookStoreClient  # noqa: E402
+from stats import LatencyHistogram  # noqa: E402
+from stub_server import BOOKS, StubServer  # noqa: E402
+
+
+def run(http2, requests, concurrency):
+    histogram = LatencyHistogram()
+    isbn = BOOKS[0]["isbn"]
+    with StubServer() as server, BookStoreClient(base_url=server.base_url, pool_maxsize=concurrency,
+                                                 catalog_ttl=None, http2=http2) as client:
+        def call(_):
+            started = time.perf_counter()
+            status = client.get_book(isbn).status_code
+            return status, time.perf_counter() - started
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            # Warm up the connections before timing
+            list(executor.map(call, range(concurrency)))
+            started = time.perf_counter()
+            results = list(executor.map(call, range(requests)))
+            elapsed = time.perf_counter() - started
+        connections = server.connections
+
+    for _, seconds in results:
+        histogram.record_seconds(seconds)
+    summary = histogram.to_dict()
+    return {
+        'ops_per_second': round(requests / elapsed, 1),
+        'p50_ms': summary['p50_ms'],
+        'p99_ms': summary['p99_ms'],
+        'errors': sum(1 for status, _ in results if status != 200),
+        'connections': connections
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the HTTP/2 transport with pooled HTTP/1.1")
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--json', help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    transports = {'http/1.1': False}
+    if httpx is not None:
+        transports['http/2'] = True
+    else:
+        print("httpx and h2 are not installed, only HTTP/1.1 is measured: pip install 'httpx[http2]'")
+
+    results = {name: run(http2, args.requests, args.concurrency) for name, http2 in transports.items()}
+    print(f"{args.requests} get_book calls from {args.concurrency} threads")
+    print(f"{'transport':<12}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'connections':>13}")
+    for name, result in results.items():
+        print(f"{name:<12}{result['ops_per_second']:>10}{result['p50_ms']:>10}{result['p99_ms']:>10}"
+              f"{result['errors']:>8}{result['connections']:>13}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'requests': args.requests, 'concurrency': args.concurrency, 'results': results}, file,
+                      indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+"""
+Micro-benchmark of the response models against plain json.loads dictionaries.
+
+Decodes a synthetic catalog of --books books the way the tests use it, once
+with json.loads and nested dicts and once with models.Catalog, and reports the
+time per decode and the memory the decoded catalog keeps alive.
+
+    python benchmarks/bench_models.py --books 10000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Catalog, orjson  # noqa: E402
+from stub_server import BOOKS  # noqa: E402
+
+
+def synthetic_catalog(count):
+    books = []
+    for index in range(count):
+        book = dict(BOOKS[index % len(BOOKS)])
+        book["isbn"] = f"978{index:010d}"
+        books.append(book)
+    return json.dumps({"books": books}).encode('utf-8')
+
+
+def retained(build):
+    """
+    Memory kept alive by the value build() returns
+    :return:    bytes:  Size of the allocations still referenced after build() returned
+    """
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del value
+    return size
+
+
+def run(count, repeat):
+    content = synthetic_catalog(count)
+    cases = {
+        'json.loads isbns': lambda: [book["isbn"] for book in json.loads(content)["books"]],
+        'Catalog isbns': lambda: Catalog(content).isbns,
+        'json.loads books': lambda: json.loads(content)["books"],
+        'Catalog books': lambda: Catalog(content).books
+    }
+    results = {}
+    for name, build in cases.items():
+        seconds = min(timeit.repeat(build, number=1, repeat=repeat))
+        results[name] = {'ms': round(seconds * 1000, 3), 'retained_kb': round(retained(build) / 1024, 1)}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare models.Catalog with json.loads dictionaries")
+    parser.add_argument('--books', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args.books, args.repeat)
+    print(f"{args.books} books, JSON parser: {'orjson' if orjson is not None else 'json'}")
+    print(f"{'case':<20}{'ms':>10}{'retained KB':>14}")
+    for name, result in results.items():
+        print(f"{name:<20}{result['ms']:>10}{result['retained_kb']:>14}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'books': args.books, 'results': results}, file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,277 @@
+import hashlib
+import io
+import json
+import re
+import threading
+from collections import deque
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Values that change from run to run: user ids, generated names and bearer tokens
+DYNAMIC_VALUE = re.compile(
+    r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+    r'|eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+'
+    r'|(?<![0-9A-Za-z])[0-9a-f]{16,}(?![0-9A-Za-z])'
+)
+
+RECORDED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Retry-After')
+
+
+class CassetteMissError(requests.exceptions.ConnectionError):
+    """
+    Raised in replay mode for a request that was never recorded
+    """
+
+
+def _request_parts(request):
+    """
+    Split a prepared request into the text its fingerprint is computed from and its dynamic values
+    :param      request:    requests.PreparedRequest
+    :return:    parts:      (templated text, list of dynamic values in order of appearance)
+    """
+    url = urlsplit(request.url)
+    target = url.path
+    if url.query:
+        target += '?' + urlencode(sorted(parse_qsl(url.query, keep_blank_values=True)))
+
+    body = request.body or b''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, ensure_ascii=False) if body else ''
+    except ValueError:
+        body = body.decode('utf-8', errors='replace')
+
+    text = '\n'.join([request.method, target, request.headers.get('Authorization', ''), body])
+    values = DYNAMIC_VALUE.findall(text)
+    return DYNAMIC_VALUE.sub('{dynamic}', text), values
+
+
+def fingerprint(request):
+    """
+    Fingerprint of a request with its dynamic values templated out
+    :param      request:        requests.PreparedRequest
+    :return:    fingerprint:    Hex digest identifying equivalent requests
+    """
+    return hashlib.sha256(_request_parts(request)[0].encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    """
+    Append-only file of recorded interactions, one compact JSON object per line.
+
+    Every line starts with the fingerprint of its request, so opening a cassette
+    only scans the line prefixes to build an index from fingerprint to file
+    offsets; the interaction itself is read and decoded when it is replayed.
+    Equivalent requests are served in the order they were recorded, and the last
+    one is repeated once they run out.
+    """
+
+    _PREFIX = '{"fp":"'
+
+    def __init__(self, path, mode='replay'):
+        """
+        :param      path:   Cassette file
+        :param      mode:   'record' to start a new cassette, 'replay' to serve an existing one
+        """
+        self.path = path
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index = {}
+
+        if mode == 'record':
+            self._file = open(path, 'w', encoding='utf-8')
+        elif mode == 'replay':
+            self._file = open(path, 'rb')
+            self._build_index()
+        else:
+            raise ValueError(f"Unknown cassette mode '{mode}', expected 'record' or 'replay'")
+
+    def __len__(self):
+        return sum(len(offsets) for offsets in self._index.values())
+
+    def _build_index(self):
+        start = len(self._PREFIX)
+        offset = 0
+        for line in self._file:
+            key = line[start:start + 64].decode('ascii')
+            self._index.setdefault(key, deque()).append(offset)
+            offset += len(line)
+
+    def record(self, request, response, content=None):
+        """
+        Append an interaction to the cassette
+        :param      request:    requests.PreparedRequest that was sent
+        :param      response:   requests.Response received for it
+        :param      content:    Body of the response as bytes, read from the response if None
+        """
+        text, values = _request_parts(request)
+        interaction = {
+            'fp': hashlib.sha256(text.encode('utf-8')).hexdigest(),
+            'request': text,
+            'values': values,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+            'content': (response.content if content is None else content).decode('utf-8', errors='replace')
+        }
+        line = json.dumps(interaction, separators=(',', ':'), ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def replay(self, request):
+        """
+        Build the recorded response of an equivalent request
+        :param      request:    requests.PreparedRequest to answer
+        :return:    response:   requests.Response with the dynamic values of the request substituted in
+        """
+        text, values = _request_parts(request)
+        key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+        with self._lock:
+            offsets = self._index.get(key)
+            if not offsets:
+                self.misses += 1
+                raise CassetteMissError(f"No recorded interaction for request:\n{text}", request=request)
+            offset = offsets.popleft() if len(offsets) > 1 else offsets[0]
+            self._file.seek(offset)
+            interaction = json.loads(self._file.readline())
+            self.hits += 1
+
+        content = interaction['content']
+        for recorded, live in zip(interaction['values'], values):
+            if recorded != live:
+                content = content.replace(recorded, live)
+
+        response = requests.Response()
+        response.status_code = interaction['status']
+        response.reason = interaction['reason']
+        response.headers = CaseInsensitiveDict(interaction['headers'])
+        response._content = content.encode('utf-8')
+        # Streamed reads, e.g. of the catalog, iterate over the content as if it had been read from raw
+        response._content_consumed = True
+        response.raw = io.BytesIO(response._content)
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(0)
+        return response
+
+    def close(self):
+        self._file.close()
+
+
+class _RecordingBody:
+    """
+    Raw body of a streamed response keeping a copy of what is read, recorded once read to the end or closed
+    """
+
+    def __init__(self, raw, done):
+        """
+        :param      raw:    Raw body of the response, e.g. a urllib3 HTTPResponse
+        :param      done:   Function taking the whole body as bytes
+        """
+        self._raw = raw
+        self._done = done
+        self._chunks = []
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def _finish(self):
+        if self._done is not None:
+            done, self._done = self._done, None
+            done(b''.join(self._chunks))
+
+    def read(self, amt=None, *args, **kwargs):
+        data = self._raw.read(amt, *args, **kwargs)
+        self._chunks.append(data)
+        if amt is None or not data:
+            self._finish()
+        return data
+
+    def stream(self, amt=65536, decode_content=None):
+        while True:
+            data = self.read(amt, decode_content=decode_content)
+            if not data:
+                return
+            yield data
+
+    def close(self):
+        # A stream closed early is read to its end, so that replaying it gives the whole body
+        if self._done is not None:
+            self.read()
+        self._raw.close()
+
+
+class RecordingAdapter(BaseAdapter):
+    """
+    Transport adapter sending requests through another adapter and recording them to a cassette.
+
+    Streamed responses stay streamed: their body is copied as the caller reads
+    it and recorded once read to the end or closed.
+    """
+
+    def __init__(self, cassette, adapter):
+        """
+        :param      cassette:   Cassette opened in record mode
+        :param      adapter:    Adapter sending the requests, e.g. the pooled HTTPAdapter of the client
+        """
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter
+
+    def send(self, request, stream=False, **kwargs):
+        response = self.adapter.send(request, stream=stream, **kwargs)
+        if stream:
+            response.raw = _RecordingBody(response.raw,
+                                          lambda content: self.cassette.record(request, response, content))
+        else:
+            self.cassette.record(request, response)
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Transport adapter answering requests from a cassette without any network access
+    """
+
+    def __init__(self, cassette):
+        super().__init__()
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        response = self.cassette.replay(request)
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+
+def install_cassette(client, path, mode='replay'):
+    """
+    Route all requests of a client through a cassette
+    :param      client:     BookStoreClient whose session gets the cassette adapter
+    :param      path:       Cassette file
+    :param      mode:       'record' or 'replay'
+    :return:    cassette:   The opened Cassette
+    """
+    cassette = Cassette(path, mode)
+    if mode == 'record':
+        adapter = RecordingAdapter(cassette, client.session.get_adapter(client.base_url))
+    else:
+        adapter = ReplayAdapter(cassette)
+    client.session.mount('http://', adapter)
+    client.session.mount('https://', adapter)
+    return cassette
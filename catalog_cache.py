@@ -0,0 +1,164 @@
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+
+class CatalogCache:
+    """
+    Cached copy of the /BookStore/v1/Books catalog with an ISBN index.
+
+    The catalog is considered fresh for ttl seconds. After that it is revalidated
+    with a conditional request (If-None-Match / If-Modified-Since) when the server
+    sent an ETag or Last-Modified, so an unchanged catalog costs a 304 instead of
+    the whole body. With a snapshot_path the catalog is also kept on disk, and a
+    cold process starts from the snapshot instead of refetching it. A ttl of None
+    disables caching: every refresh is a plain, unconditional fetch.
+    """
+
+    def __init__(self, fetch, ttl=300, snapshot_path=None):
+        """
+        :param      fetch:          Function taking request headers and returning the GET /BookStore/v1/Books response
+        :param      ttl:            Seconds a fetched catalog is served without revalidation, None to disable caching
+        :param      snapshot_path:  JSON file to keep the catalog in, memory only if None
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.snapshot_path = snapshot_path
+
+        self.books = []
+        self.content = None
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = None
+
+        self.hits = 0
+        self.revalidations = 0
+        self.fetches = 0
+
+        self._index = {}
+        self._isbns = []
+        self._lock = threading.Lock()
+
+        if snapshot_path and ttl is not None and os.path.exists(snapshot_path):
+            self._load_snapshot()
+
+    @property
+    def is_fresh(self):
+        return self.ttl is not None and self.fetched_at is not None and time.time() - self.fetched_at < self.ttl
+
+    def _build(self, content, etag, last_modified, fetched_at):
+        books = json.loads(content)["books"]
+        self.books = books
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self._index = {book["isbn"]: book for book in books}
+        self._isbns = list(self._index)
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path, encoding='utf-8') as file:
+                snapshot = json.load(file)
+            self._build(snapshot["content"].encode('utf-8'), snapshot.get("etag"), snapshot.get("last_modified"),
+                        snapshot["fetched_at"])
+        except (OSError, ValueError, KeyError):
+            self.fetched_at = None
+
+    def _save_snapshot(self):
+        if not self.snapshot_path:
+            return
+        snapshot = {
+            "content": self.content.decode('utf-8'),
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "fetched_at": self.fetched_at
+        }
+        directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.catalog-')
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            json.dump(snapshot, file)
+        os.replace(temporary, self.snapshot_path)
+
+    def refresh(self, force=False):
+        """
+        Make sure the cached catalog is fresh, revalidating or refetching it if needed
+        :param      force:      Revalidate even if the catalog is within its ttl
+        :return:    response:   The response if the catalog was fetched with a 200, otherwise None
+        """
+        if self.ttl is None:
+            # Caching disabled, concurrent callers fetch in parallel instead of waiting on each other, and the
+            # catalog is neither parsed nor kept
+            response = self.fetch({})
+            if response.status_code == 200:
+                self.fetches += 1
+            return response
+
+        if self.is_fresh and not force:
+            self.hits += 1
+            return None
+
+        with self._lock:
+            if self.is_fresh and not force:
+                self.hits += 1
+                return None
+
+            headers = {}
+            if self.content is not None:
+                if self.etag:
+                    headers['If-None-Match'] = self.etag
+                if self.last_modified:
+                    headers['If-Modified-Since'] = self.last_modified
+
+            response = self.fetch(headers)
+            if response.status_code == 304 and self.content is not None:
+                self.revalidations += 1
+                self.fetched_at = time.time()
+                self._save_snapshot()
+                return None
+            if response.status_code != 200:
+                return response
+
+            self.fetches += 1
+            self._build(response.content, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                        time.time())
+            self._save_snapshot()
+            return response
+
+    def lookup(self, isbn):
+        """
+        Get a book from the cached catalog without refreshing it
+        :param      isbn:   Isbn of book wanted
+        :return:    book:   Book as returned by the API, or None if it is not in the cached catalog
+        """
+        return self._index.get(isbn)
+
+    def contains(self, isbn):
+        """
+        Check if an isbn is in the store, refreshing the catalog if needed
+        :param      isbn:   Isbn to check
+        :return:    valid:  True if a book with this isbn is in the store
+        """
+        if self.ttl is None:
+            return any(book["isbn"] == isbn for book in self._fetch_books())
+        self.refresh()
+        return isbn in self._index
+
+    def random_isbn(self):
+        """
+        Get the isbn of a random book, refreshing the catalog if needed
+        :return:    isbn:   random isbn, or None if the store is empty
+        """
+        if self.ttl is None:
+            isbns = [book["isbn"] for book in self._fetch_books()]
+        else:
+            self.refresh()
+            isbns = self._isbns
+        return isbns[random.randrange(len(isbns))] if isbns else None
+
+    def _fetch_books(self):
+        response = self.refresh()
+        return json.loads(response.content)["books"] if response.status_code == 200 else []
@@ -0,0 +1,153 @@
+import codecs
+import json
+import random
+
+from models import Book
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+# Consumed text is dropped from the buffer once this many characters have piled up
+_COMPACT_AT = 1 << 16
+
+
+class _Reader:
+    """
+    Text buffer filled from an iterator of byte chunks, decoding one JSON value at a time
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.exhausted = False
+
+    def _fill(self):
+        if self.exhausted:
+            return False
+        for chunk in self.chunks:
+            if chunk:
+                text = self.utf8.decode(chunk)
+                if self.position >= _COMPACT_AT:
+                    self.buffer, self.position = self.buffer[self.position:], 0
+                self.buffer += text
+                return True
+        self.buffer += self.utf8.decode(b'', final=True)
+        self.exhausted = True
+        return False
+
+    def peek(self):
+        """
+        Next character that is not whitespace, without consuming it
+        :return:    char:   The character, or '' at the end of the stream
+        """
+        while True:
+            buffer, position = self.buffer, self.position
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            self.position = position
+            if position < len(buffer):
+                return buffer[position]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars):
+        char = self.peek()
+        if char == '' or char not in chars:
+            raise ValueError(f"Malformed catalog: expected one of {chars!r} at offset {self.position}, got {char!r}")
+        self.position += 1
+        return char
+
+    def value(self):
+        """
+        Decode the next JSON value, reading more chunks until it is complete
+        :return:    value:  Decoded value
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.exhausted and self._fill():
+                continue
+            self.position = end
+            return value
+
+
+def iter_book_dicts(chunks):
+    """
+    Parse a GET /BookStore/v1/Books body incrementally, yielding its books as they are read.
+
+    Only the book being decoded and the current chunk are held in memory, so the
+    memory used does not depend on the size of the catalog. Stopping the
+    iteration stops reading the chunks.
+    :param      chunks:     Iterable of byte chunks of the body, e.g. response.iter_content(65536)
+    :return:    books:      Generator of decoded books
+    """
+    reader = _Reader(chunks)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if key == 'books':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.position += 1
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.expect(',]') == ']':
+                        break
+        else:
+            reader.value()
+        if reader.expect(',}') == '}':
+            return
+
+
+def iter_books(chunks):
+    """
+    Parse a catalog body incrementally into Book objects
+    :param      chunks:     Iterable of byte chunks of the body
+    :return:    books:      Generator of Book
+    """
+    for book in iter_book_dicts(chunks):
+        yield Book.from_dict(book)
+
+
+def find_book(chunks, isbn):
+    """
+    Find a book in a catalog body, reading it only up to the match
+    :param      chunks:     Iterable of byte chunks of the body
+    :param      isbn:       Isbn of the book wanted
+    :return:    book:       Book, or None if the catalog does not have it
+    """
+    for book in iter_book_dicts(chunks):
+        if book.get("isbn") == isbn:
+            return Book.from_dict(book)
+    return None
+
+
+def sample_books(chunks, k=1, rng=random):
+    """
+    Pick books uniformly at random from a catalog body in one pass (reservoir sampling)
+    :param      chunks:     Iterable of byte chunks of the body
+    :param      k:          Number of books to pick
+    :param      rng:        Source of randomness, the random module by default so random.seed() applies
+    :return:    books:      Up to k Book objects, fewer if the catalog is smaller
+    """
+    reservoir = []
+    for index, book in enumerate(iter_book_dicts(chunks)):
+        if index < k:
+            reservoir.append(book)
+        else:
+            slot = rng.randrange(index + 1)
+            if slot < k:
+                reservoir[slot] = book
+    return [Book.from_dict(book) for book in reservoir]
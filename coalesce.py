@@ -0,0 +1,105 @@
+import asyncio
+import threading
+
+
+class _Flight:
+    """
+    Call in progress that later callers with the same key wait on
+    """
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical calls made while one of them is in flight.
+
+    The first caller of a key runs the call; callers arriving with the same key
+    before it returns wait for it and get its result, or its exception, instead
+    of making their own. Once the call returns the key is forgotten, so nothing
+    is cached beyond the duration of a call. Works for threads with do() and for
+    asyncio with ado(); each event loop has its own flights.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+        self._flights = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self):
+        return len(self._flights) + len(self._tasks)
+
+    def counters(self):
+        """
+        :return:    counters:   Dict with the calls joined (hits), the calls made (misses) and the hit ratio
+        """
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_ratio": round(self.hits / total, 4) if total else 0.0}
+
+    def do(self, key, call):
+        """
+        Run call, or wait for the identical call already in flight
+        :param      key:        Hashable identity of the call, e.g. the method, url and headers of a request
+        :param      call:       Function without arguments making the call
+        :return:    result:     What call returned, shared by every caller of the flight
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = call()
+            return flight.result
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def ado(self, key, call):
+        """
+        Coroutine version of do() taking a coroutine function.
+
+        The call runs in its own task, so a caller being cancelled does not
+        cancel the call for the others waiting on it.
+        :param      key:        Hashable identity of the call
+        :param      call:       Coroutine function without arguments making the call
+        :return:    result:     What call returned, shared by every caller of the flight
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (loop, key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = self._tasks[task_key] = loop.create_task(call())
+                task.add_done_callback(lambda _: self._forget(task_key))
+                self.misses += 1
+            else:
+                self.hits += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, task_key):
+        with self._lock:
+            del self._tasks[task_key]
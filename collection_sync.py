@@ -0,0 +1,130 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from main import get_default_client
+from models import User
+
+SyncResult = namedtuple('SyncResult', ['plan', 'calls', 'naive_calls', 'saved', 'failed', 'passes'])
+
+
+class SyncPlan(namedtuple('SyncPlan', ['clear', 'add', 'replace', 'remove'])):
+    """
+    Calls turning a collection into the desired one: an optional clear, one batched add of the isbns in add,
+    one replace per (current, new) pair in replace and one remove per isbn in remove
+    """
+
+    __slots__ = ()
+
+    @property
+    def calls(self):
+        return int(self.clear) + (1 if self.add else 0) + len(self.replace) + len(self.remove)
+
+
+def plan_sync(current, desired):
+    """
+    Plan the cheapest sequence of calls turning a collection into the desired one.
+
+    Every book to add can be added by one batched add_book. Replacing a book
+    does a removal and an addition in one call, so when no more books are added
+    than removed, every addition rides on a replace and the batched add is not
+    needed. Clearing the collection and adding the desired books back costs at
+    most two calls, and is used when that is cheaper than the single removals.
+    :param      current:    Isbns in the collection now
+    :param      desired:    Isbns the collection should hold
+    :return:    plan:       SyncPlan with the fewest calls, keeping the books in place on a tie
+    """
+    current, desired = set(current), set(desired)
+    to_add, to_remove = sorted(desired - current), sorted(current - desired)
+
+    if len(to_add) <= len(to_remove):
+        incremental = SyncPlan(False, [], list(zip(to_remove, to_add)), to_remove[len(to_add):])
+    else:
+        incremental = SyncPlan(False, to_add, [], to_remove)
+    clear = SyncPlan(True, sorted(desired), [], [])
+    return clear if clear.calls < incremental.calls else incremental
+
+
+def _execute(client, user_id, token, plan, workers):
+    """
+    Run a plan, the calls touching different books concurrently
+    :return:    failed:     List of (operation, isbn, status code) of the calls that did not succeed, the status
+                            code None for a call that raised
+    """
+    failed = []
+    if plan.clear:
+        response = client.clear_collection(user_id, token)
+        if response.status_code != 204:
+            return [('clear', None, response.status_code)]
+
+    calls = []
+    if plan.add:
+        calls.append(('add', ', '.join(plan.add), 201,
+                      lambda: client.add_book(user_id, [{"isbn": isbn} for isbn in plan.add], token)))
+    for current, new in plan.replace:
+        calls.append(('replace', f'{current} -> {new}', 200,
+                      lambda current=current, new=new: client.replace_book_in_collection(user_id, token, current,
+                                                                                         new)))
+    for isbn in plan.remove:
+        calls.append(('remove', isbn, 204,
+                      lambda isbn=isbn: client.remove_book_from_collection(user_id, isbn, token)))
+    if not calls:
+        return failed
+
+    def send(call):
+        try:
+            return call[3]().status_code
+        except requests.RequestException:
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(min(workers, len(calls)), 1), thread_name_prefix='sync') as executor:
+        statuses = list(executor.map(send, calls))
+    for (operation, isbn, expected, _), status in zip(calls, statuses):
+        if status != expected:
+            failed.append((operation, isbn, status))
+    return failed
+
+
+def sync_collection(user_id, token, desired_isbns, client=None, workers=8, verify=True):
+    """
+    Bring the collection of a user to the desired books with as few calls as possible.
+
+    The calls of the plan touch different books, so they are sent concurrently.
+    With verify, a collection is read back only when a call failed or answered
+    an unexpected status, and a second, sequential pass fixes the difference.
+    :param      user_id:        UserId of the user
+    :param      token:          Authorization token of the user
+    :param      desired_isbns:  Isbns the collection should hold
+    :param      client:         BookStoreClient to use, the default client if None
+    :param      workers:        Maximum number of calls in flight
+    :param      verify:         Read the collection back after a failed call and repair it if it differs
+    :return:    result:         SyncResult with the plan, the calls made including reads, the calls one read
+                                and single add/remove operations would have taken and the calls saved
+    """
+    client = client or get_default_client()
+    desired = set(desired_isbns)
+
+    def read():
+        response = client.get_user_info(user_id, token)
+        if not response.ok:
+            raise RuntimeError(f"Could not read the collection of {user_id}: {response.status_code} {response.text}")
+        return set(User.from_response(response).isbns)
+
+    current = read()
+    plan = plan_sync(current, desired)
+    naive_calls = len(desired - current) + len(current - desired) + 1
+    calls, failed, passes = 1 + plan.calls, [], 0
+
+    if plan.calls:
+        failed = _execute(client, user_id, token, plan, workers)
+        passes = 1
+        if verify and failed:
+            current = read()
+            repair = plan_sync(current, desired)
+            calls += 1 + repair.calls
+            if repair.calls:
+                failed = _execute(client, user_id, token, repair, 1)
+                passes = 2
+
+    return SyncResult(plan, calls, naive_calls, naive_calls - calls, failed, passes)
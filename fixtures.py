@@ -0,0 +1,194 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class Fixture:
+    """
+    Node of a FixtureGraph
+    """
+
+    def __init__(self, name, setup, teardown=None, requires=()):
+        self.name = name
+        self.setup = setup
+        self.teardown = teardown
+        self.requires = tuple(requires)
+
+
+class FixtureGraph:
+    """
+    Test fixtures declared as a dependency graph and set up concurrently.
+
+    Every fixture starts as soon as the fixtures it requires are set up, so
+    independent branches overlap and setup takes as long as the slowest chain of
+    dependencies. Each setup function is called with the values of the fixtures
+    it requires as keyword arguments. Teardown walks the graph the other way
+    round: a fixture is torn down once everything that required it is.
+
+    If a setup fails, no further fixtures are started, the ones already set up
+    are torn down and the error is raised.
+    """
+
+    def __init__(self, workers=8):
+        """
+        :param      workers:    Maximum number of fixtures set up or torn down at the same time
+        """
+        self.workers = workers
+        self.fixtures = {}
+        self.values = {}
+        self.timings = {}
+        self.teardown_timings = {}
+        self._set_up = []
+        self._lock = threading.Lock()
+
+    def add(self, name, setup, teardown=None, requires=()):
+        """
+        Declare a fixture
+        :param      name:       Name of the fixture, also the keyword its value is passed to dependents as
+        :param      setup:      Function taking the values of the required fixtures and returning the fixture value
+        :param      teardown:   Function taking the fixture value, None if nothing has to be undone
+        :param      requires:   Names of the fixtures that have to be set up first
+        """
+        if name in self.fixtures:
+            raise ValueError(f"Fixture '{name}' is already declared")
+        self.fixtures[name] = Fixture(name, setup, teardown, requires)
+
+    def _check(self):
+        for fixture in self.fixtures.values():
+            for required in fixture.requires:
+                if required not in self.fixtures:
+                    raise ValueError(f"Fixture '{fixture.name}' requires unknown fixture '{required}'")
+
+        visiting, visited = set(), set()
+
+        def visit(name, path):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Fixture dependency cycle: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for required in self.fixtures[name].requires:
+                visit(required, path + [name])
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.fixtures:
+            visit(name, [])
+
+    def _run(self, waiting, call, timings, stop_on_error):
+        """
+        Call a function for every node as soon as the nodes it waits on are done
+        :param      waiting:        Dict of node name to the set of node names it waits on
+        :param      call:           Function taking a node name
+        :param      timings:        Dict the duration of each call is stored in
+        :param      stop_on_error:  Start no further nodes once a call failed
+        :return:    error:          First exception raised by a call, None if all succeeded
+        """
+        waiting = {name: set(names) for name, names in waiting.items()}
+        error = None
+
+        def timed(name):
+            started = time.perf_counter()
+            try:
+                call(name)
+            finally:
+                timings[name] = time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='fixture') as executor:
+            running = {}
+
+            def start_ready():
+                for name in [name for name, names in waiting.items() if not names]:
+                    del waiting[name]
+                    running[executor.submit(timed, name)] = name
+
+            start_ready()
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    exception = future.exception()
+                    if exception is not None:
+                        error = error or exception
+                        if stop_on_error:
+                            continue
+                    for names in waiting.values():
+                        names.discard(name)
+                if error is None or not stop_on_error:
+                    start_ready()
+        return error
+
+    def _setup(self, name):
+        fixture = self.fixtures[name]
+        value = fixture.setup(**{required: self.values[required] for required in fixture.requires})
+        with self._lock:
+            self.values[name] = value
+            self._set_up.append(name)
+
+    def _teardown(self, name):
+        fixture = self.fixtures[name]
+        if fixture.teardown is not None:
+            fixture.teardown(self.values[name])
+
+    def setup(self):
+        """
+        Set up all fixtures, overlapping the independent ones
+        :return:    values:     Dict of fixture name to its value
+        """
+        self._check()
+        error = self._run({name: set(fixture.requires) for name, fixture in self.fixtures.items()},
+                          self._setup, self.timings, stop_on_error=True)
+        if error is not None:
+            self.teardown()
+            raise error
+        return self.values
+
+    def teardown(self):
+        """
+        Tear down the fixtures that were set up, dependents before the fixtures they require
+        """
+        with self._lock:
+            set_up = set(self._set_up)
+            self._set_up = []
+        dependents = {name: set() for name in set_up}
+        for name in set_up:
+            for required in self.fixtures[name].requires:
+                if required in set_up:
+                    dependents[required].add(name)
+
+        error = self._run(dependents, self._teardown, self.teardown_timings, stop_on_error=False)
+        if error is not None:
+            raise error
+
+    def critical_path(self):
+        """
+        Slowest chain of dependencies in the last setup
+        :return:    path:   (list of fixture names, total seconds)
+        """
+        longest = {}
+
+        def chain(name):
+            if name not in longest:
+                before = max((chain(required) for required in self.fixtures[name].requires),
+                             key=lambda item: item[1], default=([], 0.0))
+                longest[name] = (before[0] + [name], before[1] + self.timings.get(name, 0.0))
+            return longest[name]
+
+        return max((chain(name) for name in self.fixtures), key=lambda item: item[1], default=([], 0.0))
+
+    def report(self):
+        """
+        Describe how long each fixture took
+        :return:    text:   One line per fixture and the critical path
+        """
+        lines = []
+        for name, fixture in self.fixtures.items():
+            line = f"{name:<20}setup {self.timings.get(name, 0.0) * 1000:>9.1f} ms"
+            if name in self.teardown_timings:
+                line += f"   teardown {self.teardown_timings[name] * 1000:>9.1f} ms"
+            if fixture.requires:
+                line += f"   requires {', '.join(fixture.requires)}"
+            lines.append(line)
+        path, seconds = self.critical_path()
+        lines.append(f"critical path {' -> '.join(path)}: {seconds * 1000:.1f} ms")
+        return '\n'.join(lines)
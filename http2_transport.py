@@ -0,0 +1,210 @@
+import asyncio
+import os
+import ssl
+import threading
+
+from requests import exceptions
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import DEFAULT_CA_BUNDLE_PATH, get_encoding_from_headers, select_proxy
+
+try:
+    import h2
+    import httpx
+except ImportError:
+    h2 = httpx = None
+
+# Connection-specific headers are not allowed in HTTP/2 requests
+_HOP_BY_HOP = frozenset(['connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade'])
+
+
+def _ssl_context(verify, cert):
+    """
+    SSLContext of the verify and cert arguments of requests
+    :param      verify:     True for the bundle of requests, False for none, or the path of a CA bundle or directory
+    :param      cert:       Client certificate file, or a (certificate, key) tuple, None for none
+    :return:    context:    ssl.SSLContext
+    """
+    if verify is False:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    elif verify is True or not os.path.isdir(verify):
+        context = ssl.create_default_context(cafile=DEFAULT_CA_BUNDLE_PATH if verify is True else verify)
+    else:
+        context = ssl.create_default_context(capath=verify)
+    if cert:
+        context.load_cert_chain(*((cert,) if isinstance(cert, str) else cert))
+    return context
+
+
+def _is_ssl_error(error):
+    while error is not None:
+        if isinstance(error, ssl.SSLError):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+async def _next_chunk(chunks):
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+class _Body:
+    """
+    File-like view of a streamed httpx response body, read by requests for iter_content
+    """
+
+    def __init__(self, adapter, response):
+        # HTTP version in the form urllib3 uses, 20 for HTTP/2
+        self.version = 20 if response.http_version == 'HTTP/2' else 11
+        self._adapter = adapter
+        self._response = response
+        self._chunks = response.aiter_bytes()
+        self._buffer = b''
+
+    def read(self, amt=None, decode_content=True):
+        while amt is None or len(self._buffer) < amt:
+            chunk = self._adapter._run(_next_chunk(self._chunks))
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if amt is None:
+            amt = len(self._buffer)
+        data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        return data
+
+    def close(self):
+        if not self._response.is_closed:
+            self._adapter._run(self._response.aclose())
+
+
+class HTTP2Adapter(BaseAdapter):
+    """
+    Transport adapter sending the requests of a requests.Session over HTTP/2 with httpx.
+
+    All requests to a host are multiplexed as streams over a single connection,
+    instead of one connection per concurrent request as with HTTPAdapter. https
+    hosts negotiate HTTP/2 with ALPN and fall back to HTTP/1.1; http hosts are
+    spoken to in cleartext HTTP/2 (h2c) with prior knowledge. The connection is
+    driven by an event loop in a background thread that every calling thread
+    hands its requests to, as the streams of a connection must be opened in
+    order. The verify, cert and proxies arguments of each request select the
+    client it is sent with, one per combination in use. Needs the optional
+    httpx and h2 packages: pip install 'httpx[http2]'.
+    """
+
+    def __init__(self, max_connections=4, max_retries=3):
+        """
+        :param      max_connections:    Maximum number of connections per host, used only by HTTP/1.1 fallbacks
+        :param      max_retries:        Retries for failed connects
+        """
+        if httpx is None or h2 is None:
+            raise ImportError("The HTTP/2 transport needs httpx and h2: pip install 'httpx[http2]'")
+        super().__init__()
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self._clients = {}
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _run(self, coroutine):
+        """
+        Run a coroutine on the event loop of the adapter and wait for its result
+        """
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(target=loop.run_forever, name='http2-transport', daemon=True)
+                    self._thread.start()
+                    self._loop = loop
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def _client(self, scheme, verify, cert, proxy):
+        """
+        Client of the settings of a request, created on first use. Only called from the event loop.
+        """
+        if scheme != 'https':
+            verify = cert = None
+        key = (scheme, verify, cert, proxy)
+        client = self._clients.get(key)
+        if client is None:
+            transport = httpx.AsyncHTTPTransport(
+                http1=scheme == 'https', http2=True, retries=self.max_retries, proxy=proxy,
+                verify=_ssl_context(verify, cert) if scheme == 'https' else True,
+                limits=httpx.Limits(max_connections=self.max_connections))
+            client = self._clients[key] = httpx.AsyncClient(transport=transport)
+        return client
+
+    @staticmethod
+    def _timeout(timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return httpx.Timeout(timeout)
+
+    async def _send(self, method, url, headers, body, timeout, stream, verify, cert, proxy):
+        client = self._client(url.partition(':')[0].lower(), verify, cert, proxy)
+        message = client.build_request(method, url, headers=headers, content=body, timeout=self._timeout(timeout))
+        return await client.send(message, stream=stream)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        """
+        Send a prepared request over HTTP/2
+        :param      request:    PreparedRequest
+        :param      stream:     Leave the body to be read through iter_content instead of reading it now
+        :param      timeout:    Seconds, or a (connect, read) tuple, as given to requests
+        :param      verify:     True, False or the path of a CA bundle, as given to requests
+        :param      cert:       Client certificate file, or a (certificate, key) tuple
+        :param      proxies:    Dict of scheme or scheme://host to proxy URL
+        :return:    response:   requests.Response
+        """
+        body = request.body.encode('utf-8') if isinstance(request.body, str) else request.body
+        headers = [(name, value) for name, value in request.headers.items() if name.lower() not in _HOP_BY_HOP]
+        cert = tuple(cert) if isinstance(cert, list) else cert
+        proxy = select_proxy(request.url, proxies)
+        try:
+            response = self._run(self._send(request.method, request.url, headers, body, timeout, stream, verify, cert,
+                                            proxy))
+        except httpx.ConnectTimeout as error:
+            raise exceptions.ConnectTimeout(error, request=request) from error
+        except httpx.TimeoutException as error:
+            raise exceptions.ReadTimeout(error, request=request) from error
+        except httpx.TransportError as error:
+            if _is_ssl_error(error):
+                raise exceptions.SSLError(error, request=request) from error
+            if isinstance(error, httpx.ProxyError) or proxy is not None and isinstance(error, httpx.ConnectError):
+                raise exceptions.ProxyError(error, request=request) from error
+            raise exceptions.ConnectionError(error, request=request) from error
+        return self.build_response(request, response)
+
+    def build_response(self, request, response):
+        result = Response()
+        result.status_code = response.status_code
+        result.headers = CaseInsensitiveDict(response.headers)
+        result.encoding = get_encoding_from_headers(result.headers)
+        result.reason = response.reason_phrase
+        result.url = request.url
+        result.request = request
+        result.connection = self
+        result.raw = _Body(self, response)
+        if response.is_stream_consumed:
+            result._content = response.content
+        return result
+
+    def close(self):
+        if self._loop is None:
+            return
+        for client in self._clients.values():
+            self._run(client.aclose())
+        self._clients.clear()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_LEDGER = 'bookstore_users.ledger'
+
+SweepResult = namedtuple('SweepResult', ['deleted', 'already_gone', 'failed'])
+
+
+class UserLedger:
+    """
+    Append-only, fsync'd record of the users created through the client.
+
+    Every created user is appended as a 'created' record before the caller gets
+    its response, and every deleted user as a 'deleted' record, so the users that
+    are still alive can be found even if the process creating them crashed.
+    Appends and compaction take an exclusive lock on the file, so several
+    processes can share one ledger. The records hold the usernames and
+    plaintext passwords needed to delete the users, and the file is created
+    readable by its owner only.
+    """
+
+    def __init__(self, path=DEFAULT_LEDGER):
+        """
+        :param      path:   Ledger file, created if it does not exist
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd = None
+
+    def _open(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+
+    def _file_lock(self):
+        """
+        Lock the current ledger file, reopening it if it was replaced by a compaction
+        """
+        while True:
+            if self._fd is None:
+                self._open()
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self._fd).st_ino == os.stat(self.path).st_ino:
+                    return
+            except FileNotFoundError:
+                pass
+            self._file_unlock()
+            self._open()
+
+    def _file_unlock(self):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _append(self, record):
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            self._file_lock()
+            try:
+                os.write(self._fd, line)
+                os.fsync(self._fd)
+            finally:
+                self._file_unlock()
+
+    def record_created(self, user_id, username, password):
+        """
+        Record a successfully created user
+        :param      user_id:    UserId of the created user
+        :param      username:   Username of the created user
+        :param      password:   Password of the created user
+        """
+        self._append({"op": "created", "userId": user_id, "username": username, "password": password})
+
+    def record_deleted(self, user_id):
+        """
+        Record a user that was deleted or is already gone
+        :param      user_id:    UserId of the user
+        """
+        self._append({"op": "deleted", "userId": user_id})
+
+    def _read(self):
+        users = {}
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("op") == "created":
+                        users[record["userId"]] = record
+                    elif record.get("op") == "deleted":
+                        users.pop(record["userId"], None)
+        except FileNotFoundError:
+            pass
+        return users
+
+    def live(self):
+        """
+        Return the users that were created and not deleted
+        :return:    users:  Dict of userId to its 'created' record
+        """
+        return self._read()
+
+    def compact(self):
+        """
+        Rewrite the ledger with only the users that are still alive
+        :return:    count:  Number of users left in the ledger
+        """
+        with self._lock:
+            self._file_lock()
+            try:
+                users = self._read()
+                directory = os.path.dirname(os.path.abspath(self.path))
+                descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.ledger-')
+                with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                    for record in users.values():
+                        file.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(temporary, self.path)
+            finally:
+                self._file_unlock()
+            self._open()
+        return len(users)
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+def _user_gone(client, username, password):
+    """
+    Ask the BookStore whether a user no longer exists
+    :return:    gone:   True only if GenerateToken authorized no one or Login did not find the user, False when
+                        neither could tell, e.g. when throttled or failing
+    """
+    response = client.generate_token(username, password)
+    if response.status_code == 200 and response.json().get("token") is None:
+        return True
+    response = client.login(username, password)
+    return response.status_code == 404 and str(response.json().get("code")) == "1207"
+
+
+def _sweep_user(client, ledger, record):
+    """
+    Delete a ledgered user
+    :return:    outcome:    'deleted', 'already_gone' or 'failed'
+    """
+    user_id, username, password = record["userId"], record["username"], record["password"]
+
+    if client.get_token(username, password) is None:
+        if not _user_gone(client, username, password):
+            return 'failed'
+        ledger.record_deleted(user_id)
+        return 'already_gone'
+
+    response = client.delete_user(user_id, username, password)
+    if response.status_code == 204:
+        if client.ledger is not ledger:
+            ledger.record_deleted(user_id)
+        return 'deleted'
+    if response.status_code == 200:
+        # 'User Id not correct!', these credentials belong to another user now
+        ledger.record_deleted(user_id)
+        return 'already_gone'
+    return 'failed'
+
+
+def sweep(ledger, client=None, workers=16, compact_every=500):
+    """
+    Delete every user still alive in the ledger, in parallel
+    :param      ledger:         UserLedger to sweep
+    :param      client:         BookStoreClient to delete with, the default client if None
+    :param      workers:        Number of users deleted in parallel
+    :param      compact_every:  Compact the ledger after this many users were removed from it
+    :return:    result:         SweepResult with the number of deleted, already gone and failed users
+    """
+    from main import get_default_client
+    client = client or get_default_client()
+
+    counts = {'deleted': 0, 'already_gone': 0, 'failed': 0}
+    removed = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sweep') as executor:
+        futures = [executor.submit(_sweep_user, client, ledger, record) for record in ledger.live().values()]
+        for future in as_completed(futures):
+            try:
+                outcome = future.result()
+            except Exception:
+                outcome = 'failed'
+            counts[outcome] += 1
+            if outcome != 'failed':
+                removed += 1
+                if removed % compact_every == 0:
+                    ledger.compact()
+
+    ledger.compact()
+    return SweepResult(**counts)
+
+
+def main(argv=None):
+    from main import BASE_URL, BookStoreClient
+
+    parser = argparse.ArgumentParser(description="Delete all users recorded in a BookStore user ledger")
+    parser.add_argument('command', choices=['sweep', 'list'])
+    parser.add_argument('--ledger', default=os.environ.get('BOOKSTORE_LEDGER') or DEFAULT_LEDGER)
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--workers', type=int, default=32)
+    args = parser.parse_args(argv)
+
+    ledger = UserLedger(args.ledger)
+    if args.command == 'list':
+        for record in ledger.live().values():
+            print(record["userId"], record["username"])
+        return 0
+
+    with BookStoreClient(base_url=args.base_url, pool_maxsize=args.workers, ledger=ledger) as client:
+        result = sweep(ledger, client=client, workers=args.workers)
+    print(f"deleted: {result.deleted}  already gone: {result.already_gone}  failed: {result.failed}")
+    return 1 if result.failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
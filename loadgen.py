@@ -0,0 +1,364 @@
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from coalesce import SingleFlight
+from main import BASE_URL, BookStoreClient
+from provisioning import provision_users
+from ratelimit import AdaptiveRateLimiter
+from stats import LatencyHistogram
+
+DEFAULT_MIX = {
+    'get_books': 60,
+    'add_book': 20,
+    'replace_book_in_collection': 10,
+    'get_user_info': 10
+}
+
+
+class VirtualUser:
+    """
+    Registered user the workload runs its operations as, with its known collection
+    """
+
+    def __init__(self, user_id, username, password, token):
+        self.user_id = user_id
+        self.username = username
+        self.password = password
+        self.token = token
+        self.collection = set()
+        self.lock = threading.Lock()
+
+
+def _get_books(client, user, isbns):
+    return client.get_books()
+
+
+def _get_book(client, user, isbns):
+    return client.get_book(random.choice(isbns))
+
+
+def _get_user_info(client, user, isbns):
+    return client.get_user_info(user.user_id, user.token)
+
+
+def _is_authorized(client, user, isbns):
+    return client.is_authorized(user.username, user.password)
+
+
+def _generate_token(client, user, isbns):
+    return client.generate_token(user.username, user.password)
+
+
+def _add_book(client, user, isbns):
+    missing = [isbn for isbn in isbns if isbn not in user.collection]
+    if not missing:
+        return None
+    isbn = random.choice(missing)
+    response = client.add_book(user.user_id, [{"isbn": isbn}], user.token)
+    if response.status_code == 201:
+        user.collection.add(isbn)
+    return response
+
+
+def _replace_book_in_collection(client, user, isbns):
+    missing = [isbn for isbn in isbns if isbn not in user.collection]
+    if not user.collection or not missing:
+        return None
+    current, replacement = random.choice(sorted(user.collection)), random.choice(missing)
+    response = client.replace_book_in_collection(user.user_id, user.token, current, replacement)
+    if response.status_code == 200:
+        user.collection.discard(current)
+        user.collection.add(replacement)
+    return response
+
+
+def _remove_book_from_collection(client, user, isbns):
+    if not user.collection:
+        return None
+    isbn = random.choice(sorted(user.collection))
+    response = client.remove_book_from_collection(user.user_id, isbn, user.token)
+    if response.status_code == 204:
+        user.collection.discard(isbn)
+    return response
+
+
+OPERATIONS = {
+    'get_books': _get_books,
+    'get_book': _get_book,
+    'get_user_info': _get_user_info,
+    'is_authorized': _is_authorized,
+    'generate_token': _generate_token,
+    'add_book': _add_book,
+    'replace_book_in_collection': _replace_book_in_collection,
+    'remove_book_from_collection': _remove_book_from_collection
+}
+
+# Operations that change a collection run under the lock of their user
+STATEFUL_OPERATIONS = {'add_book', 'replace_book_in_collection', 'remove_book_from_collection'}
+
+
+def parse_mix(value):
+    """
+    Parse a workload mix such as 'get_books=60,add_book=20'
+    :param      value:  Comma separated operation=weight pairs
+    :return:    mix:    Dict of operation name to weight
+    """
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}', expected one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class OperationStats:
+    """
+    Outcome of the requests of one operation in a load run
+    """
+
+    def __init__(self):
+        self.response_times = LatencyHistogram()
+        self.service_times = LatencyHistogram()
+        self.statuses = {}
+        self.errors = 0
+        self.skipped = 0
+        self.lock = threading.Lock()
+
+    def record(self, response_time, service_time, status):
+        with self.lock:
+            self.response_times.record_seconds(response_time)
+            self.service_times.record_seconds(service_time)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if status is None or status >= 400:
+                self.errors += 1
+
+    def summary(self, elapsed):
+        def milliseconds(value):
+            return None if value is None else round(value / 1000, 3)
+
+        response_times, service_times = self.response_times, self.service_times
+        return {
+            'count': response_times.count,
+            'errors': self.errors,
+            'skipped': self.skipped,
+            'throughput': round(response_times.count / elapsed, 3) if elapsed else 0.0,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items(), key=str)},
+            'response_time_ms': {name: milliseconds(response_times.percentile(fraction))
+                                 for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0))},
+            'service_time_ms': {name: milliseconds(service_times.percentile(fraction))
+                                for name, fraction in (('p50', 0.5), ('p99', 0.99))}
+        }
+
+
+def schedule(rate, duration, mix, arrival='poisson', seed=None):
+    """
+    Plan the arrivals of an open-loop run, independent of how fast responses come back
+    :param      rate:       Target arrival rate in requests per second
+    :param      duration:   Length of the run in seconds
+    :param      mix:        Dict of operation name to weight
+    :param      arrival:    'poisson' for exponential gaps, 'constant' for evenly spaced arrivals
+    :param      seed:       Seed for a reproducible schedule
+    :return:    arrivals:   List of (offset in seconds, operation name)
+    """
+    generator = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    offsets = []
+    offset = 0.0
+    while True:
+        offset += generator.expovariate(rate) if arrival == 'poisson' else 1.0 / rate
+        if offset >= duration:
+            break
+        offsets.append(offset)
+
+    return list(zip(offsets, generator.choices(names, weights=weights, k=len(offsets))))
+
+
+class LoadGenerator:
+    """
+    Open-loop workload driver for BookStore-compatible services.
+
+    Requests are started at the times planned by schedule(), whether or not
+    earlier requests have completed. Response times are measured from the
+    planned start, so queueing behind slow responses is reported instead of
+    hidden (no coordinated omission); service times are measured from the
+    actual start for comparison.
+    """
+
+    def __init__(self, client, mix=None, users=10, workers=64, password="LoadTest123!"):
+        """
+        :param      client:     BookStoreClient to send requests with
+        :param      mix:        Dict of operation name to weight, DEFAULT_MIX if None
+        :param      users:      Number of virtual users the operations are spread over
+        :param      workers:    Maximum number of requests in flight
+        :param      password:   Password of the virtual users
+        """
+        self.client = client
+        self.mix = mix or DEFAULT_MIX
+        self.workers = workers
+        self.password = password
+        self.user_count = users
+        self.users = []
+        self.isbns = []
+        self.stats = {}
+
+    def setup(self):
+        """
+        Register the virtual users and load the catalog
+        """
+        template = 'load-' + uuid.uuid4().hex[:8] + '-{:05d}'
+        self.users = [VirtualUser(user.user_id, user.username, user.password, user.token)
+                      for user in provision_users(self.user_count, template, self.password, client=self.client,
+                                                  workers=min(self.workers, 32))]
+        self.isbns = [book["isbn"] for book in self.client.get_books().json()["books"]]
+
+    def teardown(self):
+        """
+        Delete the virtual users
+        """
+        with ThreadPoolExecutor(max_workers=min(self.workers, 32)) as executor:
+            list(executor.map(lambda user: self.client.delete_user(user.user_id, user.username, user.password),
+                              self.users))
+        self.users = []
+
+    def _execute(self, name, intended):
+        started = time.perf_counter()
+        user = random.choice(self.users)
+        operation = OPERATIONS[name]
+        try:
+            if name in STATEFUL_OPERATIONS:
+                with user.lock:
+                    response = operation(self.client, user, self.isbns)
+            else:
+                response = operation(self.client, user, self.isbns)
+            status = None if response is None else response.status_code
+        except Exception:
+            response, status = False, None
+        finished = time.perf_counter()
+
+        if response is None:
+            with self.stats[name].lock:
+                self.stats[name].skipped += 1
+            return
+        self.stats[name].record(finished - intended, finished - started, status)
+
+    def run(self, rate, duration, arrival='poisson', seed=None):
+        """
+        Drive the workload at a target arrival rate
+        :param      rate:       Target arrival rate in requests per second
+        :param      duration:   Length of the run in seconds
+        :param      arrival:    'poisson' or 'constant'
+        :param      seed:       Seed for a reproducible schedule
+        :return:    report:     Dict with the overall and per operation results
+        """
+        arrivals = schedule(rate, duration, self.mix, arrival=arrival, seed=seed)
+        self.stats = {name: OperationStats() for name in self.mix}
+        late = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='load') as executor:
+            start = time.perf_counter()
+            for offset, name in arrivals:
+                intended = start + offset
+                delay = intended - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -0.001:
+                    late += 1
+                executor.submit(self._execute, name, intended)
+        elapsed = time.perf_counter() - start
+
+        operations = {name: stats.summary(elapsed) for name, stats in self.stats.items()}
+        completed = sum(summary['count'] for summary in operations.values())
+        return {
+            'target_rate': rate,
+            'duration': duration,
+            'elapsed': round(elapsed, 3),
+            'scheduled': len(arrivals),
+            'completed': completed,
+            'throughput': round(completed / elapsed, 3) if elapsed else 0.0,
+            'late_dispatches': late,
+            'operations': operations
+        }
+
+
+def format_report(report):
+    """
+    Format a load run report as a table
+    :param      report:     Report returned by LoadGenerator.run
+    :return:    text:       Table with one line per operation
+    """
+    lines = [f"{'operation':<30}{'count':>8}{'errors':>8}{'ops/s':>10}{'p50 ms':>10}{'p90 ms':>10}"
+             f"{'p99 ms':>10}{'max ms':>10}"]
+    for name, summary in report['operations'].items():
+        times = summary['response_time_ms']
+        lines.append(f"{name:<30}{summary['count']:>8}{summary['errors']:>8}{summary['throughput']:>10.1f}"
+                     + ''.join(f"{times[key] if times[key] is not None else '-':>10}"
+                               for key in ('p50', 'p90', 'p99', 'max')))
+    lines.append(f"target {report['target_rate']}/s, achieved {report['throughput']}/s over {report['elapsed']}s, "
+                 f"{report['late_dispatches']} late dispatches")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Open-loop load generator for BookStore-compatible services")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--stand-in', action='store_true', help="run against an in-process BookStore stand-in")
+    parser.add_argument('--rate', type=float, default=50, help="target arrival rate in requests per second")
+    parser.add_argument('--duration', type=float, default=10, help="length of the run in seconds")
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help="e.g. get_books=60,add_book=20")
+    parser.add_argument('--arrival', choices=['poisson', 'constant'], default='poisson')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=64)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--rate-limit', type=float,
+                        help="pace the client with an adaptive rate limiter starting at this many requests per second")
+    parser.add_argument('--coalesce', action='store_true',
+                        help="send identical reads in flight at the same time only once")
+    parser.add_argument('--json', help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.stand_in:
+        from stub_server import StubServer
+        server = StubServer().start()
+        args.base_url = server.base_url
+
+    try:
+        # Without the catalog cache every get_books and get_book reaches the server
+        limiter = AdaptiveRateLimiter(rate=args.rate_limit) if args.rate_limit else None
+        single_flight = SingleFlight() if args.coalesce else None
+        with BookStoreClient(base_url=args.base_url, pool_maxsize=args.workers, catalog_ttl=None,
+                             rate_limiter=limiter, single_flight=single_flight) as client:
+            generator = LoadGenerator(client, mix=args.mix, users=args.users, workers=args.workers)
+            generator.setup()
+            try:
+                report = generator.run(args.rate, args.duration, arrival=args.arrival, seed=args.seed)
+            finally:
+                generator.teardown()
+    finally:
+        if server is not None:
+            server.stop()
+
+    print(format_report(report))
+    if limiter is not None:
+        print(f"rate limiter settled at {limiter.rate:.1f}/s after {limiter.throttled} throttled responses")
+    if single_flight is not None:
+        counters = single_flight.counters()
+        print(f"coalesced {counters['hits']} of {counters['hits'] + counters['misses']} reads "
+              f"({counters['hit_ratio']:.1%})")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,172 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Fields copied from a record into its JSON line when they were passed as extra
+RECORD_FIELDS = ('test', 'endpoint', 'status', 'latency_ms')
+
+_current_test = None
+_listener = None
+_handler = None
+_lock = threading.Lock()
+
+
+def set_current_test(name):
+    """
+    Name the test that following log records belong to
+    :param      name:   Test id, e.g. test_valid_user.Test.test_add_new_book, None when no test is running
+    """
+    global _current_test
+    _current_test = name
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line
+    """
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for field in RECORD_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        exception = self.formatException(record.exc_info) if record.exc_info else record.exc_text
+        if exception:
+            entry['exception'] = exception
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class StructuredQueueHandler(QueueHandler):
+    """
+    QueueHandler keeping the traceback of a record in exc_text instead of appending it to the message
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class TestContextFilter(logging.Filter):
+    """
+    Stamp records with the test that is running when they are logged
+    """
+
+    def filter(self, record):
+        if getattr(record, 'test', None) is None:
+            record.test = _current_test or os.environ.get('PYTEST_CURRENT_TEST')
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of the records at or below a level, e.g. per-request DEBUG events
+    """
+
+    def __init__(self, rate, level=logging.DEBUG):
+        """
+        :param      rate:   Fraction of the records kept, between 0 and 1
+        :param      level:  Records at or below this level are sampled, higher ones are always kept
+        """
+        super().__init__()
+        self.rate = rate
+        self.level = level
+        # Own generator, so sampling does not disturb seeded random picks of the tests
+        self._random = random.Random()
+
+    def filter(self, record):
+        if record.levelno > self.level or self.rate >= 1:
+            return True
+        return self.rate > 0 and self._random.random() < self.rate
+
+
+def configure_logging(path, level=logging.DEBUG, max_bytes=10 * 1024 * 1024, backup_count=5, debug_sample_rate=1.0):
+    """
+    Send all logging through a queue to a background thread writing rotated JSON lines.
+
+    Logging calls only put the record on the queue, so file I/O no longer adds to
+    the latency of the calls being measured. Sampled out records are dropped
+    before they are queued. Calling it again returns the running listener.
+    :param      path:               Log file
+    :param      level:              Level of the root logger
+    :param      max_bytes:          Size at which the log file is rotated
+    :param      backup_count:       Number of rotated files kept
+    :param      debug_sample_rate:  Fraction of the DEBUG records kept
+    :return:    listener:           QueueListener writing the records, stopped by stop_logging() or at exit
+    """
+    global _listener, _handler
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())
+
+        records = queue.SimpleQueue()
+        queue_handler = StructuredQueueHandler(records)
+        queue_handler.addFilter(SamplingFilter(debug_sample_rate))
+        queue_handler.addFilter(TestContextFilter())
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(queue_handler)
+
+        _listener = QueueListener(records, file_handler)
+        _listener.start()
+        _handler = queue_handler
+        return _listener
+
+
+@atexit.register
+def stop_logging():
+    """
+    Write out the queued records and remove the handler installed by configure_logging
+    """
+    global _listener, _handler
+    with _lock:
+        if _listener is None:
+            return
+        logging.getLogger().removeHandler(_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = _handler = None
+
+
+def configure_test_logging(filename):
+    """
+    Logging of a test module: the JSON pipeline if BOOKSTORE_LOG is set, otherwise a plain log file
+    :param      filename:   Plain log file of the module
+    """
+    path = os.environ.get('BOOKSTORE_LOG')
+    if not path:
+        logging.basicConfig(
+            level=logging.DEBUG,
+            format="%(asctime)s %(levelname)s %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+            handlers=[logging.FileHandler(filename=filename, encoding='utf-8')]
+        )
+        return
+
+    configure_logging(
+        path,
+        max_bytes=int(os.environ.get('BOOKSTORE_LOG_MAX_BYTES', 10 * 1024 * 1024)),
+        backup_count=int(os.environ.get('BOOKSTORE_LOG_BACKUPS', 5)),
+        debug_sample_rate=float(os.environ.get('BOOKSTORE_LOG_DEBUG_SAMPLE', 0.01))
+    )
@@ -1,5 +1,498 @@
-import random
+import json
+import logging
+import os
+import threading
+import time
+
 import requests
+from urllib3.util.retry import Retry
+
+from cassette import install_cassette
+from catalog_cache import CatalogCache
+from catalog_stream import find_book, iter_books, sample_books
+from coalesce import SingleFlight
+from http2_transport import HTTP2Adapter
+from ledger import UserLedger
+from prewarm import PrewarmedHTTPAdapter
+from profiling import profile_call
+from ratelimit import THROTTLED, AdaptiveRateLimiter, parse_retry_after, retry_delay
+from replicas import ReplicaPool
+from stats import registry
+from token_cache import TokenCache
+
+BASE_URL = os.environ.get('BOOKSTORE_BASE_URL', 'https://demoqa.com')
+
+log = logging.getLogger('bookstore')
+
+
+class BookStoreClient:
+    """
+    Client for the BookStore API holding one pooled, keep-alive session.
+
+    All requests made through the same client reuse the connections of its pool,
+    so only the first call to a host pays the TCP and TLS handshakes.
+    """
+
+    def __init__(self, base_url=BASE_URL, pool_connections=4, pool_maxsize=32, max_retries=3, timeout=30,
+                 token_cache=None, catalog_ttl=300, catalog_snapshot=None, ledger=None, stats=None, rate_limiter=None,
+                 throttle_retries=3, replicas=None, single_flight=None, http2=False, prewarm=0, dns_ttl=300):
+        """
+        :param      base_url:           Scheme and host of the BookStore API, e.g. https://demoqa.com
+        :param      pool_connections:   Number of per-host connection pools to keep
+        :param      pool_maxsize:       Maximum number of connections kept alive per host
+        :param      max_retries:        Retries for failed connects and for reads of idempotent requests
+        :param      timeout:            Connect and read timeout of a single request in seconds
+        :param      token_cache:        TokenCache for bearer tokens, a new in-memory cache if None
+        :param      catalog_ttl:        Seconds the book catalog is served from cache before revalidation,
+                                        None to send every catalog request to the server
+        :param      catalog_snapshot:   JSON file to keep the book catalog in across processes
+        :param      ledger:             UserLedger recording created and deleted users, none if None
+        :param      stats:              StatsRegistry recording call latencies, the shared stats.registry if None
+        :param      rate_limiter:       AdaptiveRateLimiter pacing all requests of the client, no pacing if None
+        :param      throttle_retries:   Retries of idempotent requests answered with 429 or 503
+        :param      replicas:           ReplicaPool to spread requests over instead of base_url, its first
+                                        replica then takes the place of base_url
+        :param      single_flight:      SingleFlight coalescing identical idempotent GETs in flight at the same
+                                        time into one request, every GET is sent if None
+        :param      http2:              Multiplex all requests to a host over one HTTP/2 connection instead of
+                                        pooling HTTP/1.1 connections, needs the optional httpx and h2 packages
+        :param      prewarm:            Connections to open to every base URL in the background right away, so
+                                        the first calls do not pay for DNS, TCP and TLS; ignored with http2
+        :param      dns_ttl:            Seconds host addresses are cached by new pooled connections, None to
+                                        resolve the host for every connection
+        """
+        self.replicas = replicas
+        self.base_url = (replicas.replicas[0].url if replicas is not None else base_url).rstrip('/')
+        self.timeout = timeout
+        self.tokens = token_cache or TokenCache()
+        self.catalog = CatalogCache(self._fetch_catalog, ttl=catalog_ttl, snapshot_path=catalog_snapshot)
+        self.ledger = ledger
+        self.stats = stats or registry
+        self.rate_limiter = rate_limiter
+        self.throttle_retries = throttle_retries
+        self.single_flight = single_flight
+
+        if http2:
+            adapter = HTTP2Adapter(max_connections=pool_maxsize, max_retries=max_retries)
+        else:
+            retries = Retry(
+                total=max_retries,
+                connect=max_retries,
+                read=max_retries,
+                status=0,
+                backoff_factor=0.1,
+                allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+                raise_on_status=False
+            )
+            adapter = PrewarmedHTTPAdapter(dns_ttl=dns_ttl, pool_connections=pool_connections,
+                                           pool_maxsize=pool_maxsize, max_retries=retries)
+
+        self.session = requests.Session()
+        self.session.headers['Connection'] = 'keep-alive'
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if prewarm:
+            self.prewarm(prewarm)
+
+    def prewarm(self, connections, wait=False):
+        """
+        Open pooled connections to every base URL ahead of the requests that will use them
+        :param      connections:    Connections to open per base URL
+        :param      wait:           Return once the connections are open instead of opening them in the background
+        :return:    thread:         Thread opening the connections, None with wait or without a pooled adapter
+        """
+        adapter = self.session.get_adapter(self.base_url)
+        if not isinstance(adapter, PrewarmedHTTPAdapter):
+            return None
+        urls = [replica.url for replica in self.replicas.replicas] if self.replicas is not None else [self.base_url]
+
+        def run():
+            for url in urls:
+                settings = self.session.merge_environment_settings(url, {}, None, None, None)
+                opened = adapter.prewarm(url, connections, verify=settings['verify'], cert=settings['cert'],
+                                         proxies=settings['proxies'], timeout=self.timeout)
+                log.debug("Prewarmed %d connections to %s", opened, url)
+
+        if wait:
+            run()
+            return None
+        thread = threading.Thread(target=run, name='bookstore-prewarm', daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        """
+        Close all pooled connections of the client
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _request(self, method, path, endpoint=None, idempotent=False, affinity=None, **kwargs):
+        """
+        Send a request to the BookStore API over the pooled session and record its latency.
+
+        With a single_flight, an idempotent GET identical to one in flight waits
+        for it and returns the same response object instead of being sent.
+        :param      method:     HTTP method
+        :param      path:       Path of the endpoint, starting with '/'
+        :param      endpoint:   Endpoint template the latency is recorded under, the path if None
+        :param      idempotent: Retry the request with jittered backoff while it is throttled
+        :param      affinity:   Key pinning the request to a replica, e.g. the userId it is about
+        :return:    response:   Response message
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        with profile_call():
+            if self.single_flight is not None and idempotent and method == 'GET' and not kwargs.get('stream'):
+                key = (path, tuple(sorted((kwargs.get('params') or {}).items())),
+                       tuple(sorted((kwargs.get('headers') or {}).items())))
+                return self.single_flight.do(key, lambda: self._send(method, path, endpoint, idempotent, affinity,
+                                                                     **kwargs))
+            return self._send(method, path, endpoint, idempotent, affinity, **kwargs)
+
+    def _send(self, method, path, endpoint, idempotent, affinity, **kwargs):
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            replica = self.replicas.select(affinity) if self.replicas is not None else None
+            status = 0
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, (replica.url if replica else self.base_url) + path, **kwargs)
+                status = response.status_code
+            finally:
+                seconds = time.perf_counter() - started
+                if replica is not None:
+                    self.replicas.finish(replica, seconds, failed=status == 0 or status >= 500)
+                self.stats.record(method, endpoint or path, status, seconds)
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("%s %s %s", method, path, status, extra={
+                        'endpoint': endpoint or path, 'status': status, 'latency_ms': round(seconds * 1000, 3)})
+
+            if status not in THROTTLED:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.on_response(status)
+                return response
+
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if self.rate_limiter is not None:
+                self.rate_limiter.on_response(status, retry_after)
+            if not idempotent or attempt >= self.throttle_retries:
+                return response
+            # A streamed response holds its pooled connection until closed
+            response.close()
+            time.sleep(retry_delay(attempt, retry_after))
+            attempt += 1
+
+    def _cached_response(self, path, payload):
+        """
+        Build a response for data answered from a local cache instead of the network
+        :param      path:       Path of the endpoint the data belongs to
+        :param      payload:    JSON payload, or the already encoded body as bytes
+        :return:    response:   Response message with status 200 and an 'X-Cache: HIT' header
+        """
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = self.base_url + path
+        response.encoding = 'utf-8'
+        response.headers['Content-Type'] = 'application/json; charset=utf-8'
+        response.headers['X-Cache'] = 'HIT'
+        response._content = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+        return response
+
+    @staticmethod
+    def _auth(token):
+        return {"Authorization": f'Bearer {token}'}
+
+    def create_new_user(self, username, password):
+        """
+        Register a new user
+        :param      username:   Username to register with
+        :param      password:   Password to register with
+        :return:    response:   Response message
+        """
+        user = {
+            'userName': username,
+            'password': password
+        }
+        response = self._request('POST', '/Account/v1/User', affinity=(username, password), json=user)
+        if response.status_code == 201:
+            user_id = response.json()["userID"]
+            if self.replicas is not None:
+                self.replicas.pin(user_id, response.url)
+                self.replicas.pin((username, password), response.url)
+            if self.ledger is not None:
+                self.ledger.record_created(user_id, username, password)
+
+        return response
+
+    def generate_token(self, username, password):
+        """
+        Generate Authorization Token for the specified user
+        :param      username:   Username of the specified user
+        :param      password:   Password of the specified user
+        :return:    response:   Response message
+        """
+        user = {
+            'userName': username,
+            'password': password
+        }
+        return self._request('POST', '/Account/v1/GenerateToken', affinity=(username, password), json=user)
+
+    def login(self, username, password):
+        """
+        Log in as the specified user
+        :param      username:   Username of the specified user
+        :param      password:   Password of the specified user
+        :return:    response:   Response message with the userId of the user
+        """
+        user = {
+            'userName': username,
+            'password': password
+        }
+        return self._request('POST', '/Account/v1/Login', affinity=(username, password), json=user)
+
+    def get_token(self, username, password):
+        """
+        Get a valid Authorization Token for the specified user, reusing a cached one when possible
+        :param      username:   Username of the specified user
+        :param      password:   Password of the specified user
+        :return:    token:      Bearer token, or None if the user could not be authorized
+        """
+        return self.tokens.get(username, password, self.generate_token)
+
+    def delete_user(self, user_id, username, password):
+        """
+        Delete a registered user
+        :param      user_id:    User Id
+        :param      username:   Username to register with
+        :param      password:   Password to register with
+        :return:    response:   Response message
+        """
+        def delete(token):
+            return self._request('DELETE', f'/Account/v1/User/{user_id}', endpoint='/Account/v1/User/{userId}',
+                                 affinity=user_id, headers=self._auth(token))
+
+        response = self.tokens.call(username, password, self.generate_token, delete)
+        if response.status_code == 204:
+            self.tokens.invalidate(username)
+            if self.replicas is not None:
+                self.replicas.unpin(user_id)
+                self.replicas.unpin((username, password))
+            if self.ledger is not None:
+                self.ledger.record_deleted(user_id)
+
+        return response
+
+    def get_user_info(self, user_id, token):
+        """
+        Get information of specified user
+        :param      user_id:    Id of the specified user
+        :param      token:      Authorization token of the specified user
+        :return:    response:   Response message
+        """
+        return self._request('GET', f'/Account/v1/User/{user_id}', endpoint='/Account/v1/User/{userId}',
+                             idempotent=True, affinity=user_id, headers=self._auth(token))
+
+    def is_authorized(self, username, password):
+        """
+        Check if specified user is authorized
+        :param      username:   Username of the specified user
+        :param      password:   Password of the specified user
+        :return:    response:   Response message
+        """
+        user = {
+            'userName': username,
+            'password': password
+        }
+        return self._request('POST', '/Account/v1/Authorized', affinity=(username, password), json=user)
+
+    def add_book(self, user_id, collection_isbns, token):
+        """
+        Add book/s to add to a specified user
+        :param      user_id:            UserId of specified user
+        :param      collection_isbns:   Isbn/s of books to add to the collection of the specified user
+        :param      token:              Token of specified user
+        :return:    response:           Response message
+        """
+        body = {
+            'userId': user_id,
+            'collectionOfIsbns': collection_isbns
+        }
+        return self._request('POST', '/BookStore/v1/Books', affinity=user_id, json=body, headers=self._auth(token))
+
+    def _fetch_catalog(self, headers):
+        return self._request('GET', '/BookStore/v1/Books', idempotent=True, headers=headers)
+
+    def get_books(self):
+        """
+        Return all books in the store, answered from the catalog cache while it is fresh
+        :return:    response:   Response message
+        """
+        response = self.catalog.refresh()
+        if response is not None:
+            return response
+
+        return self._cached_response('/BookStore/v1/Books', self.catalog.content)
+
+    def _stream_catalog(self, consume, chunk_size=65536):
+        """
+        Read the catalog from the network in chunks instead of loading it whole
+        :param      consume:    Function taking the iterator of byte chunks, e.g. catalog_stream.find_book
+        :param      chunk_size: Bytes read at a time
+        :return:    result:     What consume returned, the rest of the catalog is not read
+        """
+        response = self._request('GET', '/BookStore/v1/Books', idempotent=True, stream=True)
+        try:
+            response.raise_for_status()
+            return consume(response.iter_content(chunk_size))
+        finally:
+            response.close()
+
+    def stream_books(self, chunk_size=65536):
+        """
+        Iterate over the books in the store as they are read, in memory independent of the catalog size
+        :param      chunk_size: Bytes read from the network at a time
+        :return:    books:      Generator of models.Book, closing it stops reading the catalog
+        """
+        response = self._request('GET', '/BookStore/v1/Books', idempotent=True, stream=True)
+        try:
+            response.raise_for_status()
+            yield from iter_books(response.iter_content(chunk_size))
+        finally:
+            response.close()
+
+    def get_book(self, isbn):
+        """
+        Get a book by a given isbn, answered from the catalog cache while it is fresh
+        :param      isbn:       Isbn of book wanted
+        :return:    response:   Response message
+        """
+        book = self.catalog.lookup(isbn) if self.catalog.is_fresh else None
+        if book is not None:
+            return self._cached_response('/BookStore/v1/Book', book)
+
+        params = {
+            'ISBN': isbn
+        }
+        return self._request('GET', '/BookStore/v1/Book', idempotent=True, params=params)
+
+    def is_valid_isbn(self, isbn):
+        """
+        Check if a book with the given isbn is in the store
+        :param      isbn:       Isbn to check
+        :return:    valid:      True if the store has a book with this isbn
+        """
+        if self.catalog.ttl is None:
+            # Without the cache, the catalog is only read up to the book
+            return self._stream_catalog(lambda chunks: find_book(chunks, isbn)) is not None
+        return self.catalog.contains(isbn)
+
+    def get_random_book(self):
+        """
+        Get isbn of a random book
+        :return:    isbn:   random isbn
+        """
+        if self.catalog.ttl is None:
+            books = self._stream_catalog(sample_books)
+            return books[0].isbn if books else None
+        return self.catalog.random_isbn()
+
+    def replace_book_in_collection(self, user_id, token, current_isbn, isbn_not_in_collection):
+        """
+        Replace book in collection with another
+        :param      user_id:        UserId of the specified User
+        :param      token:          Authorization token of specified user
+        :param      current_isbn:   Isbn in collection that is to be replaced
+        :param      isbn_not_in_collection:   New isbn to add to collection in place of the other
+        :return:    Response:       Response message
+        """
+        body = {
+            'userId': user_id,
+            'isbn': isbn_not_in_collection
+        }
+        return self._request('PUT', f'/BookStore/v1/Books/{current_isbn}', endpoint='/BookStore/v1/Books/{isbn}',
+                             affinity=user_id, json=body, headers=self._auth(token))
+
+    def clear_collection(self, user_id, token):
+        """
+        Remove all books from the collection of a specified user in one call
+        :param      user_id:    UserId of specified user
+        :param      token:      Authorization token of the specified user
+        :return:    response:   Response message
+        """
+        params = {
+            'UserId': user_id
+        }
+        return self._request('DELETE', '/BookStore/v1/Books', affinity=user_id, params=params,
+                             headers=self._auth(token))
+
+    def remove_book_from_collection(self, user_id, isbn, token):
+        """
+        Remove a book from the collection of a specified user
+        :param      user_id:    UserId of specified user
+        :param      isbn:       Isbn of the book you to be removed from the user's collection
+        :param      token:      Authorization token of the specified user
+        :return:    response:   Response message
+        """
+        body = {
+            'isbn': isbn,
+            'userId': user_id
+        }
+        return self._request('DELETE', '/BookStore/v1/Book', affinity=user_id, json=body, headers=self._auth(token))
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client():
+    """
+    Return the client shared by the module-level functions, creating it on first use
+    :return:    client:     Default BookStoreClient
+    """
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                ledger_path = os.environ.get('BOOKSTORE_LEDGER')
+                rate_limit = os.environ.get('BOOKSTORE_RATE_LIMIT')
+                base_urls = os.environ.get('BOOKSTORE_BASE_URLS')
+                _default_client = BookStoreClient(
+                    token_cache=TokenCache(path=os.environ.get('BOOKSTORE_TOKEN_CACHE')),
+                    catalog_snapshot=os.environ.get('BOOKSTORE_CATALOG_SNAPSHOT'),
+                    ledger=UserLedger(ledger_path) if ledger_path else None,
+                    rate_limiter=AdaptiveRateLimiter(rate=float(rate_limit)) if rate_limit else None,
+                    replicas=ReplicaPool([url.strip() for url in base_urls.split(',') if url.strip()],
+                                         policy=os.environ.get('BOOKSTORE_REPLICA_POLICY', 'round_robin'))
+                    if base_urls else None,
+                    single_flight=SingleFlight() if os.environ.get('BOOKSTORE_COALESCE') else None,
+                    http2=bool(os.environ.get('BOOKSTORE_HTTP2')),
+                    prewarm=int(os.environ.get('BOOKSTORE_PREWARM') or 0)
+                )
+                if os.environ.get('BOOKSTORE_CASSETTE'):
+                    install_cassette(_default_client, os.environ['BOOKSTORE_CASSETTE'],
+                                     os.environ.get('BOOKSTORE_CASSETTE_MODE', 'replay'))
+    return _default_client
+
+
+def set_default_client(client):
+    """
+    Replace the client shared by the module-level functions
+    :param      client:     BookStoreClient to use from now on
+    :return:    client:     Previous default client, or None
+    """
+    global _default_client
+    with _default_client_lock:
+        previous, _default_client = _default_client, client
+    return previous
 
 
 def create_new_user(username, password):
@@ -9,13 +502,7 @@ def create_new_user(username, password):
     :param      password:   Password to register with
     :return:    response:   Response message
     """
-    user = {
-        'userName': username,
-        'password': password
-    }
-    response = requests.post(url='https://demoqa.com/Account/v1/User', json=user)
-
-    return response
+    return get_default_client().create_new_user(username, password)
 
 
 def generate_token(username, password):
@@ -25,13 +512,27 @@ def generate_token(username, password):
     :param      password:   Password of the specified user
     :return:    response:   Response message
     """
-    user = {
-        'userName': username,
-        'password': password
-    }
-    response = requests.post(url='https://demoqa.com/Account/v1/GenerateToken', json=user)
+    return get_default_client().generate_token(username, password)
 
-    return response
+
+def login(username, password):
+    """
+    Log in as the specified user
+    :param      username:   Username of the specified user
+    :param      password:   Password of the specified user
+    :return:    response:   Response message with the userId of the user
+    """
+    return get_default_client().login(username, password)
+
+
+def get_token(username, password):
+    """
+    Get a valid Authorization Token for the specified user, reusing a cached one when possible
+    :param      username:   Username of the specified user
+    :param      password:   Password of the specified user
+    :return:    token:      Bearer token, or None if the user could not be authorized
+    """
+    return get_default_client().get_token(username, password)
 
 
 def delete_user(user_id, username, password):
@@ -42,15 +543,7 @@ def delete_user(user_id, username, password):
     :param      password:   Password to register with
     :return:    response:   Response message
     """
-    response = generate_token(username, password)
-    status_code = response.status_code
-    message = response.json()
-
-    token = message["token"] if status_code == 200 else " "
-    headers = {"Authorization": f'Bearer {token}'}
-    response = requests.delete(url=f'https://demoqa.com/Account/v1/User/{user_id}', headers=headers)
-
-    return response
+    return get_default_client().delete_user(user_id, username, password)
 
 
 def get_user_info(user_id, token):
@@ -60,10 +553,7 @@ def get_user_info(user_id, token):
     :param      token:      Authorization token of the specified user
     :return:    response:   Response message
     """
-    headers = {"Authorization": f'Bearer {token}'}
-    response = requests.get(url=f'https://demoqa.com/Account/v1/User/{user_id}', headers=headers)
-
-    return response
+    return get_default_client().get_user_info(user_id, token)
 
 
 def is_authorized(username, password):
@@ -73,31 +563,18 @@ def is_authorized(username, password):
     :param      password:   Password of the specified user
     :return:    response:   Response message
     """
-    user = {
-        'userName': username,
-        'password': password
-    }
-    response = requests.post(url='https://demoqa.com/Account/v1/Authorized', json=user)
-
-    return response
+    return get_default_client().is_authorized(username, password)
 
 
 def add_book(user_id, collection_isbns, token):
     """
     Add book/s to add to a specified user
-    :param      user_id:             UserId of specified user
-    :param      collection_isbns:  Isbn/s of books to add to the collection of the specified user
+    :param      user_id:            UserId of specified user
+    :param      collection_isbns:   Isbn/s of books to add to the collection of the specified user
     :param      token:              Token of specified user
     :return:    response:           Response message
     """
-    body = {
-        'userId': user_id,
-        'collectionOfIsbns': collection_isbns
-    }
-    headers = {"Authorization": f'Bearer {token}'}
-    response = requests.post('https://demoqa.com/BookStore/v1/Books', json=body, headers=headers)
-
-    return response
+    return get_default_client().add_book(user_id, collection_isbns, token)
 
 
 def get_books():
@@ -105,9 +582,16 @@ def get_books():
     Return all books in the store
     :return:    response:   Response message
     """
-    response = requests.get('https://demoqa.com/BookStore/v1/Books')
+    return get_default_client().get_books()
+
 
-    return response
+def stream_books(chunk_size=65536):
+    """
+    Iterate over the books in the store as they are read, in memory independent of the catalog size
+    :param      chunk_size: Bytes read from the network at a time
+    :return:    books:      Generator of models.Book
+    """
+    return get_default_client().stream_books(chunk_size)
 
 
 def get_book(isbn):
@@ -116,12 +600,16 @@ def get_book(isbn):
     :param      isbn:       Isbn of book wanted
     :return:    response:   Response message
     """
-    params = {
-        'ISBN': {isbn}
-    }
-    response = requests.get('https://demoqa.com/BookStore/v1/Book', params=params)
+    return get_default_client().get_book(isbn)
 
-    return response
+
+def is_valid_isbn(isbn):
+    """
+    Check if a book with the given isbn is in the store
+    :param      isbn:       Isbn to check
+    :return:    valid:      True if the store has a book with this isbn
+    """
+    return get_default_client().is_valid_isbn(isbn)
 
 
 def get_random_book():
@@ -129,13 +617,7 @@ def get_random_book():
     Get isbn of a random book
     :return:    isbn:   random isbn
     """
-    response = get_books()
-    books = response.json()["books"]
-    index = random.randint(0, len(books))
-
-    isbn = books[index]["isbn"]
-
-    return isbn
+    return get_default_client().get_random_book()
 
 
 def replace_book_in_collection(user_id, token, current_isbn, isbn_not_in_collection):
@@ -147,30 +629,25 @@ def replace_book_in_collection(user_id, token, current_isbn, isbn_not_in_collect
     :param      isbn_not_in_collection:   New isbn to add to collection in place of the other
     :return:    Response:       Response message
     """
-    body = {
-        'userId': user_id,
-        'isbn': isbn_not_in_collection
-    }
-    headers = {"Authorization": f'Bearer {token}'}
-    response = requests.put(f'https://demoqa.com/BookStore/v1/Books/{current_isbn}', json=body, headers=headers)
+    return get_default_client().replace_book_in_collection(user_id, token, current_isbn, isbn_not_in_collection)
 
-    return response
+
+def clear_collection(user_id, token):
+    """
+    Remove all books from the collection of a specified user in one call
+    :param      user_id:    UserId of specified user
+    :param      token:      Authorization token of the specified user
+    :return:    response:   Response message
+    """
+    return get_default_client().clear_collection(user_id, token)
 
 
 def remove_book_from_collection(user_id, isbn, token):
     """
     Remove a book from the collection of a specified user
-    :param      user_id:     UserId of specified user
+    :param      user_id:    UserId of specified user
     :param      isbn:       Isbn of the book you to be removed from the user's collection
     :param      token:      Authorization token of the specified user
     :return:    response:   Response message
     """
-    body = {
-        'isbn': isbn,
-        'userId': user_id
-    }
-    headers = {"Authorization": f'Bearer {token}'}
-    response = requests.delete('https://demoqa.com/BookStore/v1/Book', json=body, headers=headers)
-
-    return response
-
+    return get_default_client().remove_book_from_collection(user_id, isbn, token)
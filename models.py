@@ -0,0 +1,230 @@
+import json
+
+from token_cache import parse_expires
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(content):
+    """
+    Decode a JSON response body, with orjson when it is installed
+    :param      content:    Body as bytes or str
+    :return:    value:      Decoded JSON value
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class Book:
+    """
+    Book of the store, with the fields returned by the BookStore API
+    """
+
+    __slots__ = ('isbn', 'title', 'sub_title', 'author', 'publish_date', 'publisher', 'pages', 'description',
+                 'website')
+
+    def __init__(self, isbn, title=None, sub_title=None, author=None, publish_date=None, publisher=None, pages=None,
+                 description=None, website=None):
+        self.isbn = isbn
+        self.title = title
+        self.sub_title = sub_title
+        self.author = author
+        self.publish_date = publish_date
+        self.publisher = publisher
+        self.pages = pages
+        self.description = description
+        self.website = website
+
+    @classmethod
+    def from_dict(cls, book):
+        """
+        Build a book from its JSON object
+        :param      book:   Decoded book as returned by the API
+        :return:    book:   Book
+        """
+        get = book.get
+        return cls(get("isbn"), get("title"), get("subTitle"), get("author"), get("publish_date"),
+                   get("publisher"), get("pages"), get("description"), get("website"))
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        Decode a GET /BookStore/v1/Book response
+        :param      response:   Response message
+        :return:    book:       Book, or None if the response is not a success
+        """
+        return cls.from_dict(loads(response.content)) if response.ok else None
+
+    def __eq__(self, other):
+        return isinstance(other, Book) and all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self):
+        return hash(self.isbn)
+
+    def __repr__(self):
+        return f'Book({self.isbn!r}, {self.title!r})'
+
+
+class _Books:
+    """
+    List of books decoded from JSON, turned into Book objects only when they are asked for
+    """
+
+    __slots__ = ('_raw', '_books')
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._books = None
+
+    @property
+    def books(self):
+        """
+        Books as Book objects, built on first access
+        """
+        if self._books is None:
+            self._books = [Book.from_dict(book) for book in self._raw]
+            self._raw = None
+        return self._books
+
+    @property
+    def isbns(self):
+        """
+        Isbns of the books in order, without building Book objects
+        """
+        if self._books is not None:
+            return [book.isbn for book in self._books]
+        return [book["isbn"] for book in self._raw]
+
+    def __len__(self):
+        return len(self._books if self._books is not None else self._raw)
+
+    def __iter__(self):
+        return iter(self.books)
+
+    def __contains__(self, isbn):
+        return isbn in self.isbns
+
+
+class Catalog(_Books):
+    """
+    Books of the store, decoded from the raw body of GET /BookStore/v1/Books only when first used
+    """
+
+    __slots__ = ('_content',)
+
+    def __init__(self, content):
+        """
+        :param      content:    Raw JSON body of the catalog
+        """
+        super().__init__(None)
+        self._content = content
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        Wrap a GET /BookStore/v1/Books response
+        :param      response:   Response message
+        :return:    catalog:    Catalog, or None if the response is not a success
+        """
+        return cls(response.content) if response.ok else None
+
+    def _decode(self):
+        if self._raw is None and self._books is None:
+            self._raw = loads(self._content)["books"]
+            self._content = None
+
+    @property
+    def books(self):
+        self._decode()
+        return super().books
+
+    @property
+    def isbns(self):
+        self._decode()
+        return super().isbns
+
+    def __len__(self):
+        self._decode()
+        return super().__len__()
+
+
+class User(_Books):
+    """
+    User with its collection, as returned by GET /Account/v1/User/{userId} and PUT /BookStore/v1/Books/{isbn}
+    """
+
+    __slots__ = ('user_id', 'username')
+
+    def __init__(self, user_id, username, books=()):
+        """
+        :param      user_id:    UserId of the user
+        :param      username:   Username of the user
+        :param      books:      Decoded books of its collection
+        """
+        super().__init__(books)
+        self.user_id = user_id
+        self.username = username
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        Decode a response describing a user
+        :param      response:   Response message
+        :return:    user:       User, or None if the response is not a success
+        """
+        if not response.ok:
+            return None
+        user = loads(response.content)
+        return cls(user.get("userId") or user.get("userID"), user.get("username"), user.get("books") or [])
+
+    def __repr__(self):
+        return f'User({self.user_id!r}, {self.username!r}, {len(self)} books)'
+
+
+class Token:
+    """
+    Result of POST /Account/v1/GenerateToken
+    """
+
+    __slots__ = ('token', 'expires', 'status', 'result')
+
+    def __init__(self, token, expires=None, status=None, result=None):
+        """
+        :param      token:      Bearer token, None if none was issued
+        :param      expires:    Expiry date as sent by the API
+        :param      status:     'Success' or 'Failed'
+        :param      result:     Message of the API
+        """
+        self.token = token
+        self.expires = expires
+        self.status = status
+        self.result = result
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        Decode a GenerateToken response
+        :param      response:   Response message
+        :return:    token:      Token, or None if the response is not a success
+        """
+        if not response.ok:
+            return None
+        token = loads(response.content)
+        return cls(token.get("token"), token.get("expires"), token.get("status"), token.get("result"))
+
+    @property
+    def expires_at(self):
+        """
+        Expiry date in seconds since the epoch, None if unknown
+        """
+        return parse_expires(self.expires)
+
+    def __bool__(self):
+        return self.token is not None
+
+    def __repr__(self):
+        return f'Token(status={self.status!r}, expires={self.expires!r})'
@@ -0,0 +1,308 @@
+import logging
+import socket
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+from urllib3.poolmanager import PoolManager
+from urllib3.util.ssl_ import is_ipaddress
+from urllib3.util.wait import wait_for_read
+
+log = logging.getLogger('bookstore.prewarm')
+
+
+def _missing_internals():
+    """
+    Private urllib3 and ssl internals the hooks of this module rely on, checked as they may change in any release
+    :return:    missing:    Names of the internals this environment lacks, empty if the hooks can be installed
+    """
+    required = [
+        ('HTTPConnection._dns_host', hasattr(HTTPConnection('localhost'), '_dns_host')),
+        ('HTTPConnection._new_conn', hasattr(HTTPConnection, '_new_conn')),
+        ('HTTPConnectionPool._get_conn', hasattr(HTTPConnectionPool, '_get_conn')),
+        ('HTTPConnectionPool._put_conn', hasattr(HTTPConnectionPool, '_put_conn')),
+        ('PoolManager.pool_classes_by_scheme', hasattr(PoolManager(), 'pool_classes_by_scheme')),
+        ('SSLContext.sslsocket_class', hasattr(ssl.SSLContext, 'sslsocket_class')),
+        ('SSLSocket._real_close', hasattr(ssl.SSLSocket, '_real_close')),
+    ]
+    return [name for name, present in required if not present]
+
+
+_MISSING_INTERNALS = _missing_internals()
+
+
+class DNSCache:
+    """
+    Addresses of hosts kept for a time to live instead of being resolved for every new connection.
+
+    An address that refuses a connection is tried after the others, and a host
+    none of whose addresses connect is resolved again by the next connection.
+    """
+
+    def __init__(self, ttl=300):
+        """
+        :param      ttl:    Seconds the addresses of a host are kept
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host, port):
+        """
+        :param      host:       Host name
+        :param      port:       Port to connect to
+        :return:    addresses:  IP addresses of the host, in the order getaddrinfo returned them
+        """
+        key = (host, port)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        addresses = list(dict.fromkeys(info[4][0] for info in socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)))
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+
+    def invalidate(self, host, port):
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+class _CachedDNSConnectionMixin:
+    dns_cache = None
+
+    def _new_conn(self):
+        host = self._dns_host
+        if self.dns_cache is None or is_ipaddress(host.strip('[]')):
+            return super()._new_conn()
+
+        error = None
+        try:
+            for address in self.dns_cache.resolve(host, self.port):
+                # The host property follows _dns_host, restore it before TLS picks its server_hostname
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except NewConnectionError as failure:
+                    error = failure
+                finally:
+                    self._dns_host = host
+        except socket.gaierror:
+            return super()._new_conn()
+        self.dns_cache.invalidate(host, self.port)
+        raise error
+
+
+class _SessionSocket(ssl.SSLSocket):
+    session_key = None
+
+    def _real_close(self):
+        # TLS 1.3 tickets arrive after the handshake, keep the latest one of the connection
+        if self.session_key is not None and getattr(self, '_sslobj', None) is not None:
+            self.context.keep(self.session_key, self.session)
+        super()._real_close()
+
+
+class TLSSessionContext(ssl.SSLContext):
+    """
+    Client SSLContext resuming the TLS session of the previous connection to a host.
+
+    Connections recreated by the pool skip the full handshake and certificate
+    exchange when the server accepts the session, which most do for a few hours.
+    No CA is trusted until urllib3 loads the bundle of the pool, and a context
+    must only be shared by pools with the same verification settings.
+    """
+
+    def __new__(cls, verify=True):
+        return super().__new__(cls, ssl.PROTOCOL_TLS_CLIENT)
+
+    def __init__(self, verify=True):
+        """
+        :param      verify:     Verify the certificate and host name of the server
+        """
+        super().__init__()
+        self.minimum_version = ssl.TLSVersion.TLSv1_2
+        if not verify:
+            self.check_hostname = False
+            self.verify_mode = ssl.CERT_NONE
+        self.sslsocket_class = _SessionSocket
+        self.resumed = 0
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+
+    def keep(self, key, session):
+        """
+        Remember the session of a connection for the next one to its host
+        :param      key:        (server hostname, port) of the connection
+        :param      session:    SSLSession of the connection, ignored if None
+        """
+        if session is not None:
+            with self._sessions_lock:
+                self._sessions[key] = session
+
+    def wrap_socket(self, sock, server_side=False, do_handshake_on_connect=True, suppress_ragged_eofs=True,
+                    server_hostname=None, session=None):
+        key = None
+        if server_hostname is not None and not server_side:
+            key = (server_hostname, sock.getpeername()[1])
+            if session is None:
+                with self._sessions_lock:
+                    session = self._sessions.get(key)
+        wrapped = super().wrap_socket(sock, server_side=server_side, do_handshake_on_connect=do_handshake_on_connect,
+                                      suppress_ragged_eofs=suppress_ragged_eofs, server_hostname=server_hostname,
+                                      session=session)
+        if session is not None and wrapped.session_reused:
+            self.resumed += 1
+        if key is not None:
+            wrapped.session_key = key
+            self.keep(key, wrapped.session)
+        return wrapped
+
+
+def _read_session_tickets(sock, timeout=1.0):
+    """
+    Read the session tickets a TLS 1.3 server sends after the handshake.
+
+    urllib3 takes an idle connection with data to read for one the server
+    closed, and would replace a prewarmed connection whose tickets are unread.
+    :param      sock:       SSLSocket connected without sending a request
+    :param      timeout:    Seconds to wait for the first ticket
+    :return:    alive:      False if the server closed the connection or sent anything but tickets
+    """
+    if sock.version() != 'TLSv1.3':
+        return True
+    previous = sock.gettimeout()
+    sock.settimeout(0)
+    try:
+        while wait_for_read(sock, timeout=timeout):
+            timeout = 0.01
+            try:
+                sock.recv(1)
+            except ssl.SSLWantReadError:
+                continue
+            return False
+    finally:
+        sock.settimeout(previous)
+    if isinstance(sock, _SessionSocket) and sock.session_key is not None:
+        sock.context.keep(sock.session_key, sock.session)
+    return True
+
+
+class PrewarmedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter caching DNS results, resuming TLS sessions and opening connections ahead of the first request.
+
+    prewarm() connects, resolves and handshakes pooled connections to a host
+    without sending any request, so the first calls of a run are as fast as
+    the following ones. Connections the pool recreates later resolve their host
+    from the DNS cache and resume the TLS session of the previous connection.
+    These hooks rely on urllib3 and ssl internals; should a release lack them,
+    the adapter logs a warning and works as a plain HTTPAdapter, prewarm() then
+    opening no connection.
+    """
+
+    def __init__(self, dns_ttl=300, tls_sessions=True, **kwargs):
+        """
+        :param      dns_ttl:        Seconds host addresses are cached, None to resolve for every connection
+        :param      tls_sessions:   Resume the TLS session of the previous connection to a host
+        :param      kwargs:         Arguments of HTTPAdapter
+        """
+        self.hooks = not _MISSING_INTERNALS
+        if not self.hooks:
+            log.warning("urllib3 %s lacks %s, connections are opened without prewarming, DNS caching and TLS session "
+                        "resumption", urllib3.__version__, ', '.join(_MISSING_INTERNALS))
+        self.dns_cache = DNSCache(dns_ttl) if dns_ttl is not None and self.hooks else None
+        self.tls_sessions = tls_sessions and self.hooks
+        self.ssl_contexts = {}
+        self._ssl_contexts_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    @property
+    def resumed(self):
+        """
+        :return:    resumed:    Number of TLS sessions resumed by the connections of the adapter
+        """
+        return sum(context.resumed for context in list(self.ssl_contexts.values()))
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        """
+        Give the https pools a TLSSessionContext of their own verification and client certificate settings
+        """
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        if self.tls_sessions and host_params['scheme'] == 'https':
+            key = tuple(sorted(pool_kwargs.items()))
+            with self._ssl_contexts_lock:
+                context = self.ssl_contexts.get(key)
+                if context is None:
+                    context = self.ssl_contexts[key] = TLSSessionContext(
+                        verify=pool_kwargs.get('cert_reqs') != 'CERT_NONE')
+            pool_kwargs['ssl_context'] = context
+        return host_params, pool_kwargs
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        if not self.hooks:
+            return
+        attributes = {'dns_cache': self.dns_cache}
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': type('HTTPConnectionPool', (HTTPConnectionPool,), {'ConnectionCls': type(
+                'HTTPConnection', (_CachedDNSConnectionMixin, HTTPConnection), attributes)}),
+            'https': type('HTTPSConnectionPool', (HTTPSConnectionPool,), {'ConnectionCls': type(
+                'HTTPSConnection', (_CachedDNSConnectionMixin, HTTPSConnection), attributes)})
+        }
+
+    def prewarm(self, url, connections, verify=True, cert=None, proxies=None, timeout=30):
+        """
+        Open connections to a host and keep them in the pool for the next requests.
+
+        verify, cert and proxies select the pool the connections are put in and
+        must be those the requests will be sent with, as merged by the session.
+        :param      url:            URL of the host, e.g. https://demoqa.com
+        :param      connections:    Number of connections to have open, at most the pool size
+        :param      verify:         Certificate verification of the requests
+        :param      cert:           Client certificate of the requests
+        :param      proxies:        Proxies of the requests
+        :param      timeout:        Connect timeout of each connection in seconds
+        :return:    opened:         Number of connections opened, 0 without the urllib3 internals it needs
+        """
+        if not self.hooks:
+            return 0
+        request =  requests.Request('GET', url).prepare()
+        if hasattr(self, 'get_connection_with_tls_context'):
+            pool = self.get_connection_with_tls_context(request, verify, proxies, cert)
+        else:
+            pool = self.get_connection(url, proxies)
+        self.cert_verify(pool, url, verify, cert)
+
+        held = [pool._get_conn() for _ in range(min(connections, self._pool_maxsize))]
+        idle = [connection for connection in held if connection.sock is None]
+
+        def connect(connection):
+            connection.timeout = timeout
+            try:
+                connection.connect()
+                if isinstance(connection.sock, ssl.SSLSocket) and not _read_session_tickets(connection.sock):
+                    connection.close()
+                    return False
+                return True
+            except (OSError, ssl.SSLError) as error:
+                log.warning("Prewarming a connection to %s failed: %s", url, error)
+                connection.close()
+                return False
+
+        with ThreadPoolExecutor(max_workers=len(idle) or 1, thread_name_prefix='prewarm') as executor:
+            opened = sum(executor.map(connect, idle))
+        for connection in held:
+            pool._put_conn(connection)
+        return opened
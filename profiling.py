@@ -0,0 +1,292 @@
+import atexit
+import contextlib
+import cProfile
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+from collections import Counter
+
+PROFILE_MODES = ('sample', 'cprofile')
+DEFAULT_DIRECTORY = 'profiles'
+
+# From Python 3.12 cProfile hooks sys.monitoring, which sees every thread and allows a single profiler at a time
+_PROFILER_PER_THREAD = sys.version_info < (3, 12)
+
+log = logging.getLogger('bookstore.profiling')
+
+_NO_PROFILE = contextlib.nullcontext()
+_profiler = None
+
+
+def _frame_name(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _file_name(name):
+    return re.sub(r'[^\w.-]', '_', name)
+
+
+def write_collapsed(counts, path):
+    """
+    Write stacks in the collapsed format of flamegraph.pl and speedscope, one 'frame;frame;frame count' per line
+    :param      counts:     Counter of collapsed stacks to sample counts
+    :param      path:       File to write
+    """
+    with open(path, 'w', encoding='utf-8') as file:
+        for stack, count in sorted(counts.items()):
+            file.write(f"{stack} {count}\n")
+
+
+class StackSampler:
+    """
+    Sampling profiler taking the stacks of watched threads at a fixed interval.
+
+    A background thread reads the frames of the watched threads every interval
+    seconds and counts each stack, rooted at the label the thread is watched
+    under. Only the threads running a test or a client call are watched, so
+    idle pool and logging threads do not fill the profile. The overhead is one
+    stack walk per watched thread and sample, whatever the code does.
+    """
+
+    def __init__(self, interval=0.005):
+        """
+        :param      interval:   Seconds between two samples
+        """
+        self.interval = interval
+        self.counts = Counter()
+        self.current = Counter()
+        self.samples = 0
+
+        self._watched = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def watch(self, ident, label):
+        """
+        Sample a thread until unwatch
+        :param      ident:  threading.get_ident() of the thread
+        :param      label:  Root frame of its stacks, e.g. the id of the running test
+        """
+        with self._lock:
+            self._watched[ident] = label
+
+    def unwatch(self, ident):
+        with self._lock:
+            self._watched.pop(ident, None)
+
+    def is_watched(self, ident):
+        return ident in self._watched
+
+    def take(self):
+        """
+        Stacks counted since the previous take
+        :return:    counts:     Counter of collapsed stacks
+        """
+        with self._lock:
+            counts, self.current = self.current, Counter()
+        return counts
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, label in self._watched.items():
+                    frame = frames.get(ident)
+                    if frame is None:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(_frame_name(frame.f_code))
+                        frame = frame.f_back
+                    stack.append(label)
+                    key = ';'.join(reversed(stack))
+                    self.counts[key] += 1
+                    self.current[key] += 1
+                    self.samples += 1
+            del frames
+
+
+class Profiler:
+    """
+    Profiles of the test methods and the client calls they make.
+
+    In both modes a StackSampler writes the stacks of each test to
+    <test id>.collapsed and the stacks of the whole run to all.collapsed. In
+    'cprofile' mode every test also runs under cProfile, written to
+    <test id>.prof and merged into all.prof for pstats or snakeviz. Client calls
+    made from other threads, e.g. by a fixture graph, are profiled with the test
+    that is running: by a profiler of their own before Python 3.12, and by the
+    profiler of the test, which sees every thread, from 3.12 on. When cProfile
+    cannot be enabled, e.g. under another profiling tool, the test is only
+    sampled.
+    """
+
+    def __init__(self, mode='sample', directory=DEFAULT_DIRECTORY, interval=0.005):
+        """
+        :param      mode:       'sample' for the stack sampler only, 'cprofile' to add deterministic profiles
+        :param      directory:  Directory the profiles are written to, created if missing
+        :param      interval:   Seconds between two stack samples
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}, expected one of {PROFILE_MODES}")
+        self.mode = mode
+        self.directory = directory
+        self.sampler = StackSampler(interval)
+        self.test = None
+
+        self._test_thread = None
+        self._profiles = []
+        self._stats = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.sampler.start()
+
+    def begin_test(self, name):
+        """
+        Start profiling a test in the current thread
+        :param      name:   Test id, e.g. test_valid_user.Test.test_add_new_book
+        """
+        self.test = name
+        self._test_thread = threading.get_ident()
+        self.sampler.take()
+        self.sampler.watch(self._test_thread, name)
+        self._profiles = []
+        if self.mode == 'cprofile':
+            profile = self._enable_profile()
+            if profile is not None:
+                self._profiles.append(profile)
+
+    @staticmethod
+    def _enable_profile():
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as error:
+            log.warning("cProfile unavailable, sampling only: %s", error)
+            return None
+        return profile
+
+    def end_test(self):
+        """
+        Stop profiling the current test and write its profiles
+        """
+        if self.test is None:
+            return
+        self.sampler.unwatch(self._test_thread)
+        base = os.path.join(self.directory, _file_name(self.test))
+        write_collapsed(self.sampler.take(), base + '.collapsed')
+
+        with self._lock:
+            profiles, self._profiles = self._profiles, []
+        if profiles:
+            profiles[0].disable()
+            stats = pstats.Stats(*profiles)
+            stats.dump_stats(base + '.prof')
+            if self._stats is None:
+                self._stats = stats
+            else:
+                self._stats.add(stats)
+        self.test = None
+
+    @contextlib.contextmanager
+    def call(self):
+        """
+        Profile a client call made outside the test thread along with the running test
+        """
+        ident = threading.get_ident()
+        test = self.test
+        if test is None or self.sampler.is_watched(ident):
+            yield
+            return
+
+        profile = None
+        if self.mode == 'cprofile' and _PROFILER_PER_THREAD:
+            profile = self._enable_profile()
+        self.sampler.watch(ident, test)
+        try:
+            yield
+        finally:
+            self.sampler.unwatch(ident)
+            if profile is not None:
+                profile.disable()
+                with self._lock:
+                    if self.test == test:
+                        self._profiles.append(profile)
+
+    def close(self):
+        """
+        Stop sampling and write the profiles of the whole run
+        """
+        self.end_test()
+        self.sampler.stop()
+        write_collapsed(self.sampler.counts, os.path.join(self.directory, 'all.collapsed'))
+        if self._stats is not None:
+            self._stats.dump_stats(os.path.join(self.directory, 'all.prof'))
+
+
+def enable_profiling(mode='sample', directory=DEFAULT_DIRECTORY, interval=0.005):
+    """
+    Profile the tests and client calls of this process from now on
+    :param      mode:       'sample' or 'cprofile'
+    :param      directory:  Directory the profiles are written to
+    :param      interval:   Seconds between two stack samples
+    :return:    profiler:   Profiler, closed at exit or by disable_profiling()
+    """
+    global _profiler
+    disable_profiling()
+    _profiler = Profiler(mode, directory, interval)
+    return _profiler
+
+
+def disable_profiling():
+    """
+    Stop profiling and write the profiles of the whole run, if profiling is enabled
+    """
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.close()
+
+
+def profile_test(test):
+    """
+    Profile a test method until it finishes, if profiling is enabled. Call from setUp.
+    :param      test:   The unittest.TestCase running
+    """
+    if _profiler is not None:
+        _profiler.begin_test(test.id())
+        test.addCleanup(_profiler.end_test)
+
+
+def profile_call():
+    """
+    Context manager wrapping a client call, a shared no-op unless profiling is enabled
+    :return:    context:    Context manager
+    """
+    if _profiler is None:
+        return _NO_PROFILE
+    return _profiler.call()
+
+
+atexit.register(disable_profiling)
+
+
+if os.environ.get('BOOKSTORE_PROFILE'):
+    _mode = os.environ['BOOKSTORE_PROFILE']
+    enable_profiling('sample' if _mode in ('1', 'sample') else _mode,
+                     os.environ.get('BOOKSTORE_PROFILE_DIR') or DEFAULT_DIRECTORY,
+                     float(os.environ.get('BOOKSTORE_PROFILE_INTERVAL_MS') or 5) / 1000)
@@ -0,0 +1,132 @@
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from main import get_default_client
+
+ProvisionedUser = namedtuple('ProvisionedUser', ['username', 'password', 'user_id', 'token', 'expires'])
+
+
+class ProvisioningError(Exception):
+    """
+    Raised after provisioning when some users could not be registered or authorized
+    """
+
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__(f"{len(failures)} user(s) could not be provisioned, "
+                         f"rerun with the same manifest to resume: {sorted(failures)[:5]}")
+
+
+def load_manifest(path):
+    """
+    Load the users written to a provisioning manifest
+    :param      path:   Manifest written by provision_users
+    :return:    users:  Dict of username to ProvisionedUser, the last record of a user wins
+    """
+    users = {}
+    if not path or not os.path.exists(path):
+        return users
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash, the user is provisioned again
+                continue
+            users[record["username"]] = ProvisionedUser(**record)
+    return users
+
+
+def _provision(client, username, password, known):
+    """
+    Register a user unless already known and generate its token
+    :return:    user:   ProvisionedUser, with token None if no token could be generated
+    """
+    user_id = known.user_id if known else None
+
+    if not user_id:
+        response = client.create_new_user(username, password)
+        if response.status_code == 201:
+            user_id = response.json()["userID"]
+        elif response.status_code == 406:
+            # Registered by a run that died before writing the manifest
+            response = client.login(username, password)
+            if response.status_code != 200:
+                raise RuntimeError(f"Could not recover user {username}: {response.status_code}")
+            user_id = response.json()["userId"]
+        else:
+            raise RuntimeError(f"Could not register user {username}: {response.status_code} {response.text}")
+
+    response = client.generate_token(username, password)
+    message = response.json() if response.status_code == 200 else {}
+    return ProvisionedUser(username, password, user_id, message.get("token"), message.get("expires"))
+
+
+def provision_users(n, name_template, password, client=None, workers=16, manifest_path=None):
+    """
+    Register n users and generate their tokens concurrently
+
+    Users already completed in the manifest are yielded first without any request.
+    Every other user is written to the manifest as soon as its result arrives,
+    so a run that fails part way can be resumed by calling again with the same manifest.
+
+    :param      n:              Number of users to provision
+    :param      name_template:  Format string for usernames, formatted with the user index, e.g. 'loadUser{:05d}'
+    :param      password:       Password of all users
+    :param      client:         BookStoreClient to use, the default client if None; its pool_maxsize
+                                should be at least workers for every worker to keep its connection
+    :param      workers:        Number of users provisioned in parallel
+    :param      manifest_path:  JSON lines file to record provisioned users in
+    :return:    users:          Generator of ProvisionedUser, in order of completion
+    """
+    client = client or get_default_client()
+    known = load_manifest(manifest_path)
+    usernames = [name_template.format(index) for index in range(n)]
+
+    pending = []
+    for username in usernames:
+        user = known.get(username)
+        if user is not None and user.user_id and user.token and user.password == password:
+            yield user
+        else:
+            pending.append(username)
+
+    if not pending:
+        return
+
+    manifest = open(manifest_path, 'a', encoding='utf-8') if manifest_path else None
+    failures = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='provision') as executor:
+            futures = {executor.submit(_provision, client, username, password, known.get(username)): username
+                       for username in pending}
+            try:
+                for future in as_completed(futures):
+                    username = futures[future]
+                    try:
+                        user = future.result()
+                    except Exception as error:
+                        failures[username] = error
+                        continue
+
+                    if manifest is not None:
+                        manifest.write(json.dumps(user._asdict()) + '\n')
+                        manifest.flush()
+
+                    if user.token is None:
+                        failures[username] = RuntimeError(f"Could not generate a token for {username}")
+                        continue
+                    yield user
+            finally:
+                # Stop queued users when the caller stops consuming early
+                for future in futures:
+                    future.cancel()
+    finally:
+        if manifest is not None:
+            manifest.close()
+
+    if failures:
+        raise ProvisioningError(failures)
+
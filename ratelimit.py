@@ -0,0 +1,152 @@
+import multiprocessing
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Statuses a server answers with when it is throttling its clients
+THROTTLED = frozenset([429, 503])
+
+# Slots of the limiter state, kept in one array so that it can live in shared memory
+_RATE, _TOKENS, _UPDATED, _DECREASED_AT, _THROTTLED = range(5)
+
+# Own generator, so retry jitter does not disturb seeded random picks
+_random = random.Random()
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header
+    :param      value:      Header value, delay-seconds or an HTTP date, may be None
+    :return:    seconds:    Seconds to wait, None if there is no usable value
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def retry_delay(attempt, retry_after=None, base=0.1, cap=5.0):
+    """
+    Delay before retrying a throttled request, with full jitter
+    :param      attempt:        Number of retries already made
+    :param      retry_after:    Seconds the server asked to wait, None if it did not say
+    :param      base:           Upper bound of the delay of the first retry
+    :param      cap:            Upper bound of any delay the server did not ask for
+    :return:    seconds:        Seconds to sleep
+    """
+    if retry_after is not None:
+        return retry_after + _random.uniform(0, base)
+    return _random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket pacing requests, with a rate adapted to throttling AIMD-style.
+
+    Every request takes a token; tokens accrue at the current rate up to burst.
+    Until the first throttled response (slow start), each response that is not
+    throttled raises the rate by one request per second, doubling it for every
+    second of traffic. After that the rate is raised additively, by about
+    increase requests per second for every second of traffic. A 429 or 503
+    multiplies it by decrease, at most once per cooldown so that a burst of
+    throttled responses counts as one signal. A Retry-After pauses the bucket
+    until the server asked to be contacted again.
+
+    One limiter is shared by all threads using a client. With shared=True its
+    state lives in shared memory, so processes started with multiprocessing
+    after it was created share the same rate when it is passed to them.
+    """
+
+    def __init__(self, rate=10, min_rate=1, max_rate=1000, burst=10, increase=1, decrease=0.5, cooldown=1.0,
+                 slow_start=True, shared=False):
+        """
+        :param      rate:       Initial rate in requests per second
+        :param      min_rate:   Lowest rate the limiter backs off to
+        :param      max_rate:   Highest rate the limiter ramps up to
+        :param      burst:      Tokens that can be saved up while idle
+        :param      increase:   Requests per second added for every second of unthrottled traffic
+        :param      decrease:   Factor the rate is multiplied by on throttling
+        :param      cooldown:   Seconds after a decrease during which further throttling is ignored
+        :param      slow_start: Double the rate every second until the first throttled response
+        :param      shared:     Keep the state in shared memory for use by several processes
+        """
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.slow_start = slow_start
+
+        initial = [float(rate), float(burst), time.monotonic(), 0.0, 0.0]
+        if shared:
+            self._state = multiprocessing.Array('d', initial, lock=False)
+            self._lock = multiprocessing.Lock()
+        else:
+            self._state = initial
+            self._lock = threading.Lock()
+
+    @property
+    def rate(self):
+        return self._state[_RATE]
+
+    @property
+    def throttled(self):
+        """
+        Number of throttled responses seen
+        """
+        return int(self._state[_THROTTLED])
+
+    def _refill(self, now):
+        state = self._state
+        if now > state[_UPDATED]:
+            state[_TOKENS] = min(self.burst, state[_TOKENS] + (now - state[_UPDATED]) * state[_RATE])
+            state[_UPDATED] = now
+
+    def acquire(self):
+        """
+        Take a token, waiting until one is available
+        :return:    seconds:    Time spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            state = self._state
+            state[_TOKENS] -= 1
+            # Tokens below zero are reserved by earlier callers that are still waiting
+            wait = max(state[_UPDATED] - now, 0.0) + max(-state[_TOKENS], 0.0) / state[_RATE]
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def on_response(self, status, retry_after=None):
+        """
+        Adapt the rate to the outcome of a request
+        :param      status:         Status code of the response
+        :param      retry_after:    Seconds from its Retry-After header, None if it had none
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            state = self._state
+            if status not in THROTTLED:
+                if self.slow_start and not state[_THROTTLED]:
+                    state[_RATE] = min(self.max_rate, state[_RATE] + 1)
+                else:
+                    state[_RATE] = min(self.max_rate, state[_RATE] + self.increase / state[_RATE])
+                return
+
+            state[_THROTTLED] += 1
+            if now - state[_DECREASED_AT] >= self.cooldown:
+                state[_RATE] = max(self.min_rate, state[_RATE] * self.decrease)
+                state[_DECREASED_AT] = now
+            state[_TOKENS] = min(state[_TOKENS], 0.0)
+            if retry_after:
+                state[_UPDATED] = max(state[_UPDATED], now + retry_after)
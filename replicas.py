@@ -0,0 +1,184 @@
+import itertools
+import threading
+import time
+
+import requests
+
+POLICIES = ('round_robin', 'least_outstanding', 'ewma')
+
+
+class Replica:
+    """
+    One BookStore base URL of a ReplicaPool and what the pool knows about it
+    """
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ewma = None
+        self.ejected_until = None
+        self.probing = False
+
+    @property
+    def ejected(self):
+        return self.ejected_until is not None
+
+    def __repr__(self):
+        return f'Replica({self.url!r})'
+
+
+def probe_catalog(url, timeout=2):
+    """
+    Default health probe, fetching the catalog of a replica
+    :param      url:        Base URL of the replica
+    :param      timeout:    Seconds to wait for the answer
+    :return:    healthy:    True if the replica answered without a server error
+    """
+    try:
+        return requests.get(url + '/BookStore/v1/Books', timeout=timeout).status_code < 500
+    except requests.RequestException:
+        return False
+
+
+class ReplicaPool:
+    """
+    Several BookStore base URLs with load spread over them by a selection policy.
+
+    'round_robin' takes the replicas in turn, 'least_outstanding' the one with
+    the fewest requests in flight and 'ewma' the one with the lowest latency
+    average weighted by its requests in flight. Users and their tokens only exist
+    on the replica that created them, so requests about them are pinned to it
+    with pin() and sent there by select() whatever the policy.
+
+    A replica failing eject_after requests in a row, with a connection error or
+    a 5xx, is ejected for eject_for seconds. Afterwards it is health-probed in
+    the background and taken back in if the probe succeeds, or ejected again.
+    Pinned requests still go to an ejected replica, the only one that knows
+    their user. If every replica is ejected, all of them are used.
+    """
+
+    def __init__(self, urls, policy='round_robin', eject_after=3, eject_for=30, decay=0.3, probe=probe_catalog):
+        """
+        :param      urls:           Base URLs of the replicas
+        :param      policy:         'round_robin', 'least_outstanding' or 'ewma'
+        :param      eject_after:    Consecutive failures after which a replica is ejected
+        :param      eject_for:      Seconds an ejected replica is left alone before it is probed
+        :param      decay:          Weight of the latest latency in the moving average of a replica
+        :param      probe:          Function taking a base URL and returning True if the replica is healthy
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy '{policy}', expected one of {', '.join(POLICIES)}")
+        self.replicas = [Replica(url) for url in urls]
+        if not self.replicas:
+            raise ValueError("A replica pool needs at least one URL")
+        self.policy = policy
+        self.eject_after = eject_after
+        self.eject_for = eject_for
+        self.decay = decay
+        self.probe = probe
+
+        self._by_url = {replica.url: replica for replica in self.replicas}
+        self._pins = {}
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def _available(self, now):
+        available = []
+        for replica in self.replicas:
+            if replica.ejected_until is None:
+                available.append(replica)
+            elif now >= replica.ejected_until and not replica.probing:
+                replica.probing = True
+                threading.Thread(target=self._probe, args=(replica,), name='replica-probe', daemon=True).start()
+        return available or self.replicas
+
+    def _probe(self, replica):
+        try:
+            healthy = self.probe(replica.url)
+        except Exception:
+            healthy = False
+        with self._lock:
+            replica.probing = False
+            if healthy:
+                replica.ejected_until = None
+                replica.consecutive_failures = 0
+            else:
+                replica.ejected_until = time.monotonic() + self.eject_for
+
+    def select(self, affinity=None):
+        """
+        Choose the replica for a request and count it as in flight
+        :param      affinity:   Key the request is about, e.g. a userId or token, None if any replica will do
+        :return:    replica:    Replica to send the request to, to be passed to finish() afterwards
+        """
+        with self._lock:
+            replica = self._pins.get(affinity) if affinity is not None else None
+            if replica is None:
+                available = self._available(time.monotonic())
+                turn = next(self._turn)
+                if self.policy == 'round_robin':
+                    replica = available[turn % len(available)]
+                else:
+                    # Start from a rotating position, so ties are spread over the replicas
+                    rotated = available[turn % len(available):] + available[:turn % len(available)]
+                    if self.policy == 'least_outstanding':
+                        replica = min(rotated, key=lambda candidate: candidate.outstanding)
+                    else:
+                        replica = min(rotated, key=lambda candidate: (candidate.ewma or 0.0)
+                                      * (candidate.outstanding + 1))
+            replica.outstanding += 1
+            replica.requests += 1
+            return replica
+
+    def finish(self, replica, seconds, failed=False):
+        """
+        Record the outcome of a request sent to a replica
+        :param      replica:    Replica returned by select()
+        :param      seconds:    Latency of the request
+        :param      failed:     True for a connection error or a server error
+        """
+        with self._lock:
+            replica.outstanding -= 1
+            if failed:
+                replica.failures += 1
+                replica.consecutive_failures += 1
+                if replica.consecutive_failures >= self.eject_after and replica.ejected_until is None:
+                    replica.ejected_until = time.monotonic() + self.eject_for
+                return
+            replica.consecutive_failures = 0
+            if replica.ewma is None:
+                replica.ewma = seconds
+            else:
+                replica.ewma += self.decay * (seconds - replica.ewma)
+
+    def pin(self, affinity, url):
+        """
+        Send the requests about a key to one replica from now on
+        :param      affinity:   Key such as a userId, a token or (username, password)
+        :param      url:        Base URL of the replica, or the URL of a response it sent
+        """
+        replica = self._by_url.get(url.rstrip('/'))
+        if replica is None:
+            replica = next((candidate for candidate in self.replicas if url.startswith(candidate.url + '/')), None)
+        if replica is not None:
+            with self._lock:
+                self._pins[affinity] = replica
+
+    def unpin(self, affinity):
+        """
+        Forget the replica of a key
+        :param      affinity:   Key passed to pin()
+        """
+        with self._lock:
+            self._pins.pop(affinity, None)
+
+    def replica_of(self, affinity):
+        """
+        Replica a key is pinned to
+        :param      affinity:   Key passed to pin()
+        :return:    replica:    Pinned Replica, None if the key is not pinned
+        """
+        return self._pins.get(affinity)
@@ -0,0 +1,150 @@
+import heapq
+import sqlite3
+import time
+from collections import namedtuple
+from statistics import median
+
+DEFAULT_HISTORY = 'bookstore_tests.sqlite'
+
+Result = namedtuple('Result', ['test_id', 'duration', 'outcome'])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    recorded_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test_id TEXT NOT NULL,
+    duration REAL NOT NULL,
+    outcome TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_by_test ON results (test_id, run_id);
+"""
+
+
+class DurationHistory:
+    """
+    SQLite history of the duration and outcome of every test of past runs.
+
+    Expected durations are the median of the last results of a test, so one
+    slow run against a struggling backend does not reorder the suite. A test is
+    recently failing while one of its last results is a failure. Only the last
+    keep results of a test are stored, older ones are deleted on every record.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY, window=5, keep=20):
+        """
+        :param      path:   Database file, created if it does not exist
+        :param      window: Number of last results of a test its duration and failures are taken from
+        :param      keep:   Number of last results of a test kept in the database, at least window
+        """
+        self.path = path
+        self.window = window
+        self.keep = max(keep, window)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, results):
+        """
+        Store the results of a test run
+        :param      results:    Iterable of Result, outcome one of 'passed', 'failed' or 'skipped'
+        :return:    run_id:     Id of the stored run
+        """
+        with self.connection:
+            run_id = self.connection.execute('INSERT INTO runs (recorded_at) VALUES (?)', (time.time(),)).lastrowid
+            self.connection.executemany('INSERT INTO results VALUES (?, ?, ?, ?)',
+                                        [(run_id, *result) for result in results])
+            self.connection.execute(
+                'DELETE FROM results WHERE run_id < (SELECT newer.run_id FROM results AS newer '
+                'WHERE newer.test_id = results.test_id ORDER BY newer.run_id DESC LIMIT 1 OFFSET ?)', (self.keep - 1,))
+            self.connection.execute('DELETE FROM runs WHERE id NOT IN (SELECT run_id FROM results)')
+        return run_id
+
+    def _latest(self):
+        latest = {}
+        rows = self.connection.execute(
+            "SELECT test_id, run_id, duration, outcome FROM results WHERE outcome != 'skipped' "
+            "ORDER BY run_id DESC")
+        for test_id, run_id, duration, outcome in rows:
+            results = latest.setdefault(test_id, [])
+            if len(results) < self.window:
+                results.append((run_id, duration, outcome))
+        return latest
+
+    def durations(self):
+        """
+        :return:    durations:  Expected seconds of every test with a result, skipped runs left out
+        """
+        return {test_id: median(duration for _, duration, _ in results)
+                for test_id, results in self._latest().items()}
+
+    def failures(self):
+        """
+        :return:    failures:   Id of the last failing run of every recently failing test
+        """
+        return {test_id: max(run_id for run_id, _, outcome in results if outcome == 'failed')
+                for test_id, results in self._latest().items()
+                if any(outcome == 'failed' for _, _, outcome in results)}
+
+
+def schedule(tests, durations, failures=None, group=None):
+    """
+    Order tests to surface failures early and to balance parallel workers.
+
+    Groups with a recently failing test run first, latest failure first and
+    then shortest first, so a broken backend fails the run within seconds.
+    The other groups follow longest first, the longest-processing-time order
+    that keeps the last worker of a parallel run from finishing long after the
+    others. The tests of a group keep their collection order, as they may build
+    on each other. Tests without history are expected to take the median
+    duration.
+    :param      tests:      Test ids in collection order
+    :param      durations:  Expected seconds of tests, as from DurationHistory.durations()
+    :param      failures:   Last failing run of recently failing tests, as from DurationHistory.failures()
+    :param      group:      Function of a test id to the group it runs with, e.g. its class sharing a setUpClass,
+                            every test on its own if None
+    :return:    tests:      Test ids in run order
+    """
+    failures = failures or {}
+    default = median(durations.values()) if durations else 0.0
+    groups = {}
+    for test in tests:
+        groups.setdefault(group(test) if group else test, []).append(test)
+
+    def group_key(members):
+        duration = sum(durations.get(test, default) for test in members)
+        failed = max((failures[test] for test in members if test in failures), default=None)
+        if failed is None:
+            return 1, 0, -duration
+        return 0, -failed, duration
+
+    ordered = sorted(groups.values(), key=group_key)
+    return [test for members in ordered for test in members]
+
+
+def partition(tests, durations, workers):
+    """
+    Assign tests to workers in longest-processing-time order, each to the least loaded worker
+    :param      tests:      Test ids
+    :param      durations:  Expected seconds of tests, tests without one count as the median
+    :param      workers:    Number of workers
+    :return:    assignment: (tests of each worker, expected makespan in seconds)
+    """
+    default = median(durations.values()) if durations else 0.0
+    loads = [(0.0, worker) for worker in range(workers)]
+    assigned = [[] for _ in range(workers)]
+    for test in sorted(tests, key=lambda test: -durations.get(test, default)):
+        load, worker = heapq.heappop(loads)
+        assigned[worker].append(test)
+        heapq.heappush(loads, (load + durations.get(test, default), worker))
+    return assigned, max(load for load, _ in loads)
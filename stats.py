@@ -0,0 +1,234 @@
+import atexit
+import json
+import os
+import threading
+import time
+import weakref
+
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+
+def _bucket_index(value):
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (value >> shift) - SUB_BUCKET_HALF
+
+
+def _bucket_bounds(index):
+    if index < SUB_BUCKET_COUNT:
+        return index, index
+    shift, offset = divmod(index - SUB_BUCKET_COUNT, SUB_BUCKET_HALF)
+    shift += 1
+    mantissa = offset + SUB_BUCKET_HALF
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    Log-linear (HDR-style) histogram of latencies in microseconds.
+
+    Values below 128us are counted exactly; above that every power of two is
+    split into 64 linear buckets, so any recorded value is known within 1.6%.
+    Buckets are allocated as the largest value grows, up to about 1800 counters
+    for an hour, whatever the number of recorded values.
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = []
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, microseconds):
+        """
+        Record a latency
+        :param      microseconds:   Latency in whole microseconds
+        """
+        value = max(int(microseconds), 0)
+        index = _bucket_index(value)
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def record_seconds(self, seconds):
+        """
+        Record a latency measured in seconds
+        :param      seconds:    Latency in seconds
+        """
+        self.record(seconds * 1000000)
+
+    def merge(self, other):
+        """
+        Add the values recorded by another histogram
+        :param      other:  LatencyHistogram to add
+        """
+        if not other.count:
+            return
+        counts = list(other.counts)
+        if len(counts) > len(self.counts):
+            self.counts.extend([0] * (len(counts) - len(self.counts)))
+        for index, count in enumerate(counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        if self.min is None or (other.min is not None and other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction):
+        """
+        Latency below which the given fraction of recorded values fall
+        :param      fraction:       Percentile as a fraction, e.g. 0.99
+        :return:    microseconds:   Upper bound of the bucket holding the percentile, None if empty
+        """
+        if not self.count:
+            return None
+        rank = max(int(fraction * self.count + 0.999999999), 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_bounds(index)[1], self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def to_dict(self):
+        """
+        Summary of the histogram in milliseconds, with its non-empty buckets
+        :return:    summary:    Dict ready to be serialised as JSON
+        """
+        def milliseconds(value):
+            return None if value is None else round(value / 1000, 3)
+
+        return {
+            'count': self.count,
+            'min_ms': milliseconds(self.min),
+            'mean_ms': milliseconds(self.mean),
+            'p50_ms': milliseconds(self.percentile(0.5)),
+            'p90_ms': milliseconds(self.percentile(0.9)),
+            'p99_ms': milliseconds(self.percentile(0.99)),
+            'p999_ms': milliseconds(self.percentile(0.999)),
+            'max_ms': milliseconds(self.max if self.count else None),
+            'buckets_us': [[_bucket_bounds(index)[1], count] for index, count in enumerate(self.counts) if count]
+        }
+
+
+class _ShardOwner:
+    """
+    Thread-local object whose collection tells that its thread has exited
+    """
+
+
+class StatsRegistry:
+    """
+    Latency histograms of client calls per endpoint and status code.
+
+    Each thread records into its own set of histograms, so recording takes no
+    lock; snapshot() merges the histograms of all threads. The histograms of a
+    thread that exited are folded into a retired set, so memory and merge cost
+    follow the live threads rather than every thread that ever recorded.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = {}
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            owner = self._local.owner = _ShardOwner()
+            with self._lock:
+                self._shards[id(owner)] = shard
+            weakref.finalize(owner, self._retire, id(owner))
+        return shard
+
+    def _retire(self, owner_id):
+        with self._lock:
+            shard = self._shards.pop(owner_id, None)
+            for key, histogram in (shard or {}).items():
+                self._retired.setdefault(key, LatencyHistogram()).merge(histogram)
+
+    def record(self, method, endpoint, status, seconds):
+        """
+        Record the latency of a call
+        :param      method:     HTTP method
+        :param      endpoint:   Endpoint template, e.g. /Account/v1/User/{userId}
+        :param      status:     Status code, 0 if no response was received
+        :param      seconds:    Latency in seconds
+        """
+        shard = self._shard()
+        key = (method, endpoint, status)
+        histogram = shard.get(key)
+        if histogram is None:
+            histogram = shard[key] = LatencyHistogram()
+        histogram.record_seconds(seconds)
+
+    def snapshot(self):
+        """
+        Merge the histograms of all threads
+        :return:    histograms:     Dict of (method, endpoint, status) to LatencyHistogram
+        """
+        merged = {}
+        with self._lock:
+            shards = list(self._shards.values())
+            for key, histogram in self._retired.items():
+                merged.setdefault(key, LatencyHistogram()).merge(histogram)
+        for shard in shards:
+            for key, histogram in list(shard.items()):
+                merged.setdefault(key, LatencyHistogram()).merge(histogram)
+        return merged
+
+    def reset(self):
+        """
+        Drop everything recorded so far
+        """
+        with self._lock:
+            for shard in self._shards.values():
+                shard.clear()
+            self._retired.clear()
+
+    def to_json(self):
+        """
+        Export a snapshot as JSON
+        :return:    text:   JSON document with one entry per method, endpoint and status
+        """
+        entries = []
+        for (method, endpoint, status), histogram in sorted(self.snapshot().items()):
+            entry = {'method': method, 'endpoint': endpoint, 'status': status}
+            entry.update(histogram.to_dict())
+            entries.append(entry)
+        return json.dumps({'generated_at': time.time(), 'endpoints': entries}, indent=2)
+
+    def dump(self, path):
+        """
+        Write a snapshot as JSON to a file
+        :param      path:   File to write
+        """
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(self.to_json())
+
+
+registry = StatsRegistry()
+
+if os.environ.get('BOOKSTORE_STATS'):
+    atexit.register(registry.dump, os.environ['BOOKSTORE_STATS'])
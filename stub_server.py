@@ -0,0 +1,647 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import socket
+import ssl
+import string
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+except ImportError:
+    h2 = None
+
+BOOKS = [
+    {
+        "isbn": "9781449325862",
+        "title": "Git Pocket Guide",
+        "subTitle": "A Working Introduction",
+        "author": "Richard E. Silverman",
+        "publish_date": "2020-06-04T08:48:39.000Z",
+        "publisher": "O'Reilly Media",
+        "pages": 234,
+        "description": "This pocket guide is the perfect on-the-job companion to Git, the distributed version control system.",
+        "website": "http://chimera.labs.oreilly.com/books/1230000000561/index.html"
+    },
+    {
+        "isbn": "9781449331818",
+        "title": "Learning JavaScript Design Patterns",
+        "subTitle": "A JavaScript and jQuery Developer's Guide",
+        "author": "Addy Osmani",
+        "publish_date": "2020-06-04T09:11:40.000Z",
+        "publisher": "O'Reilly Media",
+        "pages": 254,
+        "description": "With Learning JavaScript Design Patterns, you'll learn how to write beautiful, structured code.",
+        "website": "http://www.addyosmani.com/resources/essentialjsdesignpatterns/book/"
+    },
+    {
+        "isbn": "9781449337711",
+        "title": "Designing Evolvable Web APIs with ASP.NET",
+        "subTitle": "Harnessing the Power of the Web",
+        "author": "Glenn Block et al.",
+        "publish_date": "2020-06-04T09:12:43.000Z",
+        "publisher": "O'Reilly Media",
+        "pages": 238,
+        "description": "Design and build Web APIs for a broad range of clients with ASP.NET Web API.",
+        "website": "http://chimera.labs.oreilly.com/books/1234000001708/index.html"
+    },
+    {
+        "isbn": "9781449365035",
+        "title": "Speaking JavaScript",
+        "subTitle": "An In-Depth Guide for Programmers",
+        "author": "Axel Rauschmayer",
+        "publish_date": "2014-02-01T00:00:00.000Z",
+        "publisher": "O'Reilly Media",
+        "pages": 460,
+        "description": "Like it or not, JavaScript is everywhere these days, from browser to server to mobile.",
+        "website": "http://speakingjs.com/"
+    },
+    {
+        "isbn": "9781491904244",
+        "title": "You Don't Know JS",
+        "subTitle": "ES6 & Beyond",
+        "author": "Kyle Simpson",
+        "publish_date": "2015-12-27T00:00:00.000Z",
+        "publisher": "O'Reilly Media",
+        "pages": 278,
+        "description": "No matter how much experience you have with JavaScript, odds are you don't fully understand it.",
+        "website": "https://github.com/getify/You-Dont-Know-JS/tree/master/es6%20&%20beyond"
+    },
+    {
+        "isbn": "9781491950296",
+        "title": "Programming JavaScript Applications",
+        "subTitle": "Robust Web Architecture with Node, HTML5, and Modern JS Libraries",
+        "author": "Eric Elliott",
+        "publish_date": "2014-07-01T00:00:00.000Z",
+        "publisher": "O'Reilly Media",
+        "pages": 254,
+        "description": "Take advantage of JavaScript's power to build robust web-scale or enterprise applications.",
+        "website": "http://chimera.labs.oreilly.com/books/1234000000262/index.html"
+    },
+    {
+        "isbn": "9781593275846",
+        "title": "Eloquent JavaScript, Second Edition",
+        "subTitle": "A Modern Introduction to Programming",
+        "author": "Marijn Haverbeke",
+        "publish_date": "2014-12-14T00:00:00.000Z",
+        "publisher": "No Starch Press",
+        "pages": 472,
+        "description": "JavaScript lies at the heart of almost every modern web application.",
+        "website": "http://eloquentjavascript.net/"
+    },
+    {
+        "isbn": "9781593277574",
+        "title": "Understanding ECMAScript 6",
+        "subTitle": "The Definitive Guide for JavaScript Developers",
+        "author": "Nicholas C. Zakas",
+        "publish_date": "2016-09-03T00:00:00.000Z",
+        "publisher": "No Starch Press",
+        "pages": 352,
+        "description": "ECMAScript 6 represents the biggest update to the core of JavaScript in the history of the language.",
+        "website": "https://leanpub.com/understandinges6/read"
+    }
+]
+
+PASSWORD_POLICY = ("Passwords must have at least one non alphanumeric character, one digit ('0'-'9'), "
+                   "one uppercase ('A'-'Z'), one lowercase ('a'-'z'), one special character and "
+                   "Password must be eight characters or longer.")
+
+TOKEN_LIFETIME = timedelta(days=7)
+
+
+def _encode(payload):
+    if isinstance(payload, bytes):
+        return payload
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _error(status, code, message):
+    return status, {"code": code, "message": message}
+
+
+def is_valid_password(password):
+    """
+    Check a password against the BookStore password policy
+    :param      password:   Password to check
+    :return:    valid:      True if the password is accepted
+    """
+    return (len(password) >= 8
+            and any(char in string.digits for char in password)
+            and any(char in string.ascii_uppercase for char in password)
+            and any(char in string.ascii_lowercase for char in password)
+            and any(not char.isalnum() for char in password))
+
+
+class BookStoreState:
+    """
+    In-memory state and request handling of the BookStore stand-in.
+
+    Users are unique by their (username, password) pair, which is what the
+    test suites observe against demoqa.com. Transport independent: handle()
+    takes the parsed request and returns a status code and a JSON payload.
+    With a rate_limit, requests beyond it are throttled with a 429 the way a
+    busy backend would.
+    """
+
+    def __init__(self, books=None, users=None, rate_limit=None, retry_after=1):
+        """
+        :param      books:          Catalog to serve, the demoqa.com catalog if None
+        :param      users:          (username, password) pairs to register up front
+        :param      rate_limit:     Requests per second served before answering 429, unlimited if None
+        :param      retry_after:    Seconds sent as Retry-After with a 429, no header if None
+        """
+        self.lock = threading.Lock()
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.throttled = 0
+        self._allowance = rate_limit or 0
+        self._allowance_at = time.monotonic()
+        self.books = list(books if books is not None else BOOKS)
+        self.books_by_isbn = {book["isbn"]: book for book in self.books}
+        # The catalog never changes, so its responses are encoded once
+        self.catalog_body = _encode({"books": self.books})
+        self.book_bodies = {isbn: _encode(book) for isbn, book in self.books_by_isbn.items()}
+        self.catalog_etag = '"%s"' % hashlib.sha1(self.catalog_body).hexdigest()
+        self.users = {}
+        self.users_by_credentials = {}
+        self.tokens = {}
+
+        for username, password in users or [("existingUser", "ExistingUserPassword123!")]:
+            self._create_user(username, password)
+
+    def _create_user(self, username, password):
+        user = {"userId": str(uuid.uuid4()), "username": username, "password": password, "books": [], "token": None}
+        self.users[user["userId"]] = user
+        self.users_by_credentials[(username, password)] = user
+        return user
+
+    def _authorized_user(self, headers, user_id):
+        token = headers.get('authorization', '')[len('Bearer '):]
+        owner = self.tokens.get(token)
+        if owner is None:
+            return None, _error(401, "1200", "User not authorized!")
+        if user_id is not None and owner["userId"] != user_id:
+            return None, _error(401, "1207", "User not found!")
+        return owner, None
+
+    def handle(self, method, path, query, headers, body):
+        """
+        Handle a request to the BookStore API
+        :param      method:     HTTP method
+        :param      path:       Request path
+        :param      query:      Query parameters as a dict of lists
+        :param      headers:    Request headers with lower-case names
+        :param      body:       Decoded JSON body, or None
+        :return:    response:   (status code, JSON payload, its encoded bytes or None)
+        """
+        body = body if isinstance(body, dict) else {}
+        with self.lock:
+            if self.rate_limit is not None and not self._admit():
+                self.throttled += 1
+                return _error(429, "429", "Too many requests")
+            if path == '/Account/v1/User' and method == 'POST':
+                return self._register(body)
+            if path == '/Account/v1/GenerateToken' and method == 'POST':
+                return self._generate_token(body)
+            if path == '/Account/v1/Authorized' and method == 'POST':
+                return self._authorized(body)
+            if path == '/Account/v1/Login' and method == 'POST':
+                return self._login(body)
+            if path.startswith('/Account/v1/User/'):
+                user_id = path[len('/Account/v1/User/'):]
+                if method == 'GET':
+                    return self._user_info(headers, user_id)
+                if method == 'DELETE':
+                    return self._delete_user(headers, user_id)
+            if path == '/BookStore/v1/Books':
+                if method == 'GET':
+                    if headers.get('if-none-match') == self.catalog_etag:
+                        return 304, None
+                    return 200, self.catalog_body
+                if method == 'POST':
+                    return self._add_books(headers, body)
+                if method == 'DELETE':
+                    return self._clear_books(headers, query.get('UserId', [''])[0])
+            if path.startswith('/BookStore/v1/Books/') and method == 'PUT':
+                return self._replace_book(headers, path[len('/BookStore/v1/Books/'):], body)
+            if path == '/BookStore/v1/Book':
+                if method == 'GET':
+                    return self._get_book(query.get('ISBN', [''])[0])
+                if method == 'DELETE':
+                    return self._remove_book(headers, body)
+        return 404, None
+
+    def _admit(self):
+        now = time.monotonic()
+        self._allowance = min(self.rate_limit, self._allowance + (now - self._allowance_at) * self.rate_limit)
+        self._allowance_at = now
+        if self._allowance < 1:
+            return False
+        self._allowance -= 1
+        return True
+
+    def _register(self, body):
+        username, password = body.get('userName') or '', body.get('password') or ''
+        if not username or not password:
+            return _error(400, "1200", "UserName and Password required.")
+        if not is_valid_password(password):
+            return _error(400, "1300", PASSWORD_POLICY)
+        if (username, password) in self.users_by_credentials:
+            return _error(406, "1204", "User exists!")
+        user = self._create_user(username, password)
+        return 201, {"userID": user["userId"], "username": username, "books": []}
+
+    def _generate_token(self, body):
+        username, password = body.get('userName') or '', body.get('password') or ''
+        if not username or not password:
+            return _error(400, "1200", "UserName and Password required.")
+        user = self.users_by_credentials.get((username, password))
+        if user is None:
+            return 200, {"token": None, "expires": None, "status": "Failed", "result": "User authorization failed."}
+        if user["token"] is None:
+            user["token"] = uuid.uuid4().hex + uuid.uuid4().hex
+            expires = datetime.now(timezone.utc) + TOKEN_LIFETIME
+            user["expires"] = expires.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+            self.tokens[user["token"]] = user
+        return 200, {"token": user["token"], "expires": user["expires"], "status": "Success",
+                     "result": "User authorized successfully."}
+
+    def _authorized(self, body):
+        username, password = body.get('userName') or '', body.get('password') or ''
+        if not username or not password:
+            return _error(400, "1200", "UserName and Password required.")
+        user = self.users_by_credentials.get((username, password))
+        if user is None:
+            return _error(404, "1207", "User not found!")
+        return 200, user["token"] is not None
+
+    def _login(self, body):
+        username, password = body.get('userName') or '', body.get('password') or ''
+        if not username or not password:
+            return _error(400, "1200", "UserName and Password required.")
+        user = self.users_by_credentials.get((username, password))
+        if user is None:
+            return _error(404, "1207", "User not found!")
+        return 200, {"userId": user["userId"], "username": username, "password": password, "token": user["token"],
+                     "expires": user.get("expires"), "isActive": True}
+
+    def _user_info(self, headers, user_id):
+        user, error = self._authorized_user(headers, user_id)
+        if error:
+            return error
+        books = [self.books_by_isbn[isbn] for isbn in user["books"]]
+        return 200, {"userId": user["userId"], "username": user["username"], "books": books}
+
+    def _delete_user(self, headers, user_id):
+        user, error = self._authorized_user(headers, None)
+        if error:
+            return error
+        if user["userId"] != user_id:
+            return _error(200, 1207, "User Id not correct!")
+        del self.users[user_id]
+        del self.users_by_credentials[(user["username"], user["password"])]
+        self.tokens.pop(user["token"], None)
+        return 204, None
+
+    def _add_books(self, headers, body):
+        user, error = self._authorized_user(headers, body.get('userId'))
+        if error:
+            return error
+        isbns = [item.get('isbn') for item in body.get('collectionOfIsbns') or [] if isinstance(item, dict)]
+        if not isbns or any(isbn not in self.books_by_isbn for isbn in isbns):
+            return _error(400, "1205", "ISBN supplied is not available in Books Collection!")
+        if any(isbn in user["books"] for isbn in isbns) or len(set(isbns)) != len(isbns):
+            return _error(400, "1210", "ISBN already present in the User's Collection!")
+        user["books"].extend(isbns)
+        return 201, {"books": [{"isbn": isbn} for isbn in isbns]}
+
+    def _clear_books(self, headers, user_id):
+        user, error = self._authorized_user(headers, user_id)
+        if error:
+            return error
+        user["books"].clear()
+        return 204, None
+
+    def _replace_book(self, headers, current_isbn, body):
+        user, error = self._authorized_user(headers, body.get('userId'))
+        if error:
+            return error
+        isbn = body.get('isbn')
+        if isbn not in self.books_by_isbn:
+            return _error(400, "1205", "ISBN supplied is not available in Books Collection!")
+        if current_isbn not in user["books"]:
+            return _error(400, "1206", "ISBN supplied is not available in User's Collection!")
+        user["books"][user["books"].index(current_isbn)] = isbn
+        books = [self.books_by_isbn[item] for item in user["books"]]
+        return 200, {"userId": user["userId"], "username": user["username"], "books": books}
+
+    def _get_book(self, isbn):
+        body = self.book_bodies.get(isbn)
+        if body is None:
+            return _error(400, "1205", "ISBN supplied is not available in Books Collection!")
+        return 200, body
+
+    def _remove_book(self, headers, body):
+        user, error = self._authorized_user(headers, body.get('userId'))
+        if error:
+            return error
+        isbn = body.get('isbn')
+        if isbn not in user["books"]:
+            return _error(400, "1206", "ISBN supplied is not available in User's Collection!")
+        user["books"].remove(isbn)
+        return 204, None
+
+
+_REASONS = {status.value: status.phrase for status in HTTPStatus}
+
+_H2_PREFACE = b'PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n'
+
+
+class _BookStoreProtocol(asyncio.Protocol):
+    """
+    Minimal HTTP/1.1 server protocol with keep-alive and pipelining.
+
+    Requests must carry their body with a Content-Length, which every client
+    of this repository does. When the h2 package is installed, a connection
+    opening with the HTTP/2 preface is served as cleartext HTTP/2 instead.
+    """
+
+    def __init__(self, state):
+        self.state = state
+        self.transport = None
+        self.buffer = bytearray()
+        self.h2 = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        sock = transport.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def data_received(self, data):
+        if self.h2 is not None:
+            self.h2.data_received(data)
+            return
+        buffer = self.buffer
+        buffer += data
+        if h2 is not None and buffer[:3] == _H2_PREFACE[:3]:
+            if len(buffer) < len(_H2_PREFACE):
+                return
+            if buffer.startswith(_H2_PREFACE):
+                self.h2 = _H2Handler(self.state, self.transport)
+                self.h2.data_received(bytes(buffer))
+                buffer.clear()
+                return
+
+        responses = []
+        close = False
+        while not close:
+            end = buffer.find(b'\r\n\r\n')
+            if end < 0:
+                break
+            lines = buffer[:end].decode('latin-1').split('\r\n')
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if 'chunked' in headers.get('transfer-encoding', '').lower():
+                responses.append(self._response(411, b'', False))
+                close = True
+                break
+
+            length = int(headers.get('content-length') or 0)
+            total = end + 4 + length
+            if len(buffer) < total:
+                break
+            body = bytes(buffer[end + 4:total])
+            del buffer[:total]
+
+            method, target, version = (lines[0].split(' ') + ['', ''])[:3]
+            keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+            responses.append(self._dispatch(method, target, headers, body, keep_alive))
+            close = not keep_alive
+
+        if responses:
+            self.transport.write(b''.join(responses))
+        if close:
+            self.transport.close()
+
+    def _dispatch(self, method, target, headers, raw, keep_alive):
+        status, content, extra = _handle(self.state, method, target, headers, raw)
+        return self._response(status, content, keep_alive, extra)
+
+    @staticmethod
+    def _response(status, content, keep_alive, extra=()):
+        head = [f'HTTP/1.1 {status} {_REASONS.get(status, "")}', f'Content-Length: {len(content)}']
+        if content:
+            head.append('Content-Type: application/json; charset=utf-8')
+        head.extend(f'{name}: {value}' for name, value in extra)
+        if not keep_alive:
+            head.append('Connection: close')
+        return ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + content
+
+
+class _H2Handler:
+    """
+    Cleartext HTTP/2 (h2c with prior knowledge) for a connection of _BookStoreProtocol.
+
+    Every request is a stream; responses larger than the flow control window
+    are sent as the client opens it.
+    """
+
+    def __init__(self, state, transport):
+        self.state = state
+        self.transport = transport
+        self.connection = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False, header_encoding='utf-8'))
+        self.connection.initiate_connection()
+        self.requests = {}
+        self.pending = {}
+
+    def data_received(self, data):
+        try:
+            events = self.connection.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            self.transport.write(self.connection.data_to_send())
+            self.transport.close()
+            return
+
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                self.requests[event.stream_id] = (dict(event.headers), bytearray())
+            elif isinstance(event, h2.events.DataReceived):
+                self.requests[event.stream_id][1].extend(event.data)
+                self.connection.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, h2.events.StreamEnded):
+                self._respond(event.stream_id)
+            elif isinstance(event, h2.events.WindowUpdated):
+                for stream_id in list(self.pending):
+                    self._send_pending(stream_id)
+            elif isinstance(event, h2.events.StreamReset):
+                self.requests.pop(event.stream_id, None)
+                self.pending.pop(event.stream_id, None)
+        self.transport.write(self.connection.data_to_send())
+
+    def _respond(self, stream_id):
+        headers, raw = self.requests.pop(stream_id)
+        method, target = headers.pop(':method'), headers.pop(':path')
+        headers = {name.lower(): value for name, value in headers.items() if not name.startswith(':')}
+        status, content, extra = _handle(self.state, method, target, headers, bytes(raw))
+
+        response = [(':status', str(status)), ('content-length', str(len(content)))]
+        if content:
+            response.append(('content-type', 'application/json; charset=utf-8'))
+        response.extend((name.lower(), str(value)) for name, value in extra)
+        self.connection.send_headers(stream_id, response, end_stream=not content)
+        if content:
+            self.pending[stream_id] = memoryview(content)
+            self._send_pending(stream_id)
+
+    def _send_pending(self, stream_id):
+        data = self.pending[stream_id]
+        while data:
+            size = min(self.connection.local_flow_control_window(stream_id), self.connection.max_outbound_frame_size,
+                       len(data))
+            if size <= 0:
+                self.pending[stream_id] = data
+                return
+            self.connection.send_data(stream_id, data[:size].tobytes(), end_stream=size == len(data))
+            data = data[size:]
+        del self.pending[stream_id]
+
+
+def _handle(state, method, target, headers, raw):
+    """
+    Answer a request the way both HTTP versions of the stand-in do
+    :return:    response:   (status code, encoded body, list of extra (name, value) headers)
+    """
+    path, _, query = target.partition('?')
+    try:
+        body = json.loads(raw) if raw else None
+    except ValueError:
+        body = None
+    status, payload = state.handle(method, unquote(path), parse_qs(query), headers, body)
+
+    extra = []
+    if status == 429 and state.retry_after is not None:
+        extra.append(('Retry-After', state.retry_after))
+    elif path == '/BookStore/v1/Books' and method == 'GET':
+        extra.append(('ETag', state.catalog_etag))
+    content = b'' if payload is None or status in (204, 304) else _encode(payload)
+    return status, content, extra
+
+
+class StubServer:
+    """
+    BookStore stand-in served by an asyncio event loop in a background thread.
+
+    Implements every endpoint used by main.py, including the password policy
+    of the registration suite, over keep-alive HTTP/1.1, and over cleartext
+    HTTP/2 when the h2 package is installed. Point the clients at it through
+    base_url, or BOOKSTORE_BASE_URL for the module-level functions.
+
+    Usage:
+        with StubServer() as server:
+            client = BookStoreClient(base_url=server.base_url)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, state=None, ssl_context=None):
+        """
+        :param      host:           Interface to listen on
+        :param      port:           Port to listen on, a free port if 0
+        :param      state:          BookStoreState to serve, a freshly seeded one if None
+        :param      ssl_context:    Server SSLContext to serve https with, plain http if None
+        """
+        self.host = host
+        self.port = port
+        self.state = state or BookStoreState()
+        self.ssl_context = ssl_context
+        self.connections = 0
+        self.loop = None
+        self._server = None
+        self._thread = None
+        self._started = threading.Event()
+        self._error = None
+
+    @property
+    def base_url(self):
+        return f"{'https' if self.ssl_context is not None else 'http'}://{self.host}:{self.port}"
+
+    def _protocol(self):
+        self.connections += 1
+        return _BookStoreProtocol(self.state)
+
+    def _serve(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self._server = self.loop.run_until_complete(self.loop.create_server(
+                self._protocol, self.host, self.port, reuse_address=True, backlog=1024, ssl=self.ssl_context))
+            self.port = self._server.sockets[0].getsockname()[1]
+        except BaseException as error:
+            self._error = error
+            self._started.set()
+            self.loop.close()
+            return
+        self._started.set()
+
+        try:
+            self.loop.run_forever()
+        finally:
+            self._server.close()
+            self.loop.run_until_complete(self._server.wait_closed())
+            self.loop.close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._serve, name='bookstore-stub', daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local BookStore stand-in")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--rate-limit', type=float, help="requests per second served before answering 429")
+    parser.add_argument('--certfile', help="PEM file with the certificate and key to serve https with")
+    args = parser.parse_args(argv)
+
+    ssl_context = None
+    if args.certfile:
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(args.certfile)
+    server = StubServer(host=args.host, port=args.port, state=BookStoreState(rate_limit=args.rate_limit),
+                        ssl_context=ssl_context).start()
+    print(f"BookStore stand-in listening on {server.base_url}\n"
+          f"export BOOKSTORE_BASE_URL={server.base_url}", flush=True)
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
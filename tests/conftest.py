@@ -0,0 +1,70 @@
+import os
+
+from scheduling import DurationHistory, Result, partition, schedule
+
+
+class SchedulingPlugin:
+    """
+    Runs the tests in the order of scheduling.schedule() and records their durations and outcomes.
+
+    The tests of a class stay together and in order, as they share the
+    fixtures of its setUpClass and may build on each other. Under
+    pytest-xdist every worker reorders the same way, and only the controller
+    records the run.
+    """
+
+    def __init__(self, path, record):
+        self.path = path
+        self.record = record
+        self.results = {}
+        self.summary = None
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        with DurationHistory(self.path) as history:
+            durations = history.durations()
+            failures = history.failures()
+        by_id = {item.nodeid: item for item in items}
+
+        def group(test):
+            return by_id[test].parent.nodeid if by_id[test].cls else test
+
+        order = schedule(list(by_id), durations, failures, group=group)
+        items[:] = [by_id[test] for test in order]
+
+        groups = {}
+        for test in order:
+            groups[group(test)] = groups.get(group(test), 0.0) + durations.get(test, 0.0)
+        workers = getattr(config.option, 'numprocesses', None)
+        _, makespan = partition(list(groups), groups, workers if isinstance(workers, int) and workers > 0 else 1)
+        self.summary = (f"test history {self.path}: {sum(test in durations for test in order)} tests known, "
+                        f"{sum(test in failures for test in order)} recently failing run first, "
+                        f"expected {makespan:.1f}s")
+
+    def pytest_report_collectionfinish(self):
+        return self.summary
+
+    def pytest_runtest_logreport(self, report):
+        if not self.record:
+            return
+        duration, outcome = self.results.get(report.nodeid, (0.0, 'passed'))
+        if report.failed:
+            outcome = 'failed'
+        elif report.skipped and outcome == 'passed':
+            outcome = 'skipped'
+        self.results[report.nodeid] = (duration + report.duration, outcome)
+
+    def pytest_sessionfinish(self, session):
+        if self.record and self.results:
+            with DurationHistory(self.path) as history:
+                history.record(Result(test_id, duration, outcome)
+                               for test_id, (duration, outcome) in self.results.items())
+
+
+def pytest_configure(config):
+    """
+    Schedule the tests with the history in BOOKSTORE_TEST_HISTORY, the collection order is kept when it is not set
+    """
+    path = os.environ.get('BOOKSTORE_TEST_HISTORY')
+    if path:
+        config.pluginmanager.register(SchedulingPlugin(path, record=not hasattr(config, 'workerinput')),
+                                      'bookstore-scheduling')
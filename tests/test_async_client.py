@@ -0,0 +1,110 @@
+import asyncio
+import unittest
+
+from async_client import AsyncBookStoreClient, AsyncConnectionPool
+from stub_server import StubServer
+
+
+class Test(unittest.IsolatedAsyncioTestCase):
+    username = "asyncUser"
+    password = "Password123!"
+    isbn = "9781449325862"
+    server = None
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Start the local BookStore stand-in
+        """
+        cls.server = StubServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    async def asyncSetUp(self):
+        """
+        Register a user and generate its token
+        """
+        self.client = AsyncBookStoreClient(base_url=self.server.base_url, limit_per_host=8)
+
+        response = await self.client.create_new_user(self.username, self.password)
+        self.assertEqual(201, response.status_code)
+        self.user_id = response.json()["userID"]
+
+        response = await self.client.generate_token(self.username, self.password)
+        self.assertEqual(200, response.status_code)
+        self.token = response.json()["token"]
+
+    async def asyncTearDown(self):
+        response = await self.client.delete_user(self.user_id, self.username, self.password)
+        self.assertEqual(204, response.status_code)
+        await self.client.close()
+
+    async def test_user_authorized(self):
+        """
+        Check the registered user is authorized
+        """
+        response = await self.client.is_authorized(self.username, self.password)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(True, response.json())
+
+    async def test_collection_operations(self):
+        """
+        Add, replace and remove a book in the user collection
+        """
+        books = (await self.client.get_books()).json()["books"]
+        replacement = books[1]["isbn"]
+
+        response = await self.client.add_book(self.user_id, [{"isbn": self.isbn}], self.token)
+        self.assertEqual(201, response.status_code)
+
+        response = await self.client.replace_book_in_collection(self.user_id, self.token, self.isbn, replacement)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([replacement], [book["isbn"] for book in response.json()["books"]])
+
+        response = await self.client.remove_book_from_collection(self.user_id, replacement, self.token)
+        self.assertEqual(204, response.status_code)
+
+        response = await self.client.get_user_info(self.user_id, self.token)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([], response.json()["books"])
+
+    async def test_get_book(self):
+        """
+        Check book with isbn: 9781491904244 has 278 pages and a random isbn is in the store
+        """
+        response = await self.client.get_book('9781491904244')
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(278, response.json()["pages"])
+
+        isbn = await self.client.get_random_book()
+        self.assertEqual(200, (await self.client.get_book(isbn)).status_code)
+
+    async def test_concurrent_requests_share_pool(self):
+        """
+        Many concurrent requests never open more connections than the per-host limit
+        """
+        responses = await asyncio.gather(*[self.client.get_books() for _ in range(200)])
+
+        self.assertEqual({200}, {response.status_code for response in responses})
+        self.assertLessEqual(self.client.pool.connections_opened, 8)
+
+    async def test_shared_pool(self):
+        """
+        Clients created on the same pool reuse its connections
+        """
+        pool = AsyncConnectionPool(limit_per_host=2)
+        first = AsyncBookStoreClient(base_url=self.server.base_url, pool=pool)
+        second = AsyncBookStoreClient(base_url=self.server.base_url, pool=pool)
+
+        await asyncio.gather(*[client.get_books() for client in (first, second) for _ in range(20)])
+
+        self.assertLessEqual(pool.connections_opened, 2)
+        await pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
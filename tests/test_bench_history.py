@@ -0,0 +1,142 @@
+import os
+import random
+import tempfile
+import unittest
+
+import bench_history
+from bench_history import BenchHistory, bootstrap_ci, compare_samples, format_comparison, mad
+
+
+def results(rows, python='3.11.7'):
+    """
+    Benchmark document as written by benchmarks/bench_client.py
+    """
+    return {
+        'schema': 1,
+        'generated_at': 1700000000.0,
+        'environment': {'python': python},
+        'config': {},
+        'results': [dict(transport='pooled', operation=operation, concurrency=8, peak_rss_kb=None, **metrics)
+                    for operation, metrics in rows.items()]
+    }
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'history.sqlite')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_statistics(self):
+        """
+        Median absolute deviation and bootstrap intervals of the change of the medians
+        """
+        self.assertEqual(1, mad([1, 2, 3, 4, 100]))
+        self.assertIsNone(bootstrap_ci([1.0], [1.0, 2.0]))
+
+        rng = random.Random(1)
+        base = [100 + rng.gauss(0, 2) for _ in range(10)]
+        slower = [value * 0.8 for value in base]
+        low, high = bootstrap_ci(base, slower)
+        self.assertLess(high, 0)
+        self.assertAlmostEqual(-0.2, (low + high) / 2, delta=0.03)
+        self.assertEqual(bootstrap_ci(base, slower), bootstrap_ci(base, slower))
+
+    def test_verdicts(self):
+        """
+        Significant changes are judged by the direction in which the metric is better
+        """
+        rng = random.Random(2)
+        base = [1000 + rng.gauss(0, 10) for _ in range(7)]
+        self.assertEqual('regression', compare_samples(base, [value * 0.85 for value in base], True)[2])
+        self.assertEqual('improvement', compare_samples(base, [value * 0.85 for value in base], False)[2])
+        self.assertEqual('', compare_samples(base, [1000 + rng.gauss(0, 10) for _ in range(7)], True)[2])
+        self.assertEqual('', compare_samples(base, [value * 0.97 for value in base], True)[2])
+
+        # Noise as large as the change keeps the interval across zero
+        noisy = [500, 1500, 900, 1200, 700]
+        self.assertEqual('', compare_samples(noisy, [value * 0.9 for value in reversed(noisy)], True)[2])
+
+        # A single run per side cannot be judged, only hinted at
+        self.assertEqual('regression?', compare_samples([10.0], [12.0], False)[2])
+
+    def test_record_and_compare(self):
+        """
+        Runs are stored per commit, machine and Python, and compared only within the same machine and Python
+        """
+        rng = random.Random(3)
+        with BenchHistory(self.path) as history:
+            for commit, factor in (('aaaa1111', 1.0), ('bbbb2222', 1.3)):
+                for _ in range(4):
+                    history.record(results({
+                        'get_user_info': {'ops_per_second': 1000 / factor * rng.uniform(0.98, 1.02),
+                                          'p50_ms': 1.0 * factor * rng.uniform(0.98, 1.02),
+                                          'p99_ms': 3.0, 'cpu_ms_per_request': 0.5},
+                        'add_book': {'ops_per_second': 300 * rng.uniform(0.98, 1.02), 'p50_ms': 3.0,
+                                     'p99_ms': 9.0, 'cpu_ms_per_request': 0.5}
+                    }), commit=commit, machine='m1')
+            history.record(results({'add_book': {'ops_per_second': 1.0, 'p50_ms': 1.0, 'p99_ms': 1.0,
+                                                 'cpu_ms_per_request': 1.0}}), commit='bbbb2222', machine='m2')
+            history.record(results({'add_book': {'ops_per_second': 1.0, 'p50_ms': 1.0, 'p99_ms': 1.0,
+                                                 'cpu_ms_per_request': 1.0}}, python='3.8.18'),
+                           commit='bbbb2222', machine='m1')
+
+            self.assertEqual(4, len(history.runs('aaaa', 'm1', '3.11.7')))
+            self.assertEqual(6, len(history.runs('bbbb')))
+            rows = history.compare('aaaa', 'bbbb', machine='m1', python='3.11.7')
+
+        verdicts = {(row.key[1], row.metric): row.verdict for row in rows}
+        self.assertEqual(8, len(rows))
+        self.assertEqual('regression', verdicts[('get_user_info', 'ops_per_second')])
+        self.assertEqual('regression', verdicts[('get_user_info', 'p50_ms')])
+        self.assertEqual('', verdicts[('get_user_info', 'p99_ms')])
+        self.assertEqual('', verdicts[('add_book', 'ops_per_second')])
+        self.assertTrue(all(len(row.candidate) == 4 for row in rows))
+
+        table = format_comparison(rows)
+        self.assertEqual(3, len(table.splitlines()))
+        self.assertIn('get_user_info', table)
+        self.assertNotIn('add_book', table)
+        self.assertEqual(9, len(format_comparison(rows, show_all=True).splitlines()))
+
+    def test_command_line(self):
+        """
+        The compare command fails when it finds a regression, for use in CI
+        """
+        with BenchHistory(self.path) as history:
+            for commit, p50 in (('base', [1.0, 1.02, 0.99]), ('fast', [0.99, 1.0, 1.01]), ('slow', [1.5, 1.52, 1.49])):
+                for value in p50:
+                    history.record(results({'add_book': {'ops_per_second': 300, 'p50_ms': value, 'p99_ms': 9.0,
+                                                         'cpu_ms_per_request': 0.5}}), commit=commit, machine='m1')
+
+        arguments = ['--history', self.path, '--machine', 'm1', '--python', '3.11.7']
+        self.assertEqual(0, bench_history.main(['compare', 'base', 'fast'] + arguments))
+        self.assertEqual(1, bench_history.main(['compare', 'base', 'slow'] + arguments))
+        self.assertEqual(1, bench_history.main(['compare', 'base'] + arguments))
+
+    def test_compare_with_uncommitted_changes(self):
+        """
+        The runs of uncommitted changes to a commit are not counted as runs of the commit itself
+        """
+        with BenchHistory(self.path) as history:
+            for commit, throughput in (('cccc3333', [100, 101, 99]), ('cccc3333-dirty', [50, 51, 49])):
+                for value in throughput:
+                    history.record(results({'add_book': {'ops_per_second': value, 'p50_ms': 1.0, 'p99_ms': 9.0,
+                                                         'cpu_ms_per_request': 0.5}}), commit=commit, machine='m1')
+
+            self.assertEqual(3, len(history.runs('cccc')))
+            self.assertEqual(3, len(history.runs('cccc3333-dirty')))
+            rows = history.compare('cccc3333', 'cccc3333-dirty', machine='m1', python='3.11.7')
+
+        verdicts = {row.metric: row for row in rows}
+        self.assertEqual([100, 101, 99], verdicts['ops_per_second'].base)
+        self.assertEqual('regression', verdicts['ops_per_second'].verdict)
+        arguments = ['--history', self.path, '--machine', 'm1', '--python', '3.11.7']
+        self.assertEqual(1, bench_history.main(['compare', 'cccc3333'] + arguments))
+
+
+if __name__ == '__main__':
+    unittest.main()
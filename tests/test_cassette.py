@@ -0,0 +1,143 @@
+import os
+import tempfile
+import time
+import unittest
+import uuid
+
+import requests
+
+from cassette import Cassette, CassetteMissError, install_cassette
+from main import BookStoreClient
+from stub_server import BookStoreState, StubServer
+
+
+class Test(unittest.TestCase):
+    password = "Password123!"
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "run.cassette")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def record(self, username):
+        with StubServer() as server, BookStoreClient(base_url=server.base_url) as client:
+            cassette = install_cassette(client, self.path, 'record')
+            user_id = client.create_new_user(username, self.password).json()["userID"]
+            token = client.get_token(username, self.password)
+            client.add_book(user_id, [{"isbn": "9781449325862"}], token)
+            client.get_user_info(user_id, token)
+            client.delete_user(user_id, username, self.password)
+            cassette.close()
+
+    def test_replay_without_network(self):
+        """
+        A recorded run is replayed with the same statuses and bodies while the server is down
+        """
+        username = "cassetteUser"
+        self.record(username)
+
+        with BookStoreClient(base_url="http://127.0.0.1:9") as client:
+            install_cassette(client, self.path, 'replay')
+            response = client.create_new_user(username, self.password)
+            user_id = response.json()["userID"]
+            token = client.get_token(username, self.password)
+
+            self.assertEqual(201, response.status_code)
+            self.assertEqual(201, client.add_book(user_id, [{"isbn": "9781449325862"}], token).status_code)
+            books = client.get_user_info(user_id, token).json()["books"]
+            self.assertEqual(["9781449325862"], [book["isbn"] for book in books])
+            self.assertEqual(204, client.delete_user(user_id, username, self.password).status_code)
+
+    def test_replay_streamed_catalog(self):
+        """
+        Catalog reads streamed instead of cached are replayed as well
+        """
+        with StubServer() as server, BookStoreClient(base_url=server.base_url, catalog_ttl=None) as client:
+            cassette = install_cassette(client, self.path, 'record')
+            recorded = [book.isbn for book in client.stream_books()]
+            client.is_valid_isbn("9781449325862")
+            client.get_random_book()
+            cassette.close()
+
+        with BookStoreClient(base_url="http://127.0.0.1:9", catalog_ttl=None) as client:
+            install_cassette(client, self.path, 'replay')
+
+            self.assertEqual(recorded, [book.isbn for book in client.stream_books(chunk_size=64)])
+            self.assertTrue(client.is_valid_isbn("9781449325862"))
+            self.assertIn(client.get_random_book(), recorded)
+
+    def test_record_streamed_catalog(self):
+        """
+        Streamed reads stay streamed while recording, and a stream closed early is still recorded whole
+        """
+        books = [{"isbn": f"978{index:010d}", "title": f"Book {index}"} for index in range(5000)]
+        with StubServer(state=BookStoreState(books=books)) as server, \
+                BookStoreClient(base_url=server.base_url, catalog_ttl=None) as client:
+            cassette = install_cassette(client, self.path, 'record')
+            stream = client.stream_books(chunk_size=1024)
+            self.assertEqual("9780000000000", next(stream).isbn)
+            self.assertEqual(0, os.path.getsize(self.path))
+            stream.close()
+            cassette.close()
+
+        with BookStoreClient(base_url="http://127.0.0.1:9", catalog_ttl=None) as client:
+            install_cassette(client, self.path, 'replay')
+            self.assertEqual(5000, sum(1 for _ in client.stream_books()))
+
+    def test_dynamic_values_are_templated(self):
+        """
+        Generated usernames differing from the recorded ones match and are substituted in responses
+        """
+        self.record(f"user_{uuid.uuid4().hex}")
+        username = f"user_{uuid.uuid4().hex}"
+
+        with BookStoreClient(base_url="http://127.0.0.1:9") as client:
+            install_cassette(client, self.path, 'replay')
+            response = client.create_new_user(username, self.password)
+
+            self.assertEqual(201, response.status_code)
+            self.assertEqual(username, response.json()["username"])
+
+    def test_unrecorded_request_is_a_miss(self):
+        """
+        A request that was never recorded fails instead of reaching the network
+        """
+        self.record("cassetteUser")
+
+        with BookStoreClient(base_url="http://127.0.0.1:9") as client:
+            install_cassette(client, self.path, 'replay')
+
+            self.assertRaises(CassetteMissError, client.is_authorized, "otherUser", self.password)
+
+    def test_large_cassette_lookup(self):
+        """
+        Interactions are found through the index, independent of the cassette size
+        """
+        cassette = Cassette(self.path, 'record')
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"pages": 1}'
+        for index in range(5000):
+            request = requests.Request('GET', 'http://stand-in/BookStore/v1/Book', params={'ISBN': str(index)})
+            cassette.record(request.prepare(), response)
+        cassette.close()
+
+        started = time.perf_counter()
+        cassette = Cassette(self.path, 'replay')
+        loaded = time.perf_counter() - started
+        request = requests.Request('GET', 'http://stand-in/BookStore/v1/Book', params={'ISBN': '4999'}).prepare()
+        started = time.perf_counter()
+        for _ in range(1000):
+            cassette.replay(request)
+        replayed = time.perf_counter() - started
+        cassette.close()
+
+        self.assertEqual(5000, len(Cassette(self.path, 'replay')))
+        self.assertLess(loaded, 2)
+        self.assertLess(replayed, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+from main import BookStoreClient
+from stub_server import StubServer
+
+
+class Test(unittest.TestCase):
+    server = None
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Start the local BookStore stand-in
+        """
+        cls.server = StubServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def test_catalog_fetched_once_within_ttl(self):
+        """
+        Repeated get_books, get_book and get_random_book calls share one catalog fetch
+        """
+        with BookStoreClient(base_url=self.server.base_url) as client:
+            isbns = [book["isbn"] for book in client.get_books().json()["books"]]
+
+            self.assertEqual(isbns, [book["isbn"] for book in client.get_books().json()["books"]])
+
+            response = client.get_book('9781491904244')
+            self.assertEqual(200, response.status_code)
+            self.assertEqual(278, response.json()["pages"])
+            self.assertEqual('HIT', response.headers['X-Cache'])
+
+            for _ in range(100):
+                self.assertIn(client.get_random_book(), isbns)
+
+            self.assertEqual(1, client.catalog.fetches)
+
+    def test_caching_disabled(self):
+        """
+        Without a ttl every catalog read goes to the server and nothing is parsed or kept
+        """
+        with BookStoreClient(base_url=self.server.base_url, catalog_ttl=None) as client:
+            isbns = [book["isbn"] for book in client.get_books().json()["books"]]
+            client.get_books()
+
+            self.assertEqual(2, client.catalog.fetches)
+            self.assertEqual(([], None, {}), (client.catalog.books, client.catalog.content, client.catalog._index))
+            self.assertTrue(client.catalog.contains(isbns[0]))
+            self.assertIn(client.catalog.random_isbn(), isbns)
+            self.assertEqual(4, client.catalog.fetches)
+
+    def test_unknown_isbn_goes_to_server(self):
+        """
+        An isbn missing from the cached catalog is answered by the server
+        """
+        with BookStoreClient(base_url=self.server.base_url) as client:
+            client.get_books()
+
+            self.assertEqual(400, client.get_book('1').status_code)
+            self.assertFalse(client.is_valid_isbn('1'))
+            self.assertTrue(client.is_valid_isbn('9781449325862'))
+
+    def test_revalidation_with_etag(self):
+        """
+        An expired catalog is revalidated with If-None-Match instead of refetched
+        """
+        with BookStoreClient(base_url=self.server.base_url, catalog_ttl=0) as client:
+            first = client.get_books()
+            second = client.get_books()
+
+            self.assertEqual(first.json(), second.json())
+            self.assertEqual(1, client.catalog.fetches)
+            self.assertEqual(1, client.catalog.revalidations)
+
+    def test_snapshot_warms_new_process(self):
+        """
+        A catalog snapshot on disk is used by a new client without a fetch
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "catalog.json")
+            with BookStoreClient(base_url=self.server.base_url, catalog_snapshot=path) as client:
+                client.get_books()
+
+            with BookStoreClient(base_url=self.server.base_url, catalog_snapshot=path) as client:
+                self.assertEqual(200, client.get_book('9781491904244').status_code)
+                client.get_random_book()
+
+                self.assertEqual(0, client.catalog.fetches)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import json
+import random
+import tracemalloc
+import unittest
+
+from catalog_stream import find_book, iter_book_dicts, iter_books, sample_books
+from main import BookStoreClient
+from stub_server import BOOKS, BookStoreState, StubServer
+
+
+def chunked(content, size):
+    return (content[start:start + size] for start in range(0, len(content), size))
+
+
+def generated_catalog(count, chunk_books=100):
+    """
+    Body of a catalog of count books, generated chunk by chunk so it is never held whole in memory
+    """
+    yield b'{"books": ['
+    for start in range(0, count, chunk_books):
+        books = (json.dumps({"isbn": f"978{index:010d}", "title": f"Book {index}", "pages": index % 500})
+                 for index in range(start, min(start + chunk_books, count)))
+        yield (',' if start else '').encode('utf-8') + ','.join(books).encode('utf-8')
+    yield b']}'
+
+
+class Test(unittest.TestCase):
+
+    def test_chunk_boundaries(self):
+        """
+        The books are the same whatever the chunk size, including multi-byte characters split across chunks
+        """
+        books = BOOKS + [{"isbn": "0000000000001", "title": "Сборник задач", "pages": 12}]
+        content = json.dumps({"total": len(books), "books": books, "page": {"size": 1.5e3}},
+                             ensure_ascii=False, indent=1).encode('utf-8')
+        for size in (1, 7, 64, len(content)):
+            self.assertEqual(books, list(iter_book_dicts(chunked(content, size))))
+
+        self.assertEqual([], list(iter_book_dicts([b'{"books": []}'])))
+        self.assertEqual([], list(iter_book_dicts([b'{}'])))
+        self.assertEqual("Git Pocket Guide", next(iter_books([json.dumps({"books": BOOKS}).encode()])).title)
+        with self.assertRaises(ValueError):
+            list(iter_book_dicts([b'{"books": [{"isbn": "1"}']))
+
+    def test_early_termination(self):
+        """
+        Finding a book stops reading the body at the match
+        """
+        read = []
+
+        def chunks():
+            for chunk in generated_catalog(100000):
+                read.append(chunk)
+                yield chunk
+
+        book = find_book(chunks(), "9780000000150")
+        self.assertEqual("Book 150", book.title)
+        self.assertLess(len(read), 5)
+        self.assertIsNone(find_book(generated_catalog(1000), "missing"))
+
+    def test_memory_is_bounded(self):
+        """
+        Streaming a catalog uses a small amount of memory that does not grow with the catalog
+        """
+        peaks = []
+        for count in (5000, 20000):
+            tracemalloc.start()
+            self.assertEqual(count, sum(1 for _ in iter_book_dicts(generated_catalog(count))))
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+        size = sum(len(chunk) for chunk in generated_catalog(20000))
+        self.assertLess(peaks[1], peaks[0] * 1.5)
+        self.assertLess(peaks[1], size / 4)
+
+    def test_reservoir_sampling(self):
+        """
+        Every book is picked with the same probability, and a seed makes the picks repeatable
+        """
+        content = json.dumps({"books": [{"isbn": str(index)} for index in range(10)]}).encode('utf-8')
+        rng = random.Random(7)
+        counts = {}
+        for _ in range(5000):
+            isbn = sample_books(chunked(content, 16), rng=rng)[0].isbn
+            counts[isbn] = counts.get(isbn, 0) + 1
+
+        self.assertEqual(10, len(counts))
+        self.assertTrue(all(380 < count < 620 for count in counts.values()))
+        self.assertEqual(3, len(sample_books([content], k=3)))
+        self.assertEqual(10, len(sample_books([content], k=20)))
+        self.assertEqual([book.isbn for book in sample_books([content], k=2, rng=random.Random(1))],
+                         [book.isbn for book in sample_books([content], k=2, rng=random.Random(1))])
+
+    def test_client_streams_catalog(self):
+        """
+        The client streams a large catalog, and uses the stream for lookups when caching is disabled
+        """
+        books = [{"isbn": f"978{index:010d}", "title": f"Book {index}"} for index in range(20000)]
+        with StubServer(state=BookStoreState(books=books)) as server:
+            with BookStoreClient(base_url=server.base_url, catalog_ttl=None) as client:
+                self.assertEqual(20000, sum(1 for _ in client.stream_books(chunk_size=4096)))
+
+                stream = client.stream_books()
+                self.assertEqual("9780000000000", next(stream).isbn)
+                stream.close()
+
+                self.assertTrue(client.is_valid_isbn("9780000000042"))
+                self.assertFalse(client.is_valid_isbn("9781449325862"))
+                self.assertTrue(client.get_random_book().startswith("978000"))
+                self.assertEqual([], client.catalog.books)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import unittest
+
+from async_client import AsyncBookStoreClient
+from coalesce import SingleFlight
+from main import BookStoreClient
+from stats import StatsRegistry
+from stub_server import StubServer
+
+
+class Test(unittest.TestCase):
+
+    def test_threads_share_one_call(self):
+        """
+        Threads asking for the same key while it is in flight get the result of a single call
+        """
+        single_flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def call():
+            calls.append(1)
+            release.wait()
+            return object()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(single_flight.do('isbn', call)))
+                   for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        while single_flight.hits + single_flight.misses < 16:
+            threading.Event().wait(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual(16, len(results))
+        self.assertEqual(1, len(set(map(id, results))))
+        self.assertEqual({"hits": 15, "misses": 1, "hit_ratio": 0.9375}, single_flight.counters())
+        self.assertEqual(0, single_flight.in_flight)
+
+        # Once the call returned, the key is sent again
+        single_flight.do('isbn', call)
+        self.assertEqual(2, len(calls))
+
+    def test_errors_are_shared(self):
+        """
+        Every caller of a failed flight gets its exception, and a later call starts afresh
+        """
+        single_flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def fail():
+            started.set()
+            release.wait()
+            raise ConnectionError("down")
+
+        errors = []
+
+        def run():
+            try:
+                single_flight.do('key', fail)
+            except ConnectionError as error:
+                errors.append(error)
+
+        leader = threading.Thread(target=run)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=run)
+        follower.start()
+        while single_flight.hits < 1:
+            threading.Event().wait(0.001)
+        release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(2, len(errors))
+        self.assertEqual('ok', single_flight.do('key', lambda: 'ok'))
+
+    def test_asyncio(self):
+        """
+        Coroutines share one call, and a cancelled caller does not cancel it for the others
+        """
+        single_flight = SingleFlight()
+        calls = []
+
+        async def call():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'book'
+
+        async def run():
+            cancelled = asyncio.ensure_future(single_flight.ado('isbn', call))
+            waiters = [asyncio.ensure_future(single_flight.ado('isbn', call)) for _ in range(9)]
+            await asyncio.sleep(0.01)
+            cancelled.cancel()
+            return await asyncio.gather(*waiters), await single_flight.ado('other', call)
+
+        results, other = asyncio.run(run())
+        self.assertEqual(['book'] * 9, results)
+        self.assertEqual('book', other)
+        self.assertEqual(2, len(calls))
+        self.assertEqual((9, 2), (single_flight.hits, single_flight.misses))
+        self.assertEqual(0, single_flight.in_flight)
+
+    def test_client_coalesces_reads(self):
+        """
+        Each read of a burst is either sent or joins one in flight, and only idempotent GETs are coalesced
+        """
+        registry, single_flight = StatsRegistry(), SingleFlight()
+        with StubServer() as server, BookStoreClient(base_url=server.base_url, catalog_ttl=None, stats=registry,
+                                                     single_flight=single_flight) as client:
+            barrier = threading.Barrier(32)
+            statuses = []
+
+            def read():
+                barrier.wait()
+                statuses.append(client.get_book("9781449325862").status_code)
+
+            threads = [threading.Thread(target=read) for _ in range(32)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            client.create_new_user("flightUser", "Password123!")
+            self.assertEqual(32, single_flight.hits + single_flight.misses)
+
+        sent = registry.snapshot()[('GET', '/BookStore/v1/Book', 200)].count
+        self.assertEqual([200] * 32, statuses)
+        self.assertEqual(single_flight.misses, sent)
+        self.assertEqual(32, single_flight.hits + sent)
+
+    def test_async_client_coalesces_reads(self):
+        """
+        Identical reads of the async client in flight together are sent once
+        """
+        registry, single_flight = StatsRegistry(), SingleFlight()
+
+        async def run(base_url):
+            async with AsyncBookStoreClient(base_url=base_url, stats=registry, single_flight=single_flight) as client:
+                return await asyncio.gather(*(client.get_book("9781449325862") for _ in range(20)))
+
+        with StubServer() as server:
+            responses = asyncio.run(run(server.base_url))
+
+        self.assertEqual([200] * 20, [response.status_code for response in responses])
+        self.assertEqual((19, 1), (single_flight.hits, single_flight.misses))
+        self.assertEqual(1, registry.snapshot()[('GET', '/BookStore/v1/Book', 200)].count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+from unittest import mock
+
+import requests
+
+from collection_sync import SyncPlan, plan_sync, sync_collection
+from main import BookStoreClient
+from stub_server import BOOKS, BookStoreState, StubServer
+
+ISBNS = [book["isbn"] for book in BOOKS]
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(state=BookStoreState(users=[("syncUser", "SyncUserPassword123!")])).start()
+        self.client = BookStoreClient(base_url=self.server.base_url)
+        self.user_id = self.client.login("syncUser", "SyncUserPassword123!").json()["userId"]
+        self.token = self.client.generate_token("syncUser", "SyncUserPassword123!").json()["token"]
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def collection(self):
+        return [book["isbn"] for book in self.client.get_user_info(self.user_id, self.token).json()["books"]]
+
+    def test_plan(self):
+        """
+        The plan uses replaces when they save a call, one batched add and a clear when it is cheaper
+        """
+        self.assertEqual(SyncPlan(False, [], [], []), plan_sync(ISBNS[:3], ISBNS[:3]))
+        self.assertEqual(0, plan_sync(ISBNS[:3], reversed(ISBNS[:3])).calls)
+
+        plan = plan_sync(ISBNS[:3], ISBNS[1:4])
+        self.assertEqual(SyncPlan(False, [], [(ISBNS[0], ISBNS[3])], []), plan)
+
+        plan = plan_sync(ISBNS[:2], ISBNS[1:6])
+        self.assertEqual(SyncPlan(False, sorted(ISBNS[2:6]), [], [ISBNS[0]]), plan)
+        self.assertEqual(2, plan.calls)
+
+        plan = plan_sync(ISBNS[:6], ISBNS[:2] + ISBNS[6:7])
+        self.assertEqual(SyncPlan(True, sorted(ISBNS[:2] + ISBNS[6:7]), [], []), plan)
+        self.assertEqual(2, plan.calls)
+        self.assertEqual(SyncPlan(True, [], [], []), plan_sync(ISBNS[:3], []))
+
+        # A tie keeps the books in place rather than clearing them
+        self.assertFalse(plan_sync(ISBNS[:3], ISBNS[:1]).clear)
+
+    def test_sync_collection(self):
+        """
+        The collection ends up as the desired set, with the calls saved reported
+        """
+        self.client.add_book(self.user_id, [{"isbn": isbn} for isbn in ISBNS[:3]], self.token)
+
+        result = sync_collection(self.user_id, self.token, ISBNS[2:8], client=self.client)
+        self.assertEqual(sorted(ISBNS[2:8]), sorted(self.collection()))
+        self.assertTrue(result.plan.clear)
+        self.assertEqual([], result.failed)
+        self.assertEqual((3, 8, 5, 1), (result.calls, result.naive_calls, result.saved, result.passes))
+
+        desired = ISBNS[1:2] + ISBNS[3:8]
+        result = sync_collection(self.user_id, self.token, desired, client=self.client)
+        self.assertEqual(sorted(desired), sorted(self.collection()))
+        self.assertEqual([(ISBNS[2], ISBNS[1])], result.plan.replace)
+        self.assertEqual((2, 3, 1), (result.calls, result.naive_calls, result.saved))
+
+        # Concurrent calls that all succeed are not read back
+        desired = ISBNS[:1] + ISBNS[3:7]
+        result = sync_collection(self.user_id, self.token, desired, client=self.client)
+        self.assertEqual(sorted(desired), sorted(self.collection()))
+        self.assertEqual(2, result.plan.calls)
+        self.assertEqual((3, 4, 1, 1), (result.calls, result.naive_calls, result.saved, result.passes))
+
+        result = sync_collection(self.user_id, self.token, desired, client=self.client)
+        self.assertEqual((1, 1, 0, 0), (result.calls, result.naive_calls, result.saved, result.passes))
+
+    def test_failures_are_reported(self):
+        """
+        Calls the server rejects are reported rather than raised
+        """
+        result = sync_collection(self.user_id, self.token, ["0000000000000"], client=self.client, verify=False)
+        self.assertEqual([('add', "0000000000000", 400)], result.failed)
+        self.assertEqual([], self.collection())
+
+    def test_failed_call_is_repaired(self):
+        """
+        A call that fails makes the collection be read back and the difference fixed by a sequential pass
+        """
+        self.client.add_book(self.user_id, [{"isbn": isbn} for isbn in ISBNS[:4]], self.token)
+        unavailable = requests.Response()
+        unavailable.status_code = 503
+        remove = self.client.remove_book_from_collection
+        with mock.patch.object(self.client, 'remove_book_from_collection',
+                               side_effect=[unavailable, requests.ConnectionError()] + [mock.DEFAULT] * 2,
+                               wraps=remove):
+            result = sync_collection(self.user_id, self.token, ISBNS[:2], client=self.client)
+
+        self.assertEqual(sorted(ISBNS[:2]), sorted(self.collection()))
+        self.assertEqual([], result.failed)
+        self.assertEqual((SyncPlan(False, [], [], ISBNS[2:4]), 2), (result.plan, result.passes))
+        self.assertEqual((6, 3, -3), (result.calls, result.naive_calls, result.saved))
+
+    def test_clear_collection(self):
+        """
+        The bulk clear endpoint empties the collection
+        """
+        self.client.add_book(self.user_id, [{"isbn": isbn} for isbn in ISBNS[:4]], self.token)
+        self.assertEqual(204, self.client.clear_collection(self.user_id, self.token).status_code)
+        self.assertEqual([], self.collection())
+
+
+if __name__ == '__main__':
+    unittest.main()
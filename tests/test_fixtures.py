@@ -0,0 +1,89 @@
+import threading
+import time
+import unittest
+
+from fixtures import FixtureGraph
+
+
+class Test(unittest.TestCase):
+
+    def test_independent_fixtures_overlap(self):
+        """
+        Independent branches run concurrently, so setup takes as long as the critical path
+        """
+        graph = FixtureGraph()
+        graph.add("user", lambda: time.sleep(0.2) or "user-1")
+        graph.add("token", lambda user: time.sleep(0.1) or f"token-of-{user}", requires=["user"])
+        graph.add("catalog", lambda: time.sleep(0.2) or ["isbn-1", "isbn-2"])
+        graph.add("isbn", lambda catalog: catalog[0], requires=["catalog"])
+
+        started = time.perf_counter()
+        values = graph.setup()
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual("token-of-user-1", values["token"])
+        self.assertEqual("isbn-1", values["isbn"])
+        self.assertLess(elapsed, 0.45)
+        self.assertEqual(["user", "token"], graph.critical_path()[0])
+        self.assertIn("critical path user -> token", graph.report())
+
+    def test_teardown_in_reverse_order(self):
+        """
+        A fixture is torn down only after every fixture requiring it
+        """
+        order = []
+        lock = threading.Lock()
+
+        def teardown(name):
+            def undo(value):
+                time.sleep(0.05)
+                with lock:
+                    order.append(name)
+            return undo
+
+        graph = FixtureGraph()
+        graph.add("user", lambda: 1, teardown=teardown("user"))
+        graph.add("token", lambda user: 2, teardown=teardown("token"), requires=["user"])
+        graph.add("collection", lambda user, token: 3, teardown=teardown("collection"), requires=["user", "token"])
+        graph.setup()
+        graph.teardown()
+
+        self.assertEqual(["collection", "token", "user"], order)
+        self.assertEqual({"user", "token", "collection"}, set(graph.teardown_timings))
+
+    def test_failed_setup_tears_down(self):
+        """
+        A failing setup starts no dependents, undoes what was set up and raises its error
+        """
+        torn_down = []
+
+        def fail():
+            time.sleep(0.05)
+            raise RuntimeError("catalog unavailable")
+
+        graph = FixtureGraph()
+        graph.add("user", lambda: "user-1", teardown=torn_down.append)
+        graph.add("catalog", fail)
+        graph.add("isbn", lambda catalog: catalog[0], requires=["catalog"])
+
+        with self.assertRaisesRegex(RuntimeError, "catalog unavailable"):
+            graph.setup()
+        self.assertEqual(["user-1"], torn_down)
+        self.assertNotIn("isbn", graph.values)
+
+    def test_invalid_graphs(self):
+        """
+        Unknown dependencies and cycles are rejected before anything is set up
+        """
+        graph = FixtureGraph()
+        graph.add("token", lambda user: None, requires=["user"])
+        self.assertRaisesRegex(ValueError, "unknown fixture 'user'", graph.setup)
+
+        graph = FixtureGraph()
+        graph.add("a", lambda b: None, requires=["b"])
+        graph.add("b", lambda a: None, requires=["a"])
+        self.assertRaisesRegex(ValueError, "cycle", graph.setup)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import ssl
+import threading
+import unittest
+from unittest import mock
+
+import requests
+
+import http2_transport
+from http2_transport import HTTP2Adapter, httpx
+from main import BookStoreClient
+from stub_server import BOOKS, BookStoreState, StubServer
+
+CERTIFICATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'localhost.pem')
+
+requires_http2 = unittest.skipIf(httpx is None or http2_transport.h2 is None, "httpx and h2 are not installed")
+
+
+class Test(unittest.TestCase):
+
+    @requires_http2
+    def test_calls_over_http2(self):
+        """
+        The client runs the user and collection operations over cleartext HTTP/2 without changing the calls
+        """
+        with StubServer() as server, BookStoreClient(base_url=server.base_url, http2=True) as client:
+            response = client.get_book(BOOKS[0]["isbn"])
+            self.assertEqual(200, response.status_code)
+            self.assertEqual(20, response.raw.version)
+            self.assertEqual(BOOKS[0]["title"], response.json()["title"])
+
+            user_id = client.create_new_user("http2User", "Password123!").json()["userID"]
+            token = client.get_token("http2User", "Password123!")
+            self.assertEqual(201, client.add_book(user_id, [{"isbn": BOOKS[1]["isbn"]}], token).status_code)
+            self.assertEqual(204, client.remove_book_from_collection(user_id, BOOKS[1]["isbn"], token).status_code)
+            self.assertEqual(401, client.get_user_info(user_id, "invalid").status_code)
+            self.assertEqual(204, client.delete_user(user_id, "http2User", "Password123!").status_code)
+
+    @requires_http2
+    def test_concurrent_requests_share_one_connection(self):
+        """
+        Requests from many threads are multiplexed over a single connection
+        """
+        with StubServer() as server, BookStoreClient(base_url=server.base_url, http2=True) as client:
+            statuses = []
+
+            def read():
+                for _ in range(25):
+                    statuses.append(client.get_book(BOOKS[2]["isbn"]).status_code)
+
+            threads = [threading.Thread(target=read) for _ in range(16)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            connections = server.connections
+
+        self.assertEqual([200] * 400, statuses)
+        self.assertEqual(1, connections)
+
+    @requires_http2
+    def test_streamed_catalog(self):
+        """
+        A catalog larger than the flow control window streams over HTTP/2, and closing the stream early works
+        """
+        books = [{"isbn": f"978{index:010d}", "title": f"Book {index}"} for index in range(5000)]
+        with StubServer(state=BookStoreState(books=books)) as server:
+            with BookStoreClient(base_url=server.base_url, http2=True, catalog_ttl=None) as client:
+                self.assertEqual(5000, sum(1 for _ in client.stream_books(chunk_size=4096)))
+                stream = client.stream_books()
+                self.assertEqual("9780000000000", next(stream).isbn)
+                stream.close()
+                self.assertEqual(5000, len(client.get_books().json()["books"]))
+
+    @requires_http2
+    def test_connection_errors(self):
+        """
+        Transport failures surface as the requests exceptions the callers already handle
+        """
+        with StubServer() as server:
+            base_url = server.base_url
+        with BookStoreClient(base_url=base_url, http2=True, max_retries=0) as client:
+            with self.assertRaises(requests.ConnectionError):
+                client.get_book(BOOKS[0]["isbn"])
+
+    @requires_http2
+    def test_request_settings(self):
+        """
+        The verify, cert and proxies of each request are honoured, each combination by a client of its own
+        """
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(CERTIFICATE)
+        with StubServer(host='localhost', ssl_context=context) as server, \
+                BookStoreClient(base_url=server.base_url, http2=True, max_retries=0) as client, \
+                mock.patch.dict(os.environ):
+            os.environ.pop('REQUESTS_CA_BUNDLE', None)
+            os.environ.pop('CURL_CA_BUNDLE', None)
+
+            client.session.verify = False
+            self.assertEqual(200, client.get_book(BOOKS[0]["isbn"]).status_code)
+            client.session.verify = CERTIFICATE
+            self.assertEqual(200, client.get_book(BOOKS[1]["isbn"]).status_code)
+            client.session.verify = True
+            with self.assertRaises(requests.exceptions.SSLError):
+                client.get_book(BOOKS[2]["isbn"])
+            client.session.verify = False
+            self.assertEqual(200, client.get_book(BOOKS[3]["isbn"]).status_code)
+
+            with StubServer() as closed:
+                proxy = closed.base_url
+            client.session.proxies = {'https': proxy}
+            with self.assertRaises(requests.exceptions.ProxyError):
+                client.get_book(BOOKS[0]["isbn"])
+            self.assertEqual(4, len(client.session.get_adapter(server.base_url)._clients))
+
+    def test_missing_dependencies(self):
+        """
+        Asking for HTTP/2 without httpx and h2 installed says what to install
+        """
+        with mock.patch.object(http2_transport, 'httpx', None):
+            with self.assertRaisesRegex(ImportError, "httpx"):
+                HTTP2Adapter()
+
+
+if __name__ == '__main__':
+    unittest.main()
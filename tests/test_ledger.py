@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+
+from ledger import UserLedger, sweep
+from main import BookStoreClient
+from stub_server import StubServer
+
+
+class Test(unittest.TestCase):
+    password = "Password123!"
+
+    def setUp(self):
+        """
+        Start a fresh BookStore stand-in with a client recording to a new ledger
+        """
+        self.server = StubServer().start()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "users.ledger")
+        self.ledger = UserLedger(self.path)
+        self.client = BookStoreClient(base_url=self.server.base_url, pool_maxsize=16, ledger=self.ledger)
+
+    def tearDown(self):
+        self.client.close()
+        self.ledger.close()
+        self.server.stop()
+        self.directory.cleanup()
+
+    def test_created_users_are_ledgered(self):
+        """
+        Created users are recorded and deleted users are removed from the live set
+        """
+        first = self.client.create_new_user("ledgerUser1", self.password).json()["userID"]
+        second = self.client.create_new_user("ledgerUser2", self.password).json()["userID"]
+        self.client.create_new_user("ledgerUser3", "weak")
+
+        self.assertEqual({first, second}, set(UserLedger(self.path).live()))
+
+        self.client.delete_user(first, "ledgerUser1", self.password)
+
+        self.assertEqual({second}, set(UserLedger(self.path).live()))
+
+    def test_sweep(self):
+        """
+        Sweeping deletes every leaked user, skips the ones already gone and empties the ledger
+        """
+        user_ids = [self.client.create_new_user(f"leakedUser{index}", self.password).json()["userID"]
+                    for index in range(40)]
+        other = BookStoreClient(base_url=self.server.base_url)
+        other.delete_user(user_ids[0], "leakedUser0", self.password)
+
+        result = sweep(self.ledger, client=self.client, workers=8, compact_every=10)
+
+        self.assertEqual((39, 1, 0), tuple(result))
+        self.assertEqual({}, self.ledger.live())
+        self.assertEqual(1, len(self.server.state.users))
+        with open(self.path) as file:
+            self.assertEqual("", file.read())
+
+    def test_sweep_keeps_users_it_cannot_check(self):
+        """
+        A user whose token and login calls fail stays in the ledger, counted as failed, until a later sweep
+        """
+        user_id = self.client.create_new_user("unreachableUser", self.password).json()["userID"]
+        unavailable = requests.Response()
+        unavailable.status_code = 503
+        with mock.patch.object(self.client, 'generate_token', return_value=unavailable), \
+                mock.patch.object(self.client, 'login', return_value=unavailable):
+            self.assertEqual((0, 0, 1), tuple(sweep(self.ledger, client=self.client)))
+        self.assertEqual({user_id}, set(UserLedger(self.path).live()))
+
+        self.assertEqual((1, 0, 0), tuple(sweep(self.ledger, client=self.client)))
+        self.assertEqual({}, self.ledger.live())
+
+    def test_appends_after_compaction_are_kept(self):
+        """
+        A second ledger handle keeps appending to the file that replaced the compacted one
+        """
+        other = UserLedger(self.path)
+        other.record_created("1", "first", self.password)
+
+        self.ledger.compact()
+        other.record_created("2", "second", self.password)
+
+        self.assertEqual({"1", "2"}, set(self.ledger.live()))
+        other.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
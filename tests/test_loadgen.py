@@ -0,0 +1,55 @@
+import unittest
+
+from loadgen import LoadGenerator, format_report, parse_mix, schedule
+from main import BookStoreClient
+from stub_server import StubServer
+
+
+class Test(unittest.TestCase):
+
+    def test_parse_mix(self):
+        """
+        A mix is parsed into operation weights and unknown operations are rejected
+        """
+        self.assertEqual({'get_books': 60.0, 'add_book': 40.0}, parse_mix('get_books=60,add_book=40'))
+        self.assertRaises(ValueError, parse_mix, 'get_everything=1')
+
+    def test_schedule_is_open_loop(self):
+        """
+        Arrivals follow the target rate and the weighted mix, independent of responses
+        """
+        arrivals = schedule(1000, 10, {'get_books': 3, 'get_book': 1}, seed=1)
+        share = sum(1 for _, name in arrivals if name == 'get_books') / len(arrivals)
+
+        self.assertAlmostEqual(10000, len(arrivals), delta=400)
+        self.assertAlmostEqual(0.75, share, delta=0.03)
+        self.assertEqual(sorted(arrivals), arrivals)
+
+        constant = schedule(100, 1, {'get_books': 1}, arrival='constant')
+        self.assertEqual(99, len(constant))
+
+    def test_run_against_stand_in(self):
+        """
+        A short run against the local stand-in completes every scheduled request without errors
+        """
+        mix = parse_mix('get_books=40,get_book=20,add_book=20,replace_book_in_collection=10,get_user_info=10')
+        with StubServer() as server, BookStoreClient(base_url=server.base_url, catalog_ttl=None) as client:
+            generator = LoadGenerator(client, mix=mix, users=5, workers=16)
+            generator.setup()
+            try:
+                report = generator.run(rate=200, duration=1, seed=7)
+            finally:
+                generator.teardown()
+
+            self.assertEqual(1, len(server.state.users))
+
+        operations = report['operations']
+        self.assertEqual(report['scheduled'],
+                         sum(summary['count'] + summary['skipped'] for summary in operations.values()))
+        self.assertEqual(0, sum(summary['errors'] for summary in operations.values()))
+        self.assertIsNotNone(operations['get_books']['response_time_ms']['p99'])
+        self.assertIn('get_books', format_report(report))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import sys
+import tempfile
+import unittest
+
+from logging_setup import JsonFormatter, SamplingFilter, configure_logging, set_current_test, stop_logging
+from main import BookStoreClient
+from stub_server import StubServer
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "run.log")
+        self.root = logging.getLogger()
+        self.level = self.root.level
+
+    def tearDown(self):
+        stop_logging()
+        self.root.setLevel(self.level)
+        set_current_test(None)
+        self.directory.cleanup()
+
+    def read(self):
+        stop_logging()
+        with open(self.path, encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    def test_request_records_are_structured(self):
+        """
+        Client calls are logged as JSON lines with the test, endpoint, status and latency
+        """
+        configure_logging(self.path)
+        set_current_test("test_logging_setup.Test.example")
+
+        with StubServer() as server, BookStoreClient(base_url=server.base_url) as client:
+            client.get_book("9781449325862")
+        logging.getLogger("bookstore.tests").info("done")
+
+        records = [record for record in self.read() if record["logger"] in ("bookstore", "bookstore.tests")]
+        request = records[0]
+        self.assertEqual("DEBUG", request["level"])
+        self.assertEqual("test_logging_setup.Test.example", request["test"])
+        self.assertEqual("/BookStore/v1/Book", request["endpoint"])
+        self.assertEqual(200, request["status"])
+        self.assertGreaterEqual(request["latency_ms"], 0)
+        self.assertEqual("done", records[-1]["message"])
+
+    def test_debug_records_are_sampled(self):
+        """
+        Only the configured fraction of DEBUG records is written, higher levels are all kept
+        """
+        configure_logging(self.path, debug_sample_rate=0.1)
+        logger = logging.getLogger("bookstore.tests")
+        for index in range(2000):
+            logger.debug("request %d", index)
+        for index in range(50):
+            logger.warning("slow request %d", index)
+
+        records = [record for record in self.read() if record["logger"] == "bookstore.tests"]
+        levels = [record["level"] for record in records]
+        self.assertEqual(50, levels.count("WARNING"))
+        self.assertTrue(100 < levels.count("DEBUG") < 300)
+
+    def test_log_file_rotates(self):
+        """
+        The log file is rotated once it reaches its size limit
+        """
+        configure_logging(self.path, max_bytes=4096, backup_count=2)
+        for index in range(500):
+            logging.getLogger("bookstore.tests").info("line %d", index)
+        stop_logging()
+
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        self.assertTrue(os.path.exists(self.path + ".2"))
+        self.assertFalse(os.path.exists(self.path + ".3"))
+        self.assertLessEqual(os.path.getsize(self.path), 4096)
+
+    def test_exceptions_are_structured(self):
+        """
+        The traceback of a record logged through the queue is its exception field, not part of its message
+        """
+        configure_logging(self.path)
+        try:
+            raise ValueError("bad isbn")
+        except ValueError:
+            logging.getLogger("bookstore.tests").exception("adding %s failed", "9781449325862")
+
+        record = [record for record in self.read() if record["logger"] == "bookstore.tests"][0]
+        self.assertEqual("adding 9781449325862 failed", record["message"])
+        self.assertIn("ValueError: bad isbn", record["exception"])
+
+    def test_filters(self):
+        """
+        A zero rate drops sampled records and the formatter includes an exception
+        """
+        drop = SamplingFilter(0)
+        self.assertFalse(drop.filter(logging.makeLogRecord({"levelno": logging.DEBUG})))
+        self.assertTrue(drop.filter(logging.makeLogRecord({"levelno": logging.INFO})))
+
+        try:
+            raise ValueError("bad isbn")
+        except ValueError:
+            record = logging.getLogger("bookstore").makeRecord("bookstore", logging.ERROR, __file__, 1, "failed",
+                                                               None, sys.exc_info())
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual("failed", entry["message"])
+        self.assertIn("ValueError: bad isbn", entry["exception"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import unittest
+from unittest import mock
+
+import requests
+
+import models
+from models import Book, Catalog, Token, User
+from stub_server import BOOKS
+
+
+def response(status, payload):
+    message = requests.Response()
+    message.status_code = status
+    message._content = json.dumps(payload).encode('utf-8')
+    return message
+
+
+class Test(unittest.TestCase):
+
+    def test_catalog_is_decoded_lazily(self):
+        """
+        The catalog body is decoded on first use and books are built only when asked for
+        """
+        catalog = Catalog.from_response(response(200, {"books": BOOKS}))
+        self.assertIsNotNone(catalog._content)
+
+        self.assertEqual([book["isbn"] for book in BOOKS], catalog.isbns)
+        self.assertIsNone(catalog._content)
+        self.assertIsNone(catalog._books)
+        self.assertIn("9781449325862", catalog)
+
+        books = catalog.books
+        self.assertEqual(len(BOOKS), len(catalog))
+        self.assertEqual("Git Pocket Guide", books[0].title)
+        self.assertEqual("A Working Introduction", books[0].sub_title)
+        self.assertEqual(234, books[0].pages)
+        self.assertEqual(books, list(catalog))
+        self.assertEqual([book["isbn"] for book in BOOKS], catalog.isbns)
+
+    def test_user_and_book(self):
+        """
+        User info and single book responses decode into their models
+        """
+        user = User.from_response(response(200, {"userId": "id-1", "username": "validUser", "books": BOOKS[:2]}))
+        self.assertEqual("id-1", user.user_id)
+        self.assertEqual([BOOKS[0]["isbn"], BOOKS[1]["isbn"]], user.isbns)
+        self.assertEqual(Book.from_dict(BOOKS[1]), user.books[1])
+
+        created = User.from_response(response(201, {"userID": "id-2", "username": "newUser", "books": []}))
+        self.assertEqual("id-2", created.user_id)
+        self.assertEqual([], created.isbns)
+
+        book = Book.from_response(response(200, BOOKS[4]))
+        self.assertEqual(278, book.pages)
+        self.assertIsNone(Book.from_response(response(400, {"code": "1205", "message": "ISBN not available"})))
+        self.assertFalse(hasattr(book, '__dict__'))
+
+    def test_token(self):
+        """
+        A token response exposes its expiry as a timestamp, a failed one is falsy
+        """
+        token = Token.from_response(response(200, {"token": "abc", "expires": "2023-10-03T13:42:40.123Z",
+                                                   "status": "Success", "result": "User authorized successfully."}))
+        self.assertTrue(token)
+        self.assertAlmostEqual(1696340560.123, token.expires_at, places=3)
+
+        failed = Token.from_response(response(200, {"token": None, "expires": None, "status": "Failed",
+                                                    "result": "User authorization failed."}))
+        self.assertFalse(failed)
+        self.assertIsNone(failed.expires_at)
+
+    def test_without_orjson(self):
+        """
+        The standard json module is used when orjson is not installed
+        """
+        with mock.patch.object(models, 'orjson', None):
+            self.assertEqual(BOOKS[0]["isbn"], Catalog(json.dumps({"books": BOOKS})).isbns[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
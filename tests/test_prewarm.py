@@ -0,0 +1,134 @@
+import os
+import socket
+import ssl
+import threading
+import time
+import unittest
+import warnings
+from unittest import mock
+
+import requests
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+from urllib3.exceptions import InsecureRequestWarning
+
+import prewarm
+from main import BookStoreClient
+from prewarm import DNSCache, PrewarmedHTTPAdapter
+from stub_server import BOOKS, StubServer
+
+CERTIFICATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'localhost.pem')
+
+
+def _wait_for_connections(server, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while server.connections < count and time.monotonic() < deadline:
+        threading.Event().wait(0.001)
+    return server.connections
+
+
+def _tls_server():
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(CERTIFICATE)
+    return StubServer(host='localhost', ssl_context=context)
+
+
+class Test(unittest.TestCase):
+
+    def test_prewarm(self):
+        """
+        Prewarmed connections are open in the pool before the first request, which reuses one of them
+        """
+        with StubServer() as server, BookStoreClient(base_url=server.base_url) as client:
+            client.prewarm(4, wait=True)
+            self.assertEqual(4, _wait_for_connections(server, 4))
+
+            self.assertEqual(200, client.get_book(BOOKS[0]["isbn"]).status_code)
+            client.prewarm(4).join()
+            self.assertEqual(4, _wait_for_connections(server, 5, timeout=0.1))
+
+    def test_dns_cache(self):
+        """
+        New connections to a host resolve it once per time to live
+        """
+        with StubServer(host='localhost') as server:
+            adapter = PrewarmedHTTPAdapter(dns_ttl=60)
+            with mock.patch('socket.getaddrinfo', wraps=socket.getaddrinfo) as getaddrinfo:
+                self.assertEqual(3, adapter.prewarm(server.base_url, 3))
+            adapter.close()
+
+        self.assertEqual(1, getaddrinfo.call_args_list.count(mock.call('localhost', server.port, 0,
+                                                                       socket.SOCK_STREAM)))
+        self.assertEqual((2, 1), (adapter.dns_cache.hits, adapter.dns_cache.misses))
+
+    def test_dns_cache_expiry(self):
+        """
+        Addresses are resolved again once their time to live is over or after they failed to connect
+        """
+        cache = DNSCache(ttl=0)
+        with mock.patch('socket.getaddrinfo', return_value=[(socket.AF_INET, socket.SOCK_STREAM, 6, '',
+                                                             ('127.0.0.1', 80))] * 2) as getaddrinfo:
+            self.assertEqual(['127.0.0.1'], cache.resolve('bookstore', 80))
+            cache.resolve('bookstore', 80)
+            cache.ttl = 60
+            cache.resolve('bookstore', 80)
+            cache.resolve('bookstore', 80)
+            cache.invalidate('bookstore', 80)
+            cache.resolve('bookstore', 80)
+        self.assertEqual(4, getaddrinfo.call_count)
+
+    def test_tls_session_resumed(self):
+        """
+        Connections recreated after the previous ones closed resume their TLS session, and prewarmed ones stay usable
+        """
+        with _tls_server() as server, BookStoreClient(base_url=server.base_url) as client, \
+                mock.patch.dict(os.environ, {'REQUESTS_CA_BUNDLE': CERTIFICATE}):
+            self.assertEqual(200, client.get_book(BOOKS[0]["isbn"]).status_code)
+            client.close()
+            self.assertEqual(200, client.get_book(BOOKS[1]["isbn"]).status_code)
+            client.prewarm(2, wait=True)
+            for isbn in (BOOKS[2]["isbn"], BOOKS[3]["isbn"]):
+                self.assertEqual(200, client.get_book(isbn).status_code)
+
+            self.assertEqual(2, client.session.get_adapter(server.base_url).resumed)
+            self.assertEqual(3, _wait_for_connections(server, 4, timeout=0.1))
+
+    def test_tls_verification_settings(self):
+        """
+        verify=False, a custom CA bundle and the default bundle each keep their own verification, whatever ran before
+        """
+        with _tls_server() as server, BookStoreClient(base_url=server.base_url, max_retries=0) as client, \
+                mock.patch.dict(os.environ), warnings.catch_warnings():
+            os.environ.pop('REQUESTS_CA_BUNDLE', None)
+            os.environ.pop('CURL_CA_BUNDLE', None)
+            warnings.simplefilter('ignore', InsecureRequestWarning)
+
+            client.session.verify = False
+            self.assertEqual(200, client.get_book(BOOKS[0]["isbn"]).status_code)
+            client.session.verify = CERTIFICATE
+            self.assertEqual(200, client.get_book(BOOKS[1]["isbn"]).status_code)
+            for verify in (DEFAULT_CA_BUNDLE_PATH, True):
+                client.session.verify = verify
+                with self.assertRaises(requests.exceptions.SSLError):
+                    client.get_book(BOOKS[2]["isbn"])
+            client.session.verify = False
+            self.assertEqual(200, client.get_book(BOOKS[3]["isbn"]).status_code)
+
+    def test_missing_internals(self):
+        """
+        Without the urllib3 internals its hooks need, the adapter warns, prewarms nothing and still sends requests
+        """
+        with mock.patch.object(prewarm, '_MISSING_INTERNALS', ['HTTPConnection._dns_host']), \
+                self.assertLogs('bookstore.prewarm', 'WARNING') as logs, StubServer() as server, \
+                BookStoreClient(base_url=server.base_url) as client:
+            client.prewarm(4, wait=True)
+            self.assertEqual(200, client.get_book(BOOKS[0]["isbn"]).status_code)
+
+            adapter = client.session.get_adapter(server.base_url)
+            self.assertEqual((None, False), (adapter.dns_cache, adapter.tls_sessions))
+            self.assertEqual(0, adapter.prewarm(server.base_url, 2))
+            self.assertEqual(1, server.connections)
+        self.assertIn('HTTPConnection._dns_host', logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
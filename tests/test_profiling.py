@@ -0,0 +1,125 @@
+import cProfile
+import os
+import pstats
+import tempfile
+import threading
+import time
+import unittest
+
+import profiling
+from main import BookStoreClient
+from profiling import Profiler, disable_profiling, enable_profiling, profile_call, profile_test
+from stub_server import BOOKS, StubServer
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _read_collapsed(path):
+    with open(path, encoding='utf-8') as file:
+        return dict(line.rsplit(' ', 1) for line in file.read().splitlines())
+
+
+class Test(unittest.TestCase):
+
+    def tearDown(self):
+        disable_profiling()
+
+    def test_sampled_test_and_client_calls(self):
+        """
+        A profiled test writes the collapsed stacks of its own thread and of the client calls it makes from others
+        """
+        with tempfile.TemporaryDirectory() as directory, StubServer() as server:
+            enable_profiling('sample', directory, interval=0.001)
+            with BookStoreClient(base_url=server.base_url) as client:
+
+                def body():
+                    _busy(0.05)
+                    thread = threading.Thread(target=lambda: [client.get_book(BOOKS[0]["isbn"]) for _ in range(50)])
+                    thread.start()
+                    thread.join()
+
+                case = unittest.FunctionTestCase(body)
+                case.setUp = lambda: profile_test(case)
+                self.assertTrue(case.run().wasSuccessful())
+            disable_profiling()
+
+            stacks = _read_collapsed(os.path.join(directory, profiling._file_name(case.id()) + '.collapsed'))
+            self.assertTrue(all(stack.startswith(case.id() + ';') for stack in stacks))
+            self.assertTrue(any('test_profiling.py:_busy' in stack for stack in stacks))
+            self.assertTrue(any('main.py:_send' in stack for stack in stacks))
+            self.assertEqual(stacks, _read_collapsed(os.path.join(directory, 'all.collapsed')))
+
+    def test_cprofile_mode(self):
+        """
+        In cprofile mode every test also gets a pstats profile, merged into one for the whole run
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = Profiler('cprofile', directory, interval=0.001)
+            for name in ('suite.Test.test_one', 'suite.Test.test_two'):
+                profiler.begin_test(name)
+                _busy(0.01)
+                profiler.end_test()
+            profiler.close()
+
+            self.assertEqual({'suite.Test.test_one.collapsed', 'suite.Test.test_one.prof',
+                              'suite.Test.test_two.collapsed', 'suite.Test.test_two.prof',
+                              'all.collapsed', 'all.prof'}, set(os.listdir(directory)))
+            stats = pstats.Stats(os.path.join(directory, 'all.prof')).stats
+            calls = {function[2]: stat[1] for function, stat in stats.items()}
+            self.assertEqual(2, calls['_busy'])
+
+    def test_cprofile_client_calls_from_other_threads(self):
+        """
+        Calls from other threads are counted in the cProfile profile of the test, also under another profiler
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = Profiler('cprofile', directory, interval=0.001)
+
+            def worker():
+                with profiler.call():
+                    _busy(0.01)
+
+            profiler.begin_test('suite.Test.test_threads')
+            threads = [threading.Thread(target=worker) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            profiler.end_test()
+
+            other = cProfile.Profile()
+            other.enable()
+            try:
+                profiler.begin_test('suite.Test.test_under_another_profiler')
+                thread = threading.Thread(target=worker)
+                thread.start()
+                thread.join()
+                profiler.end_test()
+            finally:
+                other.disable()
+            profiler.close()
+
+            stats = pstats.Stats(os.path.join(directory, 'suite.Test.test_threads.prof')).stats
+            self.assertEqual(3, {function[2]: stat[1] for function, stat in stats.items()}['_busy'])
+            self.assertTrue(os.path.exists(os.path.join(directory,
+                                                        'suite.Test.test_under_another_profiler.collapsed')))
+            self.assertEqual({}, profiler.sampler._watched)
+
+    def test_disabled(self):
+        """
+        Without profiling enabled the hooks are no-ops and write nothing
+        """
+        self.assertIs(profile_call(), profile_call())
+        case = unittest.FunctionTestCase(lambda: None)
+        profile_test(case)
+        self.assertEqual([], case._cleanups)
+        with self.assertRaises(ValueError):
+            Profiler('perf')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from main import BookStoreClient
+from provisioning import ProvisioningError, load_manifest, provision_users
+from stub_server import StubServer
+
+
+class Test(unittest.TestCase):
+    password = "Password123!"
+
+    def setUp(self):
+        """
+        Start a fresh BookStore stand-in for every test
+        """
+        self.server = StubServer().start()
+        self.client = BookStoreClient(base_url=self.server.base_url, pool_maxsize=16)
+        self.directory = tempfile.TemporaryDirectory()
+        self.manifest = os.path.join(self.directory.name, "users.jsonl")
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+        self.directory.cleanup()
+
+    def test_provision_users(self):
+        """
+        Every user is registered, authorized and written to the manifest
+        """
+        users = list(provision_users(50, "loadUser{:03d}", self.password, client=self.client, workers=16,
+                                     manifest_path=self.manifest))
+
+        self.assertEqual(50, len(users))
+        self.assertEqual(50, len({user.user_id for user in users}))
+        for user in users:
+            self.assertEqual(200, self.client.get_user_info(user.user_id, user.token).status_code)
+        self.assertEqual({user.username for user in users}, set(load_manifest(self.manifest)))
+
+    def test_manifest_is_reused(self):
+        """
+        A second run loads completed users from the manifest without registering them again
+        """
+        first = {user.username: user for user in
+                 provision_users(10, "loadUser{:03d}", self.password, client=self.client,
+                                 manifest_path=self.manifest)}
+        second = {user.username: user for user in
+                  provision_users(10, "loadUser{:03d}", self.password, client=self.client,
+                                  manifest_path=self.manifest)}
+
+        self.assertEqual(first, second)
+        self.assertEqual(11, len(self.server.state.users))
+
+    def test_resume_after_partial_failure(self):
+        """
+        Users registered by a run that died before its manifest was written are recovered
+        """
+        for index in range(3):
+            self.client.create_new_user(f"loadUser{index:03d}", self.password)
+
+        users = list(provision_users(5, "loadUser{:03d}", self.password, client=self.client,
+                                     manifest_path=self.manifest))
+
+        self.assertEqual(5, len(users))
+        self.assertEqual(6, len(self.server.state.users))
+
+    def test_failures_are_reported(self):
+        """
+        Users that cannot be registered are reported after the others were yielded
+        """
+        provisioned = []
+        with self.assertRaises(ProvisioningError) as context:
+            for user in provision_users(3, "loadUser{:03d}", "weak", client=self.client):
+                provisioned.append(user)
+
+        self.assertEqual([], provisioned)
+        self.assertEqual(3, len(context.exception.failures))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import multiprocessing
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import requests
+
+from main import BookStoreClient
+from ratelimit import AdaptiveRateLimiter, parse_retry_after
+from stub_server import BookStoreState, StubServer
+
+
+def _throttle(limiter):
+    limiter.on_response(429)
+
+
+class Test(unittest.TestCase):
+
+    def test_bucket_paces_requests(self):
+        """
+        Once the burst is used up, tokens are handed out at the configured rate
+        """
+        limiter = AdaptiveRateLimiter(rate=50, burst=1, slow_start=False)
+        started = time.perf_counter()
+        for _ in range(21):
+            limiter.acquire()
+        elapsed = time.perf_counter() - started
+
+        self.assertGreater(elapsed, 0.35)
+        self.assertLess(elapsed, 0.6)
+
+    def test_rate_adapts(self):
+        """
+        Throttling halves the rate once per cooldown, successful responses double it until then and
+        raise it additively after
+        """
+        limiter = AdaptiveRateLimiter(rate=100, min_rate=10, cooldown=60)
+        limiter.on_response(429)
+        limiter.on_response(503)
+        self.assertEqual(50, limiter.rate)
+        self.assertEqual(2, limiter.throttled)
+
+        for _ in range(50):
+            limiter.on_response(200)
+        self.assertAlmostEqual(51, limiter.rate, delta=0.05)
+
+        limiter = AdaptiveRateLimiter(rate=10, max_rate=40)
+        for _ in range(10):
+            limiter.on_response(200)
+        self.assertEqual(20, limiter.rate)
+        for _ in range(30):
+            limiter.on_response(200)
+        self.assertEqual(40, limiter.rate)
+
+        limiter = AdaptiveRateLimiter(rate=12, min_rate=10, cooldown=0)
+        limiter.on_response(429)
+        self.assertEqual(10, limiter.rate)
+
+    def test_retry_after_pauses(self):
+        """
+        A Retry-After holds back every request until the server asked to be contacted again
+        """
+        limiter = AdaptiveRateLimiter(rate=1000)
+        limiter.on_response(429, retry_after=0.2)
+        started = time.perf_counter()
+        limiter.acquire()
+
+        self.assertGreaterEqual(time.perf_counter() - started, 0.19)
+        self.assertEqual(5, parse_retry_after("5"))
+        self.assertEqual(0, parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"))
+        self.assertIsNone(parse_retry_after("soon"))
+
+    def test_shared_between_processes(self):
+        """
+        A shared limiter sees the throttling observed by another process
+        """
+        limiter = AdaptiveRateLimiter(rate=80, shared=True)
+        process = multiprocessing.Process(target=_throttle, args=(limiter,))
+        process.start()
+        process.join()
+
+        self.assertEqual(40, limiter.rate)
+        self.assertEqual(1, limiter.throttled)
+
+    def test_client_retries_idempotent_operations(self):
+        """
+        Throttled reads are retried until they succeed, other operations are returned as they are
+        """
+        state = BookStoreState(rate_limit=20, retry_after=None)
+        with StubServer(state=state) as server:
+            limiter = AdaptiveRateLimiter(rate=200, max_rate=200)
+            with BookStoreClient(base_url=server.base_url, rate_limiter=limiter, throttle_retries=20) as client:
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    statuses = list(executor.map(lambda _: client.get_book("9781449325862").status_code, range(40)))
+
+                self.assertEqual([200] * 40, statuses)
+                self.assertGreater(state.throttled, 0)
+                self.assertLess(limiter.rate, 200)
+
+                state.rate_limit, state._allowance = 1, 0
+                throttled = state.throttled
+                self.assertEqual(429, client.is_authorized("existingUser", "ExistingUserPassword123!").status_code)
+                self.assertEqual(throttled + 1, state.throttled)
+
+    def test_throttled_streams_are_closed(self):
+        """
+        A throttled streamed read is closed before it is retried, so its connection goes back to the pool
+        """
+        state = BookStoreState(rate_limit=1, retry_after=None)
+        with StubServer(state=state) as server:
+            with BookStoreClient(base_url=server.base_url, catalog_ttl=None, throttle_retries=50) as client:
+                state._allowance = 0
+                with mock.patch.object(requests.Response, 'close', autospec=True,
+                                       side_effect=requests.Response.close) as close:
+                    self.assertEqual(8, sum(1 for _ in client.stream_books()))
+
+        self.assertGreater(state.throttled, 0)
+        self.assertEqual(state.throttled, sum(response.status_code == 429 for (response,), _ in close.call_args_list))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,55 +1,81 @@
 import unittest
 import logging
+import uuid
+from logging_setup import configure_test_logging, set_current_test
+from profiling import profile_test
 from main import create_new_user, delete_user
 
+configure_test_logging("test_registration.log")
+
+
+def unique_username(intent):
+    """
+    Username no other test case, worker or run registers, with the intent of the case still readable
+    :param      intent:     Readable part of the username, e.g. validUser
+    :return:    username:   The intent followed by a random hex suffix
+    """
+    return f"{intent}_{uuid.uuid4().hex}"
+
 
 class Test(unittest.TestCase):
-    username = ""
-    password = ""
-    user_id = ""
-    bearerToken = ""
-
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s %(levelname)s %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        handlers=[logging.FileHandler(filename="test_registration.log", encoding='utf-8')]
-    )
 
-    def tearDown(self):
+    def setUp(self):
         """
-        Deleting successful registrations
+        Every case starts with its own credentials and its own list of users to clean up
         """
-        logging.info(f"TearDown")
+        set_current_test(self.id())
+        profile_test(self)
+        self.username = ""
+        self.password = ""
+        self.user_id = ""
+        self.registered = []
 
+    def register(self, username, password):
         """
-        Check if the user you want to delete exists
+        Register a user a case needs to exist beforehand, deleted again in tearDown
+        :param      username:   Username to register with
+        :param      password:   Password to register with
         """
-        response = delete_user(self.user_id, self.username, self.password)
-        status_code = response.status_code
+        response = create_new_user(username, password)
+        self.assertEqual(201, response.status_code)
+        self.registered.append((response.json()["userID"], username, password))
 
-        if status_code == 204:
-            logging.info(f"Response: {status_code} \n"
-                         f"Deleted user with: \n"
-                         f"username     {self.username} \n"
-                         f"password     {self.password} \n"
-                         f"userId:      {self.user_id} \n")
+    def tearDown(self):
+        """
+        Deleting successful registrations
+        """
+        logging.info(f"TearDown")
 
-        else:
+        users = list(self.registered)
+        if self.user_id:
+            users.append((self.user_id, self.username, self.password))
+        if not users:
             logging.info("No need to delete an account \n")
 
+        for user_id, username, password in users:
+            response = delete_user(user_id, username, password)
+            status_code = response.status_code
+
+            if status_code == 204:
+                logging.info(f"Response: {status_code} \n"
+                             f"Deleted user with: \n"
+                             f"username     {username} \n"
+                             f"password     {password} \n"
+                             f"userId:      {user_id} \n")
+
     def test_user_exists(self):
         """
         Test registration with existing credentials
         """
         logging.info("Starting test registration with existing credentials")
 
-        username = "existingUser"
+        username = unique_username("existingUser")
         password = "ExistingUserPassword123!"
+        self.register(username, password)
 
         logging.info(f"Testing with:\n"
-                     f"username:     {self.username} \n"
-                     f"password:     {self.password} \n")
+                     f"username:     {username} \n"
+                     f"password:     {password} \n")
         try:
             response = create_new_user(username, password)
             status_code = response.status_code
@@ -69,8 +95,9 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test registration with existing username")
 
-        self.username = "existingUser"
+        self.username = unique_username("existingUser")
         self.password = "ExistingUser123!"
+        self.register(self.username, "ExistingUserPassword123!")
 
         logging.info(f"Testing with:\n"
                      f"username:     {self.username} \n"
@@ -108,7 +135,7 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test registration with Password without digits")
 
-        self.username = "invalidNewUser"
+        self.username = unique_username("invalidNewUser")
         self.password = "Password!"
 
         logging.info(f"Testing with:\n"
@@ -124,7 +151,7 @@ class Test(unittest.TestCase):
             logging.info('\n')
         except AssertionError:
             message = response.json()
-            self.user_id = message["userId"]
+            self.user_id = message["userID"]
 
             logging.error("Error in testing registration with a password with no digit!")
             logging.error('\n')
@@ -136,7 +163,7 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test registration with short password")
 
-        self.username = "invalidNewUser"
+        self.username = unique_username("invalidNewUser")
         self.password = "Pass12!"
 
         logging.info(f"Testing with:\n"
@@ -152,7 +179,7 @@ class Test(unittest.TestCase):
             logging.info('\n')
         except AssertionError:
             message = response.json()
-            self.user_id = message["userId"]
+            self.user_id = message["userID"]
 
             logging.error("Error in testing registration with a short password!")
             logging.error('\n')
@@ -164,7 +191,7 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test registration with password without uppercase letters")
 
-        self.username = "invalidNewUser"
+        self.username = unique_username("invalidNewUser")
         self.password = "password123!"
 
         logging.info(f"Testing with:\n"
@@ -180,7 +207,7 @@ class Test(unittest.TestCase):
             logging.info('\n')
         except AssertionError:
             message = response.json()
-            self.user_id = message["userId"]
+            self.user_id = message["userID"]
 
             logging.error("Error in testing registration with a password with no uppercase letters!")
             logging.error('\n')
@@ -192,7 +219,7 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test registration with password without lowercase letters")
 
-        self.username = "invalidNewUser"
+        self.username = unique_username("invalidNewUser")
         self.password = "PASSWORD123!"
 
         logging.info(f"Testing with:\n"
@@ -208,7 +235,7 @@ class Test(unittest.TestCase):
             logging.info('\n')
         except AssertionError:
             message = response.json()
-            self.user_id = message["userId"]
+            self.user_id = message["userID"]
 
             logging.error("Error in testing registration with a password with no lowercase letters!")
             logging.error('\n')
@@ -220,7 +247,7 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test registration with password without special characters")
 
-        self.username = "invalidNewUser"
+        self.username = unique_username("invalidNewUser")
         self.password = "Password123"
 
         logging.info(f"Testing with:\n"
@@ -236,7 +263,7 @@ class Test(unittest.TestCase):
             logging.info('\n')
         except AssertionError:
             message = response.json()
-            self.user_id = message["userId"]
+            self.user_id = message["userID"]
 
             logging.error("Error in testing registration with a password with no special character!")
             logging.error('\n')
@@ -248,7 +275,7 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test registration with empty password")
 
-        self.username = "invalidNewUser"
+        self.username = unique_username("invalidNewUser")
         self.password = ""
 
         logging.info(f"Testing with:\n"
@@ -264,7 +291,7 @@ class Test(unittest.TestCase):
             logging.info('\n')
         except AssertionError:
             message = response.json()
-            self.user_id = message["userId"]
+            self.user_id = message["userID"]
 
             logging.error("Error in testing registration with empty password!")
             logging.error('\n')
@@ -276,7 +303,7 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test registration with password with '()/+-*=_' as a special characters")
 
-        self.username = "invalidNewUser"
+        self.username = unique_username("invalidNewUser")
         self.password = "Password123()/+-*=_"
 
         logging.info(f"Testing with:\n"
@@ -289,7 +316,7 @@ class Test(unittest.TestCase):
             self.assertEqual(201, status_code)
 
             message = response.json()
-            self.user_id = message["userId"]
+            self.user_id = message["userID"]
 
             logging.info("Test successful. User was registered. Password with '()/+-*=_' as a special character!")
             logging.info('\n')
@@ -312,7 +339,7 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test registration with username entirely in cyrillic")
 
-        self.username = "валидноИме"
+        self.username = unique_username("валидноИме")
         self.password = "Password123!"
 
         logging.info(f"Testing with:\n"
@@ -343,7 +370,7 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test registration with username with mixed alphabets")
 
-        self.username = "валидноUsername"
+        self.username = unique_username("валидноUsername")
         self.password = "Password123!"
 
         logging.info(f"Testing with:\n"
@@ -374,7 +401,7 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test registration with password entirely in cyrillic")
 
-        self.username = "validUsername"
+        self.username = unique_username("validUsername")
         self.password = "Парола123!"
 
         logging.info(f"Testing with:\n"
@@ -390,7 +417,7 @@ class Test(unittest.TestCase):
             logging.info('\n')
         except AssertionError:
             message = response.json()
-            self.user_id = message["userId"]
+            self.user_id = message["userID"]
 
             logging.error("Error, a password without [a-z,A-Z] letters was accepted!")
             logging.error('\n')
@@ -402,7 +429,7 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test registration with password with mixed alphabet")
 
-        self.username = "validUsername"
+        self.username = unique_username("validUsername")
         self.password = "PasswordПарола123!"
 
         logging.info(f"Testing with:\n"
@@ -430,7 +457,7 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test registration with a long valid password")
 
-        self.username = "invalidNewUser"
+        self.username = unique_username("invalidNewUser")
         self.password = "validPassword123!" * 20
 
         logging.info(f"Testing with:\n"
@@ -443,10 +470,7 @@ class Test(unittest.TestCase):
             self.assertEqual(201, status_code)
 
             message = response.json()
-            self.userId = message["userID"]
-
-            message = response.json()
-            self.user_id = message["userId"]
+            self.user_id = message["userID"]
 
             logging.info("Long valid password accepted")
             logging.info('\n')
@@ -483,7 +507,7 @@ class Test(unittest.TestCase):
             logging.info('\n')
         except AssertionError:
             message = response.json()
-            self.user_id = message["userId"]
+            self.user_id = message["userID"]
 
             logging.error("Error in testing registration with empty username and password!")
             logging.error('\n')
@@ -511,7 +535,7 @@ class Test(unittest.TestCase):
             logging.info('\n')
         except AssertionError:
             message = response.json()
-            self.user_id = message(["userId"])
+            self.user_id = message["userID"]
 
             logging.error("Error in testing registration with empty username and password!")
             logging.error('\n')
@@ -523,7 +547,7 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test registration with valid credentials")
 
-        self.username = "validUser"
+        self.username = unique_username("validUser")
         self.password = "Password123!"
 
         logging.info(f"Testing with:\n"
@@ -557,9 +581,9 @@ class Test(unittest.TestCase):
 
             self.assertNotEqual(201, status_code)
 
-            logging.info("Success in test with newly created valid existing credentials: username = 'validUser', "
-                         "password = 'Number123!'. "
-                         "User exists!")
+            logging.info(f"Success in test with newly created valid existing credentials: "
+                         f"username = '{self.username}', password = '{self.password}'. "
+                         f"User exists!")
             logging.info('\n')
         except AssertionError:
             logging.error("Error in test with newly created valid existing credentials! User does Not exist, "
@@ -0,0 +1,99 @@
+import time
+import unittest
+
+from main import BookStoreClient
+from replicas import ReplicaPool
+from stub_server import StubServer
+
+
+class Test(unittest.TestCase):
+    password = "Password123!"
+
+    def setUp(self):
+        """
+        Start three independent BookStore stand-ins
+        """
+        self.servers = [StubServer().start() for _ in range(3)]
+        self.urls = [server.base_url for server in self.servers]
+
+    def tearDown(self):
+        for server in self.servers:
+            server.stop()
+
+    def test_round_robin(self):
+        """
+        Requests without affinity are spread evenly over the replicas
+        """
+        pool = ReplicaPool(self.urls)
+        with BookStoreClient(replicas=pool, catalog_ttl=None) as client:
+            for _ in range(30):
+                self.assertEqual(200, client.get_book("9781449325862").status_code)
+
+        self.assertEqual([10, 10, 10], [replica.requests for replica in pool.replicas])
+        self.assertEqual([0, 0, 0], [replica.outstanding for replica in pool.replicas])
+
+    def test_users_are_sticky(self):
+        """
+        Every request about a user goes to the replica that created it, the only one that knows it
+        """
+        pool = ReplicaPool(self.urls, policy='least_outstanding')
+        with BookStoreClient(replicas=pool, catalog_ttl=None) as client:
+            for index in range(6):
+                username = f"stickyUser{index}"
+                user_id = client.create_new_user(username, self.password).json()["userID"]
+                token = client.get_token(username, self.password)
+                self.assertEqual(1, sum(user_id in server.state.users for server in self.servers))
+
+                self.assertEqual(201, client.add_book(user_id, [{"isbn": "9781449325862"}], token).status_code)
+                self.assertEqual(200, client.get_user_info(user_id, token).status_code)
+                self.assertEqual(204, client.delete_user(user_id, username, self.password).status_code)
+                self.assertIsNone(pool.replica_of(user_id))
+
+        self.assertTrue(all(replica.requests > 0 for replica in pool.replicas))
+
+    def test_policies(self):
+        """
+        least_outstanding avoids busy replicas and ewma prefers the fastest one
+        """
+        pool = ReplicaPool(self.urls, policy='least_outstanding')
+        busy = [pool.select(), pool.select()]
+        self.assertNotEqual(busy[0], busy[1])
+        self.assertNotIn(pool.select(), busy)
+
+        pool = ReplicaPool(self.urls, policy='ewma')
+        for replica, seconds in zip(pool.replicas, (0.05, 0.01, 0.025)):
+            replica.outstanding += 1
+            pool.finish(replica, seconds)
+        self.assertEqual(pool.replicas[1], pool.select())
+        self.assertEqual(pool.replicas[1], pool.select())
+        self.assertEqual(pool.replicas[2], pool.select())
+
+    def test_ejection_and_probe(self):
+        """
+        A failing replica is ejected, probed after a while and taken back in once healthy
+        """
+        healthy = {"value": False}
+        pool = ReplicaPool(self.urls, eject_after=2, eject_for=0.05, probe=lambda url: healthy["value"])
+        failing = pool.replicas[0]
+        for _ in range(2):
+            failing.outstanding += 1
+            pool.finish(failing, 1.0, failed=True)
+
+        self.assertTrue(failing.ejected)
+        self.assertNotIn(failing, [pool.select() for _ in range(10)])
+
+        time.sleep(0.1)
+        pool.select()
+        time.sleep(0.05)
+        self.assertTrue(failing.ejected)
+
+        healthy["value"] = True
+        time.sleep(0.1)
+        pool.select()
+        time.sleep(0.05)
+        self.assertFalse(failing.ejected)
+        self.assertIn(failing, [pool.select() for _ in range(3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+from scheduling import DurationHistory, Result, partition, schedule
+
+
+class Test(unittest.TestCase):
+
+    def test_history(self):
+        """
+        Durations are the median of the last results of a test, and a failure among them marks it as recently failing
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            with DurationHistory(os.path.join(directory, 'tests.sqlite'), window=3) as history:
+                history.record([Result('a', 9.0, 'failed'), Result('b', 1.0, 'passed')])
+                history.record([Result('a', 2.0, 'passed'), Result('b', 1.0, 'failed')])
+                failing = history.record([Result('a', 3.0, 'passed'), Result('b', 5.0, 'failed')])
+                history.record([Result('a', 4.0, 'passed'), Result('b', 0.0, 'skipped')])
+
+                self.assertEqual({'a': 3.0, 'b': 1.0}, history.durations())
+                self.assertEqual({'b': failing}, history.failures())
+
+    def test_history_is_pruned(self):
+        """
+        Only the last results of a test are kept, and runs left without results are deleted
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            with DurationHistory(os.path.join(directory, 'tests.sqlite'), window=2, keep=3) as history:
+                for duration in (1.0, 2.0, 3.0, 4.0, 5.0):
+                    history.record([Result('a', duration, 'passed')])
+                history.record([Result('b', 1.0, 'failed')])
+
+                self.assertEqual([(3.0,), (4.0,), (5.0,)], history.connection.execute(
+                    "SELECT duration FROM results WHERE test_id = 'a' ORDER BY run_id").fetchall())
+                self.assertEqual(4, history.connection.execute('SELECT COUNT(*) FROM runs').fetchone()[0])
+                self.assertEqual({'a': 4.5, 'b': 1.0}, history.durations())
+
+    def test_schedule(self):
+        """
+        Recently failing groups run first, latest and shortest first, then the rest longest first, groups in order
+        """
+        durations = {'slow': 10.0, 'fast': 1.0, 'Case.one': 3.0, 'Case.two': 4.0, 'broken': 8.0, 'flaky': 0.5}
+        tests = ['fast', 'Case.one', 'new', 'broken', 'slow', 'Case.two', 'flaky']
+        order = schedule(tests, durations, {'broken': 7, 'flaky': 7, 'Case.two': 2},
+                         group=lambda test: test.partition('.')[0])
+
+        self.assertEqual(['flaky', 'broken', 'Case.one', 'Case.two', 'slow', 'new', 'fast'], order)
+        self.assertEqual(['slow', 'broken', 'Case.two', 'new', 'Case.one', 'fast', 'flaky'],
+                         schedule(tests, durations))
+        self.assertEqual(tests, schedule(tests, {}))
+
+    def test_partition(self):
+        """
+        Longest-processing-time assignment balances the expected load of the workers
+        """
+        durations = {'a': 7.0, 'b': 5.0, 'c': 4.0, 'd': 3.0, 'e': 3.0, 'f': 2.0}
+        assigned, makespan = partition(list(durations), durations, 2)
+
+        self.assertEqual([['a', 'd', 'f'], ['b', 'c', 'e']], assigned)
+        self.assertEqual(12.0, makespan)
+        self.assertEqual(24.0, partition(list(durations), durations, 1)[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import gc
+import json
+import random
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from main import BookStoreClient
+from stats import LatencyHistogram, StatsRegistry
+from stub_server import StubServer
+
+
+class Test(unittest.TestCase):
+
+    def test_small_values_are_exact(self):
+        """
+        Latencies below 128us are counted exactly
+        """
+        histogram = LatencyHistogram()
+        for value in range(1, 101):
+            histogram.record(value)
+
+        self.assertEqual(50, histogram.percentile(0.5))
+        self.assertEqual(99, histogram.percentile(0.99))
+        self.assertEqual(100, histogram.percentile(1.0))
+        self.assertIsNone(LatencyHistogram().percentile(0.5))
+
+    def test_relative_error_is_bounded(self):
+        """
+        Percentiles of large latencies are within the bucket precision of the exact value
+        """
+        generator = random.Random(3)
+        values = sorted(int(generator.lognormvariate(10, 1.5)) for _ in range(20000))
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+
+        for fraction in (0.5, 0.9, 0.99, 0.999):
+            exact = values[int(fraction * len(values)) - 1]
+            self.assertAlmostEqual(exact, histogram.percentile(fraction), delta=exact / 64 + 1)
+        self.assertLess(len(histogram.counts), 2000)
+
+    def test_merge(self):
+        first, second, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for value in range(0, 100000, 7):
+            (first if value % 2 else second).record(value)
+            both.record(value)
+
+        first.merge(second)
+
+        self.assertEqual(both.counts, first.counts)
+        self.assertEqual((both.count, both.min, both.max), (first.count, first.min, first.max))
+
+    def test_registry_merges_threads(self):
+        """
+        Calls recorded from many threads are all in the snapshot
+        """
+        registry = StatsRegistry()
+
+        def record():
+            for _ in range(1000):
+                registry.record('GET', '/BookStore/v1/Books', 200, 0.002)
+
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        [thread.start() for thread in threads]
+        [thread.join() for thread in threads]
+
+        histogram = registry.snapshot()[('GET', '/BookStore/v1/Books', 200)]
+        self.assertEqual(8000, histogram.count)
+        self.assertAlmostEqual(2000, histogram.percentile(0.5), delta=2000 / 64)
+
+    def test_exited_threads_are_retired(self):
+        """
+        The histograms of exited threads are folded together instead of being kept per thread
+        """
+        registry = StatsRegistry()
+        for _ in range(20):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda _: registry.record('GET', '/BookStore/v1/Books', 200, 0.002), range(40)))
+        gc.collect()
+
+        self.assertEqual({}, registry._shards)
+        self.assertEqual(800, registry.snapshot()[('GET', '/BookStore/v1/Books', 200)].count)
+        registry.record('GET', '/BookStore/v1/Books', 200, 0.002)
+        self.assertEqual(801, registry.snapshot()[('GET', '/BookStore/v1/Books', 200)].count)
+        registry.reset()
+        self.assertEqual({}, registry.snapshot())
+
+    def test_client_records_endpoints(self):
+        """
+        Client calls are recorded per endpoint template and status code and exported as JSON
+        """
+        registry = StatsRegistry()
+        with StubServer() as server, BookStoreClient(base_url=server.base_url, stats=registry) as client:
+            user_id = client.create_new_user("statsUser", "Password123!").json()["userID"]
+            client.get_user_info(user_id, "invalid")
+            client.get_user_info("other", "invalid")
+
+        entries = {(entry['method'], entry['endpoint'], entry['status']): entry
+                   for entry in json.loads(registry.to_json())['endpoints']}
+
+        self.assertEqual(1, entries[('POST', '/Account/v1/User', 201)]['count'])
+        self.assertEqual(2, entries[('GET', '/Account/v1/User/{userId}', 401)]['count'])
+        self.assertIsNotNone(entries[('GET', '/Account/v1/User/{userId}', 401)]['p99_ms'])
+
+
+if __name__ == '__main__':
+    unittest.main()
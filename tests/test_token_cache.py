@@ -0,0 +1,135 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from main import BookStoreClient
+from stub_server import StubServer
+from token_cache import TokenCache, parse_expires
+
+
+class FakeResponse:
+    def __init__(self, status_code, message=None):
+        self.status_code = status_code
+        self.message = message
+
+    def json(self):
+        return self.message
+
+
+def expires_in(seconds):
+    return (datetime.now(timezone.utc) + timedelta(seconds=seconds)).isoformat().replace('+00:00', 'Z')
+
+
+class Test(unittest.TestCase):
+    username = "tokenUser"
+    password = "Password123!"
+
+    def setUp(self):
+        self.calls = 0
+        self.lifetime = 3600
+
+    def fetch(self, username, password):
+        self.calls += 1
+        time.sleep(0.05)
+        return FakeResponse(200, {"token": f"token-{self.calls}", "expires": expires_in(self.lifetime)})
+
+    def test_parse_expires(self):
+        """
+        The 'expires' field of GenerateToken is parsed as UTC
+        """
+        self.assertEqual(0, parse_expires("1970-01-01T00:00:00.000Z"))
+        self.assertIsNone(parse_expires(None))
+        self.assertIsNone(parse_expires("not a date"))
+
+    def test_token_is_reused(self):
+        """
+        A cached token is returned without calling GenerateToken again
+        """
+        cache = TokenCache()
+
+        self.assertEqual("token-1", cache.get(self.username, self.password, self.fetch))
+        self.assertEqual("token-1", cache.get(self.username, self.password, self.fetch))
+        self.assertEqual(1, self.calls)
+
+    def test_other_password_is_not_served(self):
+        """
+        A token is only served for the password it was generated with
+        """
+        cache = TokenCache()
+        cache.get(self.username, self.password, self.fetch)
+
+        self.assertEqual("token-2", cache.get(self.username, "Other123!", self.fetch))
+
+    def test_refresh_before_expiry(self):
+        """
+        A token within the refresh margin of its expiry is regenerated
+        """
+        cache = TokenCache(refresh_margin=60)
+        self.lifetime = 30
+
+        cache.get(self.username, self.password, self.fetch)
+
+        self.assertEqual("token-2", cache.get(self.username, self.password, self.fetch))
+
+    def test_single_flight(self):
+        """
+        Concurrent callers for the same user cause a single GenerateToken call
+        """
+        cache = TokenCache()
+        tokens = []
+
+        threads = [threading.Thread(target=lambda: tokens.append(cache.get(self.username, self.password, self.fetch)))
+                   for _ in range(20)]
+        [thread.start() for thread in threads]
+        [thread.join() for thread in threads]
+
+        self.assertEqual(1, self.calls)
+        self.assertEqual({"token-1"}, set(tokens))
+
+    def test_refresh_once_on_401(self):
+        """
+        A rejected cached token is regenerated and the operation retried once
+        """
+        cache = TokenCache()
+        cache.get(self.username, self.password, self.fetch)
+        used = []
+
+        def operation(token):
+            used.append(token)
+            return FakeResponse(401 if token == "token-1" else 204)
+
+        response = cache.call(self.username, self.password, self.fetch, operation)
+
+        self.assertEqual(204, response.status_code)
+        self.assertEqual(["token-1", "token-2"], used)
+
+    def test_persisted_across_instances(self):
+        """
+        Tokens written to disk are reused by a new cache
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tokens.json")
+            TokenCache(path=path).get(self.username, self.password, self.fetch)
+
+            self.assertEqual("token-1", TokenCache(path=path).get(self.username, self.password, self.fetch))
+            self.assertEqual(1, self.calls)
+
+    def test_delete_user_reuses_token(self):
+        """
+        Deleting a user after get_token does not generate another token
+        """
+        with StubServer() as server, BookStoreClient(base_url=server.base_url) as client:
+            user_id = client.create_new_user(self.username, self.password).json()["userID"]
+            client.get_token(self.username, self.password)
+
+            response = client.delete_user(user_id, self.username, self.password)
+
+            self.assertEqual(204, response.status_code)
+            self.assertEqual(1, client.tokens.fetches)
+
+
+if __name__ == '__main__':
+    unittest.main()
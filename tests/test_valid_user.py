@@ -1,7 +1,14 @@
+import os
 import random
 import unittest
 import logging
-from main import create_new_user, generate_token, is_authorized, delete_user, add_book, get_books, get_book, remove_book_from_collection, get_user_info, replace_book_in_collection
+from logging_setup import configure_test_logging, set_current_test
+from profiling import profile_test
+from fixtures import FixtureGraph
+from models import Catalog, User
+from main import create_new_user, get_token, is_authorized, delete_user, add_book, get_books, get_book, remove_book_from_collection, get_user_info, replace_book_in_collection
+
+configure_test_logging("test_valid_user.log")
 
 
 class Test(unittest.TestCase):
@@ -13,24 +20,51 @@ class Test(unittest.TestCase):
     isbn_random1 = ""
     isbn_random2 = ""
     available_books = []
-
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s %(levelname)s %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        filename="test_valid_user.log"
-    )
+    fixtures = None
+    rng = None
 
     @classmethod
     def setUpClass(self):
         """
         Create new valid user
         Set userId and Bearer token
+        Load the catalog and choose random isbns, alongside the user
         """
+        # Own generator, seeded for repeatable picks without touching the random state of other tests
+        self.rng = random.Random(os.environ.get("BOOKSTORE_RANDOM_SEED"))
+        set_current_test(f"{self.__module__}.{self.__qualname__}.setUpClass")
+
         logging.info("SetUpClass: \n"
                      f"username:    {self.username} \n"
                      f"password:    {self.password} \n")
 
+        self.fixtures = FixtureGraph()
+        self.fixtures.add("user_id", self.register_user, teardown=self.remove_user)
+        self.fixtures.add("token", self.generate_token, requires=["user_id"])
+        self.fixtures.add("catalog", self.load_catalog)
+        self.fixtures.add("isbns", self.choose_isbns, requires=["catalog"])
+        self.fixtures.setup()
+
+        logging.info("Fixtures set up: \n"
+                     f"{self.fixtures.report()}")
+
+    @classmethod
+    def tearDownClass(self):
+        set_current_test(f"{self.__module__}.{self.__qualname__}.tearDownClass")
+        self.fixtures.teardown()
+
+        logging.info("Fixtures torn down: \n"
+                     f"{self.fixtures.report()}")
+
+    def setUp(self):
+        set_current_test(self.id())
+        profile_test(self)
+
+    @classmethod
+    def register_user(self):
+        """
+        Create new valid user
+        """
         response = create_new_user(self.username, self.password)
         message = response.json()
 
@@ -38,50 +72,55 @@ class Test(unittest.TestCase):
 
         logging.info("Valid User was registered \n"
                      f"userId:      {self.user_id}")
+        return self.user_id
 
+    @classmethod
+    def generate_token(self, user_id):
         """ 
         Generate Token
         """
-        response = generate_token(self.username, self.password)
-        message = response.json()
-
-        self.bearerToken = message["token"]
+        self.bearerToken = get_token(self.username, self.password)
 
         logging.info("Generate Token! \n"
                      f"token:    {self.bearerToken}")
+        return self.bearerToken
 
+    @classmethod
+    def load_catalog(self):
         """
         Initialize book list
         """
         response = get_books()
-        books = response.json()["books"]
-        [self.available_books.append(book["isbn"]) for book in books]
+        self.available_books = Catalog.from_response(response).isbns
 
         self.available_books.remove("9781449325862")
+        return self.available_books
 
+    @classmethod
+    def choose_isbns(self, catalog):
         """
         Choose random isbn
         """
-        self.isbn_random1 = random.choice(self.available_books)
-        self.available_books.remove(self.isbn_random1)
+        self.isbn_random1 = self.rng.choice(catalog)
+        catalog.remove(self.isbn_random1)
 
-        self.isbn_random2 = random.choice(self.available_books)
-        self.available_books.remove(self.isbn_random2)
+        self.isbn_random2 = self.rng.choice(catalog)
+        catalog.remove(self.isbn_random2)
 
         logging.info("Initializing book list and chosen isbns")
         logging.info('\n')
+        return self.isbn_random1, self.isbn_random2
 
     @classmethod
-    def tearDownClass(self):
-
-        response = delete_user(self.user_id, self.username, self.password)
+    def remove_user(self, user_id):
+        response = delete_user(user_id, self.username, self.password)
         status_code = response.status_code
 
         logging.info(f"TearDownClass: {status_code} "
                      f"Deleted user with: \n"
                      f"username     {self.username} \n"
                      f"password     {self.password} \n"
-                     f"userId:      {self.user_id} \n")
+                     f"userId:      {user_id} \n")
 
     def test_user_registered(self):
         """
@@ -150,13 +189,9 @@ class Test(unittest.TestCase):
             response = get_user_info(self.user_id, self.bearerToken)
             status_code = response.status_code
 
-            message = response.json()
-
             self.assertEqual(200, status_code)
 
-            books = message["books"]
-            user_collection = []
-            [user_collection.append(book["isbn"]) for book in books]
+            user_collection = User.from_response(response).isbns
 
             self.assertEqual(True, self.isbn in user_collection)
 
@@ -167,11 +202,7 @@ class Test(unittest.TestCase):
             raise
 
         response = get_user_info(self.user_id, self.bearerToken)
-        message = response.json()
-
-        books = message["books"]
-        user_collection = []
-        [user_collection.append(book["isbn"]) for book in books]
+        user_collection = User.from_response(response).isbns
         logging.info(f"\n"
                      f"username:    {self.username}\n"
                      f"books:       {user_collection}\n")
@@ -205,13 +236,9 @@ class Test(unittest.TestCase):
             response = get_user_info(self.user_id, self.bearerToken)
             status_code = response.status_code
 
-            message = response.json()
-
             self.assertEqual(200, status_code)
 
-            books = message["books"]
-            user_collection = []
-            [user_collection.append(book["isbn"]) for book in books]
+            user_collection = User.from_response(response).isbns
 
             self.assertEqual(True, self.isbn_random1 in user_collection)
             self.assertEqual(True, self.isbn_random2 in user_collection)
@@ -223,11 +250,7 @@ class Test(unittest.TestCase):
             raise
 
         response = get_user_info(self.user_id, self.bearerToken)
-        message = response.json()
-
-        books = message["books"]
-        user_collection = []
-        [user_collection.append(book["isbn"]) for book in books]
+        user_collection = User.from_response(response).isbns
         logging.info(f"\n"
                      f"username:    {self.username}\n"
                      f"books:       {user_collection}\n")
@@ -238,15 +261,11 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test - switching the first book in collection with another one from the store")
 
-        isbn_not_in_collection = random.choice(self.available_books)
+        isbn_not_in_collection = self.rng.choice(self.available_books)
         self.available_books.remove(isbn_not_in_collection)
 
         response = get_user_info(self.user_id, self.bearerToken)
-        message = response.json()
-
-        books = message["books"]
-        user_collection = []
-        [user_collection.append(book["isbn"]) for book in books]
+        user_collection = User.from_response(response).isbns
 
         replace_isbn = user_collection[0]
 
@@ -256,10 +275,7 @@ class Test(unittest.TestCase):
 
             self.assertEqual(200, status_code)
 
-            message = response.json()
-            books = message["books"]
-            user_collection = []
-            [user_collection.append(book["isbn"]) for book in books]
+            user_collection = User.from_response(response).isbns
 
             self.assertEqual(True, isbn_not_in_collection in user_collection)
             self.assertEqual(False, replace_isbn in user_collection)
@@ -274,11 +290,7 @@ class Test(unittest.TestCase):
             raise
 
         response = get_user_info(self.user_id, self.bearerToken)
-        message = response.json()
-
-        books = message["books"]
-        user_collection = []
-        [user_collection.append(book["isbn"]) for book in books]
+        user_collection = User.from_response(response).isbns
         logging.info(f"\n"
                      f"username:    {self.username}\n"
                      f"books:       {user_collection}\n")
@@ -306,11 +318,7 @@ class Test(unittest.TestCase):
             raise
 
         response = get_user_info(self.user_id, self.bearerToken)
-        message = response.json()
-
-        books = message["books"]
-        user_collection = []
-        [user_collection.append(book["isbn"]) for book in books]
+        user_collection = User.from_response(response).isbns
         logging.info(f"\n"
                      f"username:    {self.username}\n"
                      f"books:       {user_collection}\n")
@@ -339,11 +347,7 @@ class Test(unittest.TestCase):
             raise
 
         response = get_user_info(self.user_id, self.bearerToken)
-        message = response.json()
-
-        books = message["books"]
-        user_collection = []
-        [user_collection.append(book["isbn"]) for book in books]
+        user_collection = User.from_response(response).isbns
         logging.info(f"\n"
                      f"username:    {self.username}\n"
                      f"books:       {user_collection}\n")
@@ -355,13 +359,9 @@ class Test(unittest.TestCase):
         logging.info("Starting test - remove book from collection")
 
         response = get_user_info(self.user_id, self.bearerToken)
-        message = response.json()
-
-        books = message["books"]
-        user_collection = []
-        [user_collection.append(book["isbn"]) for book in books]
+        user_collection = User.from_response(response).isbns
 
-        isbn_to_remove = random.choice(user_collection)
+        isbn_to_remove = self.rng.choice(user_collection)
 
         try:
             response = remove_book_from_collection(self.user_id, isbn_to_remove, self.bearerToken)
@@ -381,13 +381,9 @@ class Test(unittest.TestCase):
             response = get_user_info(self.user_id, self.bearerToken)
             status_code = response.status_code
 
-            message = response.json()
-
             self.assertEqual(200, status_code)
 
-            books = message["books"]
-            user_collection = []
-            [user_collection.append(book["isbn"]) for book in books]
+            user_collection = User.from_response(response).isbns
 
             self.assertEqual(False, isbn_to_remove in user_collection)
 
@@ -401,11 +397,7 @@ class Test(unittest.TestCase):
             raise
 
         response = get_user_info(self.user_id, self.bearerToken)
-        message = response.json()
-
-        books = message["books"]
-        user_collection = []
-        [user_collection.append(book["isbn"]) for book in books]
+        user_collection = User.from_response(response).isbns
         logging.info(f"\n"
                      f"username:    {self.username}\n"
                      f"books:       {user_collection}\n")
@@ -416,7 +408,7 @@ class Test(unittest.TestCase):
         """
         logging.info("Starting test - try to remove a book not in collection")
 
-        isbn_not_in_collection = random.choice(self.available_books)
+        isbn_not_in_collection = self.rng.choice(self.available_books)
 
         try:
             response = remove_book_from_collection(self.user_id, isbn_not_in_collection, self.bearerToken)
@@ -432,11 +424,7 @@ class Test(unittest.TestCase):
             raise
 
         response = get_user_info(self.user_id, self.bearerToken)
-        message = response.json()
-
-        books = message["books"]
-        user_collection = []
-        [user_collection.append(book["isbn"]) for book in books]
+        user_collection = User.from_response(response).isbns
         logging.info(f"\n"
                      f"username:    {self.username}\n"
                      f"books:       {user_collection}\n")
\ No newline at end of file
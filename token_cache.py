@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+CachedToken = namedtuple('CachedToken', ['token', 'expires', 'digest'])
+
+
+def parse_expires(value):
+    """
+    Convert the 'expires' field of a GenerateToken response to a timestamp
+    :param      value:      ISO 8601 date, e.g. 2023-10-03T13:42:40.123Z
+    :return:    expires:    Seconds since the epoch, or None if value is empty or malformed
+    """
+    if not value:
+        return None
+    try:
+        expires = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if expires.tzinfo is None:
+        expires = expires.replace(tzinfo=timezone.utc)
+    return expires.timestamp()
+
+
+def _digest(password):
+    return hashlib.sha256(password.encode('utf-8')).hexdigest()
+
+
+class TokenCache:
+    """
+    Bearer tokens of BookStore users, keyed by username.
+
+    A token is reused until it is refresh_margin seconds away from the expiry
+    reported by GenerateToken. Concurrent callers asking for the same user wait
+    for a single GenerateToken call instead of sending their own. With a path,
+    tokens are also persisted to disk and shared with later processes.
+    """
+
+    def __init__(self, refresh_margin=60, path=None):
+        """
+        :param      refresh_margin:     Seconds before expiry at which a token is refreshed
+        :param      path:               JSON file to persist tokens in, memory only if None
+        """
+        self.refresh_margin = refresh_margin
+        self.path = path
+        self.fetches = 0
+
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._user_locks = {}
+        self._async_user_locks = {}
+
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            return
+        self._entries = {username: CachedToken(*entry) for username, entry in entries.items()}
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.tokens-')
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            json.dump({username: list(entry) for username, entry in self._entries.items()}, file)
+        os.replace(temporary, self.path)
+
+    def _fresh(self, username, password):
+        entry = self._entries.get(username)
+        if entry is None or entry.digest != _digest(password):
+            return None
+        if entry.expires is not None and entry.expires - self.refresh_margin <= time.time():
+            return None
+        return entry.token
+
+    def _store(self, username, password, response):
+        if response.status_code != 200:
+            return None
+        message = response.json()
+        token = message.get("token")
+        if not token:
+            return None
+        with self._lock:
+            self._entries[username] = CachedToken(token, parse_expires(message.get("expires")), _digest(password))
+            self._save()
+        return token
+
+    def _user_lock(self, username):
+        with self._lock:
+            return self._user_locks.setdefault(username, threading.Lock())
+
+    def _get(self, username, password, fetch):
+        token = self._fresh(username, password)
+        if token is not None:
+            return token, False
+        with self._user_lock(username):
+            token = self._fresh(username, password)
+            if token is not None:
+                return token, False
+            self.fetches += 1
+            return self._store(username, password, fetch(username, password)), True
+
+    def get(self, username, password, fetch):
+        """
+        Return a valid token of the user, generating one only if none is cached
+        :param      username:   Username of the specified user
+        :param      password:   Password of the specified user
+        :param      fetch:      Function sending GenerateToken, e.g. BookStoreClient.generate_token
+        :return:    token:      Bearer token, or None if the user could not be authorized
+        """
+        return self._get(username, password, fetch)[0]
+
+    def invalidate(self, username, token=None):
+        """
+        Drop the cached token of a user
+        :param      username:   Username of the specified user
+        :param      token:      Only drop the entry if it still holds this token
+        """
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None and (token is None or entry.token == token):
+                del self._entries[username]
+                self._save()
+
+    def call(self, username, password, fetch, operation):
+        """
+        Run an authorized operation with the cached token, refreshing it once on 401
+        :param      username:   Username of the specified user
+        :param      password:   Password of the specified user
+        :param      fetch:      Function sending GenerateToken
+        :param      operation:  Function taking the token and returning a response
+        :return:    response:   Response message of the operation
+        """
+        token, fetched = self._get(username, password, fetch)
+        response = operation(token or " ")
+        if response.status_code == 401 and token and not fetched:
+            self.invalidate(username, token)
+            token = self.get(username, password, fetch)
+            response = operation(token or " ")
+        return response
+
+    def _async_user_lock(self, username):
+        lock = self._async_user_locks.get(username)
+        if lock is None:
+            lock = self._async_user_locks[username] = asyncio.Lock()
+        return lock
+
+    async def _aget(self, username, password, fetch):
+        token = self._fresh(username, password)
+        if token is not None:
+            return token, False
+        async with self._async_user_lock(username):
+            token = self._fresh(username, password)
+            if token is not None:
+                return token, False
+            self.fetches += 1
+            return self._store(username, password, await fetch(username, password)), True
+
+    async def aget(self, username, password, fetch):
+        """
+        Coroutine version of get() taking an async fetch function
+        :param      username:   Username of the specified user
+        :param      password:   Password of the specified user
+        :param      fetch:      Coroutine function sending GenerateToken
+        :return:    token:      Bearer token, or None if the user could not be authorized
+        """
+        return (await self._aget(username, password, fetch))[0]
+
+    async def acall(self, username, password, fetch, operation):
+        """
+        Coroutine version of call() taking async fetch and operation functions
+        :param      username:   Username of the specified user
+        :param      password:   Password of the specified user
+        :param      fetch:      Coroutine function sending GenerateToken
+        :param      operation:  Coroutine function taking the token and returning a response
+        :return:    response:   Response message of the operation
+        """
+        token, fetched = await self._aget(username, password, fetch)
+        response = await operation(token or " ")
+        if response.status_code == 401 and token and not fetched:
+            self.invalidate(username, token)
+            token = await self.aget(username, password, fetch)
+            response = await operation(token or " ")
+        return response